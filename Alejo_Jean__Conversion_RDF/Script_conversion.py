@@ -1,13 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import pandas as pd
-from rdflib import Graph, Literal, RDF, URIRef, Namespace
-from rdflib.namespace import XSD
-import uuid
 import threading
 import yaml
-import re
-import traceback
+import os
+
+from csv_index import CsvRecordIndex
+from csv_ingest import read_csv_header
+from mapping_inference import profile_csv, suggest_mapping
+from conversion_engine import load_mapping_file
+from conversion_worker import STOP_GRACE_MS, ConversionWorker
+from join_sources import join_mapping_errors, resolve_source_paths
+from value_transforms import transform_errors
+from ui_channel import MAX_LOG_LINES, UI_TICK_MS, UiChannel
 
 class YAMLEditorWindow:
     """Ventana independiente para editar archivos YAML de mapeo."""
@@ -156,6 +160,9 @@ class YAMLEditorWindow:
                         
                 if 'properties' in yaml_data and not isinstance(yaml_data['properties'], dict):
                     errors.append("El campo 'properties' debe ser un objeto")
+                else:
+                    errors.extend(join_mapping_errors(yaml_data))
+                    errors.extend(transform_errors(yaml_data))
                     
             if errors:
                 self.validation_text.insert(tk.END, "❌ ERRORES DE VALIDACIÓN:\n")
@@ -225,6 +232,10 @@ class YAMLEditorWindow:
                 messagebox.showerror("Error", "El mapeo debe contener 'base_uri' y 'subject'.")
                 return
                 
+            # Las rutas de 'sources' son relativas al archivo de mapeo, como al cargarlo
+            resolve_source_paths(yaml_data, os.path.dirname(os.path.abspath(self.yaml_path)) if self.yaml_path
+                                 else os.getcwd())
+
             # Aplicar a la aplicación principal
             self.parent.mapping_data = yaml_data
             if self.yaml_path:
@@ -266,13 +277,25 @@ class RDFConverterApp:
         self.root.geometry("900x750")
         
         # Variables de estado
-        self.df = None
+        self.csv_columns = None       # Cabecera del CSV; sus filas sólo las lee el proceso de conversión
+        self.csv_index = None         # Índice de registros del CSV para la previsualización por páginas
+        self.preview_first = 0        # Primera fila de datos visible en la previsualización
+        self.preview_rows_indexed = 0
         self.mapping_data = None
-        self.graph = Graph()
-        self.conversion_thread = None
-        self.stop_conversion = False
+        # El motor y los triples viven en un proceso aparte; la interfaz sólo presenta (ver conversion_worker)
+        self.worker = ConversionWorker()
+        self.converting = False
+        self.stop_timer = None        # Terminación forzosa pendiente tras pulsar "Detener"
+        self.store_path = None        # Almacén SQLite en uso si se activa el almacén en disco
+        self.triple_count = 0         # Triples acumulados según la última conversión
+        self.resume_row = None        # Filas ya convertidas de la última conversión detenida
+        self.use_disk_store = tk.BooleanVar(value=False)
+        # Los logs y el progreso se encolan y se muestran en un tic fijo (ver ui_channel)
+        self.ui_channel = UiChannel()
         
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.root.after(UI_TICK_MS, self._drain_ui_channel)
         
     def create_widgets(self):
         main_frame = ttk.Frame(self.root, padding=10)
@@ -304,12 +327,16 @@ class RDFConverterApp:
         data_frame = ttk.LabelFrame(main_frame, text="Previsualización de Datos CSV", padding=10)
         data_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        self.data_table = ttk.Treeview(data_frame)
+        # Tabla virtual: sólo contiene las filas visibles, que se leen del índice del CSV al desplazarse
+        self.data_table = ttk.Treeview(data_frame, show='headings')
         self.data_table.pack(fill=tk.BOTH, expand=True, side=tk.LEFT)
         
-        vsb = ttk.Scrollbar(data_frame, orient="vertical", command=self.data_table.yview)
-        vsb.pack(side=tk.RIGHT, fill=tk.Y)
-        self.data_table.configure(yscrollcommand=vsb.set)
+        self.preview_scrollbar = ttk.Scrollbar(data_frame, orient="vertical", command=self._scroll_preview)
+        self.preview_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.data_table.bind('<Configure>', lambda event: self.show_data_preview())
+        self.data_table.bind('<MouseWheel>', self._on_preview_wheel)
+        self.data_table.bind('<Button-4>', self._on_preview_wheel)
+        self.data_table.bind('<Button-5>', self._on_preview_wheel)
         
         # --- Proceso y Logs ---
         log_frame = ttk.LabelFrame(main_frame, text="Proceso de Conversión", padding=10)
@@ -320,6 +347,10 @@ class RDFConverterApp:
         
         self.progress = ttk.Progressbar(log_frame, orient=tk.HORIZONTAL, mode='determinate')
         self.progress.pack(fill=tk.X, pady=5)
+
+        # Métricas de la conversión en curso o de la última (ver conversion_metrics)
+        self.metrics_label = ttk.Label(log_frame, text="")
+        self.metrics_label.pack(fill=tk.X)
         
         # --- Botones de Control ---
         btn_frame = ttk.Frame(main_frame)
@@ -327,6 +358,8 @@ class RDFConverterApp:
         
         ttk.Button(btn_frame, text="Iniciar Conversión", command=self.start_conversion).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Detener", command=self.stop_process).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Reanudar", command=self.resume_conversion).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(btn_frame, text="Almacén en disco (SQLite)", variable=self.use_disk_store).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Guardar RDF", command=self.save_rdf).pack(side=tk.RIGHT, padx=5)
         ttk.Button(btn_frame, text="Limpiar Logs", command=self.clear_logs).pack(side=tk.RIGHT, padx=5)
     
@@ -338,7 +371,7 @@ class RDFConverterApp:
             editor = YAMLEditorWindow(self, yaml_path=yaml_path, yaml_content=self.mapping_data)
         else:
             # Crear nuevo mapeo
-            if self.df is not None:
+            if self.csv_columns is not None:
                 # Si hay CSV cargado, generar mapeo base
                 suggested_mapping = self._guess_mapping_from_df()
                 editor = YAMLEditorWindow(self, yaml_content=suggested_mapping)
@@ -368,14 +401,26 @@ class RDFConverterApp:
         if not path: return
         
         self.csv_path.set(path)
+        self._load_csv_file(path)
+
+    def _load_csv_file(self, path):
+        """
+        Lee la cabecera del CSV e indexa sus registros en segundo plano para
+        la previsualización por páginas. Las filas no se cargan en la
+        interfaz: el proceso de conversión lee el CSV por bloques.
+        """
         try:
-            self.df = pd.read_csv(path)
-            self.show_data_preview()
-            self.log("Archivo CSV cargado exitosamente.")
-            self.log(f"Filas detectadas: {len(self.df)}")
-            self.log(f"Columnas: {', '.join(self.df.columns)}")
+            self.csv_columns = read_csv_header(path)
+            if self.csv_index is None or self.csv_index.path != path:
+                self._open_csv_index(path)
         except Exception as e:
+            self.csv_columns = None
             messagebox.showerror("Error al Cargar CSV", f"No se pudo cargar el archivo:\n{e}")
+            return
+
+        self.resume_row = None
+        self.log("Archivo CSV cargado exitosamente.")
+        self.log(f"Columnas: {', '.join(self.csv_columns)}")
 
     def load_mapping(self):
         path = self.mapping_path.get()
@@ -384,19 +429,17 @@ class RDFConverterApp:
         if not path: return
 
         self.mapping_path.set(path)
+        self.resume_row = None
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                self.mapping_data = yaml.safe_load(f)
+            self.mapping_data = load_mapping_file(path)
             self.log("Archivo de mapeo YAML cargado exitosamente.")
-            if 'base_uri' not in self.mapping_data or 'subject' not in self.mapping_data:
-                raise ValueError("El archivo de mapeo debe contener 'base_uri' y 'subject'.")
             self.log("Mapeo validado: OK.")
         except Exception as e:
             self.mapping_data = None
             messagebox.showerror("Error al Cargar Mapeo", f"No se pudo cargar o parsear el archivo YAML:\n{e}")
 
     def generate_mapping(self):
-        if self.df is None:
+        if self.csv_columns is None:
             messagebox.showwarning("Advertencia", "Cargue primero un archivo CSV para poder generar un mapeo.")
             return
 
@@ -420,306 +463,252 @@ class RDFConverterApp:
             messagebox.showerror("Error al Generar Mapeo", f"No se pudo generar el archivo de mapeo:\n{e}")
             self.log(f"ERROR: No se pudo generar el mapeo. {e}")
         
-    def _detect_csv_context(self, cols):
-        """Detecta si el CSV es de naturaleza académica o general."""
-        cols_lower = {c.lower().replace(' ', '').replace('_', '') for c in cols}
-        academic_kws = {'doi', 'abstract', 'sourcetitle', 'publication', 'journal', 'volume', 'issue', 'citedby', 'authorkeywords', 'authorsid'}
-        academic_score = len(cols_lower.intersection(academic_kws))
-        
-        if academic_score >= 3:
-            self.log("Contexto detectado: Académico (se usarán vocabularios DC, DCTERMS, FOAF).")
-            return 'academic'
-            
-        self.log("Contexto detectado: General (se usará Schema.org y FOAF).")
-        return 'general'
-
     def _guess_mapping_from_df(self):
         """
-        Genera un mapeo inteligente basado en el contexto detectado del CSV.
+        Genera un mapeo inteligente basado en el contexto detectado del CSV y
+        en una muestra de sus filas leída del archivo (no hace falta esperar a
+        que termine de cargarse en memoria).
         """
-        self.log("Iniciando generación de mapeo inteligente...")
-        cols = self.df.columns
-        context = self._detect_csv_context(cols)
-
-        mapping = {
-            'base_uri': 'http://example.org/data/',
-            'namespaces': {
-                'ex': 'http://example.org/data/',
-                'schema': 'http://schema.org/',
-                'foaf': 'http://xmlns.com/foaf/0.1/',
-                'dc': 'http://purl.org/dc/elements/1.1/',
-                'dcterms': 'http://purl.org/dc/terms/',
-                'bibo': 'http://purl.org/ontology/bibo/',
-                'xsd': 'http://www.w3.org/2001/XMLSchema#'
-            },
-            'subject': {},
-            'properties': {}
-        }
-
-        mapping['subject']['class'] = 'bibo:AcademicArticle' if context == 'academic' else 'schema:Thing'
-
-        pk_candidates = ['id', 'doi', 'title', 'name', 'identifier']
-        pk_col_lower = next((c for c in pk_candidates if c in (col.lower() for col in cols)), cols[0].lower())
-        pk_col = next(c for c in cols if c.lower() == pk_col_lower)
-
-        mapping['subject']['primary_key'] = pk_col
-        mapping['subject']['uri_template'] = f"resource/{self._sanitize_for_uri(pk_col)}/{{value}}"
-        self.log(f"Clave primaria sugerida: '{pk_col}'")
-        
-        processed_cols = set()
-
-        for col in cols:
-            if col in processed_cols: continue
-            col_lower = col.lower()
-            prop = {}
-            
-            if 'author' in col_lower and 'id' not in col_lower and 'keyword' not in col_lower:
-                prop = {
-                    'predicate': 'dc:creator' if context == 'academic' else 'schema:author',
-                    'type': 'relation', 'separator': ';',
-                    'target': {
-                        'uri_template': 'person/{value}', 'class': 'foaf:Person',
-                        'properties': [{'predicate': 'foaf:name', 'type': 'literal', 'source': 'self'}]
-                    }
-                }
-                id_col_candidate = next((c for c in cols if 'author' in c.lower() and 'id' in c.lower()), None)
-                if id_col_candidate:
-                    prop['target']['properties'].append({'predicate': 'dc:identifier', 'type': 'literal', 'source': id_col_candidate})
-                    self.log(f"Relación de persona encontrada: '{col}' -> '{id_col_candidate}' (usando FOAF)")
-                    processed_cols.add(id_col_candidate)
-            
-            elif col_lower in ['id', 'identifier']:
-                prop = {'predicate': 'dcterms:identifier' if context == 'academic' else 'schema:identifier', 'type': 'literal'}
-
-            elif context == 'academic':
-                if 'keyword' in col_lower or 'subject' in col_lower: prop = {'predicate': 'dcterms:subject', 'type': 'literal', 'separator': ';'}
-                elif 'year' in col_lower: prop = {'predicate': 'dcterms:issued', 'type': 'literal', 'datatype': 'xsd:gYear'}
-                elif 'date' in col_lower: prop = {'predicate': 'dcterms:issued', 'type': 'literal', 'datatype': 'xsd:date'}
-                elif 'title' in col_lower: prop = {'predicate': 'dc:title', 'type': 'literal'}
-                elif 'abstract' in col_lower: prop = {'predicate': 'dcterms:abstract', 'type': 'literal'}
-                elif 'doi' in col_lower: prop = {'predicate': 'bibo:doi', 'type': 'literal'}
-                elif 'link' in col_lower or 'url' in col_lower: prop = {'predicate': 'foaf:page', 'type': 'uri'}
-                else: prop = {'predicate': f'ex:{self._sanitize_for_uri(col)}', 'type': 'literal'}
-            
-            else: # General context
-                if 'keyword' in col_lower or 'subject' in col_lower: prop = {'predicate': 'schema:keywords', 'type': 'literal', 'separator': ';'}
-                elif 'year' in col_lower: prop = {'predicate': 'schema:datePublished', 'type': 'literal', 'datatype': 'xsd:gYear'}
-                elif 'date' in col_lower: prop = {'predicate': 'schema:datePublished', 'type': 'literal', 'datatype': 'xsd:date'}
-                elif 'title' in col_lower or 'name' in col_lower: prop = {'predicate': 'schema:name', 'type': 'literal'}
-                elif 'description' in col_lower: prop = {'predicate': 'schema:description', 'type': 'literal'}
-                elif 'doi' in col_lower: prop = {'predicate': 'bibo:doi', 'type': 'literal'}
-                elif 'link' in col_lower or 'url' in col_lower: prop = {'predicate': 'schema:url', 'type': 'uri'}
-                else: prop = {'predicate': f'ex:{self._sanitize_for_uri(col)}', 'type': 'literal'}
-            
-            if prop:
-                mapping['properties'][col] = prop
-                processed_cols.add(col)
+        stats = profile_csv(self.csv_path.get(), log=self.log)
+        return suggest_mapping(self.csv_columns, stats, log=self.log)
+
+    def _open_csv_index(self, path):
+        """Sustituye el índice de previsualización por el de `path` y lo construye en segundo plano."""
+        if self.csv_index is not None:
+            self.csv_index.close()
+        index = self.csv_index = CsvRecordIndex(path)
+        self.preview_first = 0
+        self.preview_rows_indexed = 0
+        self.show_data_preview()
+        thread = threading.Thread(target=self._build_csv_index, args=(index,))
+        thread.daemon = True
+        thread.start()
+
+    def _build_csv_index(self, index):
+        try:
+            index.build()
+        except Exception as e:
+            self.log(f"ERROR: No se pudo indexar el CSV para la previsualización. {e}")
+            return
+        if index.complete:
+            self.log(f"Filas detectadas: {len(index)}")
 
-        self.log("Generación de mapeo inteligente completada.")
-        return mapping
+    def _preview_page_size(self):
+        """Filas que caben en la tabla (la cabecera ocupa aproximadamente una fila)."""
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        return max(1, self.data_table.winfo_height() // row_height - 1)
 
     def show_data_preview(self):
-        for item in self.data_table.get_children(): self.data_table.delete(item)
-        if self.df is None: return
-        self.data_table['columns'] = list(self.df.columns)
-        self.data_table['show'] = 'headings'
-        for column in self.df.columns:
-            self.data_table.heading(column, text=column)
-            self.data_table.column(column, width=120, anchor='w')
-        for _, row in self.df.head(20).iterrows():
-            self.data_table.insert('', 'end', values=list(row.map(lambda x: str(x)[:100])))
+        """Muestra en la tabla la página de filas que empieza en `preview_first`, leída del índice del CSV."""
+        table = self.data_table
+        table.delete(*table.get_children())
+        index = self.csv_index
+        if index is None: return
+        header = index.read_header()
+        if list(table['columns']) != header:
+            table['columns'] = header
+            for column in header:
+                table.heading(column, text=column)
+                table.column(column, width=120, anchor='w')
+
+        total = self.preview_rows_indexed = len(index)
+        page = self._preview_page_size()
+        self.preview_first = max(0, min(self.preview_first, total - page))
+        for values in index.rows(self.preview_first, page):
+            table.insert('', 'end', values=[value[:100] for value in values])
+        if total:
+            self.preview_scrollbar.set(self.preview_first / total, min(self.preview_first + page, total) / total)
+        else:
+            self.preview_scrollbar.set(0, 1)
+
+    def _scroll_preview(self, action, amount, unit=None):
+        """Comando de la barra de desplazamiento: ('moveto', fracción) o ('scroll', n, 'units'|'pages')."""
+        if self.csv_index is None: return
+        if action == 'moveto':
+            self.preview_first = int(float(amount) * self.preview_rows_indexed)
+        else:
+            step = self._preview_page_size() if unit == 'pages' else 1
+            self.preview_first += int(amount) * step
+        self.show_data_preview()
+
+    def _on_preview_wheel(self, event):
+        # Windows y macOS usan event.delta; X11 los botones 4 y 5
+        direction = -1 if event.num == 4 or getattr(event, 'delta', 0) > 0 else 1
+        self._scroll_preview('scroll', direction * 3, 'units')
+        return 'break'
 
     def log(self, message):
-        def _log():
+        self.ui_channel.log(message)
+
+    def update_progress(self, value, maximum=None):
+        self.ui_channel.progress(value, maximum)
+
+    def _drain_ui_channel(self):
+        """Muestra de una vez los mensajes y el último progreso acumulados desde el tic anterior."""
+        self._poll_worker()
+        messages, progress = self.ui_channel.drain()
+        if messages:
             self.log_area.configure(state='normal')
-            self.log_area.insert(tk.END, message + "\n")
+            self.log_area.insert(tk.END, "\n".join(messages[-MAX_LOG_LINES:]) + "\n")
+            # El área de logs es un anillo: se descartan las líneas más antiguas
+            lines = int(self.log_area.index('end-1c').split('.')[0]) - 1
+            if lines > MAX_LOG_LINES:
+                self.log_area.delete('1.0', f'{lines - MAX_LOG_LINES + 1}.0')
             self.log_area.configure(state='disabled')
             self.log_area.yview(tk.END)
-        self.root.after(0, _log)
-
-    def update_progress(self, value):
-        def _update(): self.progress['value'] = value
-        self.root.after(0, _update)
+        if self.csv_index is not None and len(self.csv_index) != self.preview_rows_indexed:
+            # El índice sigue creciendo: se actualiza la barra de desplazamiento (y la página si estaba vacía)
+            self.show_data_preview()
+        if progress is not None:
+            value, maximum = progress
+            if maximum is not None: self.progress['maximum'] = maximum
+            self.progress['value'] = value
+        self.root.after(UI_TICK_MS, self._drain_ui_channel)
+
+    def _poll_worker(self):
+        """Recoge los eventos del proceso de conversión y los presenta."""
+        for event in self.worker.events():
+            kind = event[0]
+            if kind == 'tick':
+                _, messages, progress, metrics = event
+                self.ui_channel.extend(messages)
+                if progress is not None: self.update_progress(*progress)
+                if metrics is not None: self.metrics_label['text'] = metrics
+                continue
+            if kind in ('done', 'refused', 'died') or (kind == 'error' and event[1] == 'convert'):
+                self._conversion_ended()
+            if kind == 'done':
+                self.resume_row = event[1]['resume_row']
+                self.triple_count = event[1]['triples']
+            elif kind == 'saved':
+                if event[2] == 'bulk':
+                    messagebox.showinfo("Éxito", f"Exportación para carga masiva guardada. Manifiesto:\n{event[1]}")
+                else:
+                    messagebox.showinfo("Éxito", f"Archivo RDF guardado como '{event[2]}'.")
+            elif kind == 'refused':
+                messagebox.showwarning(event[1], event[2])
+            elif kind == 'error' and event[1] == 'convert':
+                messagebox.showerror("Error de Conversión", f"Ocurrió un error inesperado:\n{event[2]}\n\nRevise los logs para más detalles.")
+            elif kind == 'error':
+                messagebox.showerror("Error al Guardar", f"No se pudo guardar el archivo:\n{event[2]}")
+            elif kind == 'died':
+                self.log(f"ERROR: El proceso de conversión terminó inesperadamente (código {event[1]}).")
+                self._discard_worker_results()
+
+    def _conversion_ended(self):
+        self.converting = False
+        if self.stop_timer is not None:
+            self.root.after_cancel(self.stop_timer)
+            self.stop_timer = None
+
+    def _discard_worker_results(self):
+        """Tras perder el proceso de conversión: los triples en memoria se pierden; el almacén en disco no."""
+        if self.store_path is None:
+            self.triple_count = 0
+            self.resume_row = None
+        else:
+            self.log("El almacén en disco conserva lo convertido; use 'Reanudar' para continuar desde su punto de control.")
 
     def clear_logs(self):
         self.log_area.configure(state='normal')
         self.log_area.delete(1.0, tk.END)
         self.log_area.configure(state='disabled')
     
+    def _can_start_conversion(self):
+        if self.csv_columns is None: messagebox.showwarning("Advertencia", "Por favor, cargue un archivo CSV."); return False
+        if self.mapping_data is None: messagebox.showwarning("Advertencia", "Por favor, cargue un archivo de mapeo YAML."); return False
+        if self.converting: messagebox.showinfo("Información", "La conversión ya está en progreso."); return False
+        if self.worker.busy: messagebox.showinfo("Información", "Se está guardando el archivo RDF."); return False
+        return True
+
     def start_conversion(self):
-        if self.df is None: messagebox.showwarning("Advertencia", "Por favor, cargue un archivo CSV."); return
-        if self.mapping_data is None: messagebox.showwarning("Advertencia", "Por favor, cargue un archivo de mapeo YAML."); return
-        if self.conversion_thread and self.conversion_thread.is_alive(): messagebox.showinfo("Información", "La conversión ya está en progreso."); return
+        if not self._can_start_conversion(): return
         
-        self.stop_conversion = False
-        self.graph = Graph()
         self.clear_logs()
-        self.progress['value'] = 0
-        
-        self.conversion_thread = threading.Thread(target=self.run_conversion_engine)
-        self.conversion_thread.daemon = True
-        self.conversion_thread.start()
+        if self.use_disk_store.get():
+            if not self._choose_disk_store(): return
+        else:
+            self.store_path = None
+        self._launch_conversion(resume=False)
+
+    def resume_conversion(self):
+        """
+        Continúa la última conversión detenida. En memoria, desde el último
+        bloque completado; con el almacén en disco, desde su punto de control,
+        aunque la aplicación se haya cerrado o haya fallado entretanto.
+        """
+        if not self._can_start_conversion(): return
+
+        if self.use_disk_store.get():
+            if not self._choose_disk_store(): return
+        elif self.resume_row is None or self.store_path is not None:
+            messagebox.showinfo("Información", "No hay una conversión detenida que reanudar."); return
+        self._launch_conversion(resume=True)
+
+    def _launch_conversion(self, resume):
+        """Envía la conversión al proceso de conversión; los logs y el progreso llegan en el tic de la interfaz."""
+        index = self.csv_index
+        total_rows = len(index) if index is not None and index.complete else None
+        if total_rows is not None: self.progress['maximum'] = total_rows
+        self.progress['value'] = (self.resume_row or 0) if resume else 0
+        self.converting = True
+        self.worker.convert(self.csv_path.get(), self.mapping_data, store_path=self.store_path,
+                            resume=resume, total_rows=total_rows)
     
+    def _choose_disk_store(self):
+        """
+        Elige el almacén SQLite. Si ya hay uno en uso, los triples de esta
+        conversión se acumulan en él; si no, se pide el archivo (uno existente
+        también se reutiliza). Devuelve False si el usuario cancela.
+        """
+        if self.store_path is not None: return True
+        path = filedialog.asksaveasfilename(
+            title="Archivo del almacén de triples",
+            defaultextension=".sqlite",
+            filetypes=[("SQLite", "*.sqlite"), ("All files", "*.*")],
+            confirmoverwrite=False
+        )
+        if not path: return False
+        self.store_path = path
+        return True
+
     def stop_process(self):
-        if self.conversion_thread and self.conversion_thread.is_alive():
-            self.stop_conversion = True
-            self.log(">>> Solicitud de detención enviada. Finalizando la fila actual...")
+        if self.converting:
+            self.worker.stop()
+            self.log(">>> Solicitud de detención enviada. Finalizando la fila actual... (use 'Reanudar' para continuar)")
+            if self.stop_timer is None:
+                self.stop_timer = self.root.after(STOP_GRACE_MS, self._force_stop)
         else:
             self.log("No hay un proceso de conversión activo para detener.")
+
+    def _force_stop(self):
+        """Termina el proceso de conversión si el motor no atendió la detención a tiempo."""
+        self.stop_timer = None
+        self._poll_worker()
+        if not self.converting: return
+        self.worker.kill()
+        self._conversion_ended()
+        self.log(">>> El motor no se detuvo a tiempo: proceso de conversión terminado.")
+        self._discard_worker_results()
     
     def save_rdf(self):
-        if len(self.graph) == 0: messagebox.showwarning("Advertencia", "No hay datos RDF para guardar."); return
+        if self.converting or self.worker.busy: messagebox.showinfo("Información", "Espere a que termine la conversión en curso."); return
+        if self.triple_count == 0: messagebox.showwarning("Advertencia", "No hay datos RDF para guardar."); return
         
         path = filedialog.asksaveasfilename(
             defaultextension=".ttl",
-            filetypes=[("Turtle", "*.ttl"), ("RDF/XML", "*.rdf"), ("N-Triples", "*.nt"), ("All files", "*.*")]
+            filetypes=[("Turtle", "*.ttl"), ("RDF/XML", "*.rdf"), ("N-Triples", "*.nt"),
+                       ("Carga masiva (N-Triples ordenado en shards gzip)", "*.manifest.json"), ("All files", "*.*")]
         )
         if not path: return
 
-        format_map = {'.ttl': 'turtle', '.rdf': 'xml', '.nt': 'nt'}
-        file_ext = '.' + path.split('.')[-1]
-        rdf_format = format_map.get(file_ext, 'turtle')
-
-        try:
-            self.graph.serialize(destination=path, format=rdf_format, encoding='utf-8')
-            self.log(f"Archivo RDF guardado exitosamente en: {path}")
-            messagebox.showinfo("Éxito", f"Archivo RDF guardado como '{rdf_format}'.")
-        except Exception as e:
-            messagebox.showerror("Error al Guardar", f"No se pudo guardar el archivo:\n{e}")
-
-    def run_conversion_engine(self):
-        try:
-            self.log("--- INICIANDO MOTOR DE CONVERSIÓN RDF ---")
-            
-            ns_map = {k: Namespace(v) for k, v in self.mapping_data.get('namespaces', {}).items()}
-            for prefix, namespace in ns_map.items(): self.graph.bind(prefix, namespace)
-            base_uri = Namespace(self.mapping_data['base_uri'])
-
-            subject_conf = self.mapping_data['subject']
-            pk_col = subject_conf['primary_key']
-            uri_template = subject_conf['uri_template']
-            subject_class = self._resolve_prefix(subject_conf['class'], ns_map)
-
-            total_rows = len(self.df)
-            self.progress['maximum'] = total_rows
-
-            for idx, row in self.df.iterrows():
-                if self.stop_conversion:
-                    self.log("--- CONVERSIÓN DETENIDA POR EL USUARIO ---")
-                    return
-                
-                self.update_progress(idx + 1)
-                pk_val = row.get(pk_col)
-                if pd.isna(pk_val) or str(pk_val).strip() == '':
-                    self.log(f"ADVERTENCIA: Saltando fila {idx + 1} por clave primaria vacía.")
-                    continue
-
-               
-                s_uri_val = self._sanitize_for_uri(str(pk_val))
-                subject_uri = base_uri[uri_template.format(value=s_uri_val)]
-                self.graph.add((subject_uri, RDF.type, subject_class))
-                
-                for col, prop_conf in self.mapping_data.get('properties', {}).items():
-                    if col not in row or pd.isna(row[col]): continue
-
-                    predicate = self._resolve_prefix(prop_conf['predicate'], ns_map)
-                    
-                    ## MEJORA ##: Lógica robusta para dividir valores multivaluados.
-                    # Se eliminan los espacios en blanco de cada valor y se ignoran los valores vacíos
-                    # que podrían resultar de separadores al final de la cadena (ej: "val1;val2;").
-                    separator = prop_conf.get('separator')
-                    if separator:
-                        values = [v.strip() for v in str(row[col]).split(separator) if v.strip()]
-                    else:
-                        values = [str(row[col])]
-                    
-                    if not values: continue
-
-                    prop_type = prop_conf.get('type', 'literal')
-
-                    if prop_type == 'literal':
-                        for value in values:
-                            datatype = self._resolve_prefix(prop_conf['datatype'], ns_map) if 'datatype' in prop_conf else None
-                            self.graph.add((subject_uri, predicate, Literal(value, datatype=datatype)))
-                    
-                    elif prop_type == 'uri':
-                        for value in values:
-                            try:
-                                self.graph.add((subject_uri, predicate, URIRef(value)))
-                            except Exception as e:
-                                self.log(f"ADVERTENCIA: Fila {idx+1}, valor '{value}' en columna '{col}' no es una URI válida. Saltando. Error: {e}")
-
-                    ## MEJORA ##: Lógica robusta para manejar relaciones multivaluadas y sus propiedades.
-                    # Se reemplaza el frágil sistema de búsqueda por índice con una iteración paralela por índice (i),
-                    # lo que permite manejar correctamente valores duplicados y listas de diferente longitud.
-                    elif prop_type == 'relation':
-                        target_conf = prop_conf['target']
-                        target_class = self._resolve_prefix(target_conf['class'], ns_map)
-                        target_uri_template = target_conf['uri_template']
-
-                        # Recolectar las columnas de origen para las sub-propiedades
-                        sub_prop_sources = {}
-                        for sub_prop in target_conf.get('properties', []):
-                            source_col_name = sub_prop.get('source')
-                            if source_col_name and source_col_name != 'self':
-                                source_values_raw = str(row.get(source_col_name, ''))
-                                if separator:
-                                    sub_prop_sources[source_col_name] = [v.strip() for v in source_values_raw.split(separator)]
-                                else:
-                                    sub_prop_sources[source_col_name] = [source_values_raw.strip()]
-
-                        # Iterar sobre cada valor de la columna principal usando un índice
-                        for i, value in enumerate(values):
-                            o_uri_val = self._sanitize_for_uri(value)
-                            # Se elimina el UUID para que la misma entidad (ej. autor) tenga la misma URI en todo el grafo
-                            object_uri = base_uri[target_uri_template.format(value=o_uri_val)]
-                            
-                            self.graph.add((subject_uri, predicate, object_uri))
-                            self.graph.add((object_uri, RDF.type, target_class))
-                            
-                            # Añadir propiedades a la entidad relacionada (objeto)
-                            for sub_prop in target_conf.get('properties', []):
-                                sub_predicate = self._resolve_prefix(sub_prop['predicate'], ns_map)
-                                source_col = sub_prop.get('source')
-                                sub_val = None
-
-                                if source_col == 'self':
-                                    sub_val = value
-                                elif source_col in sub_prop_sources:
-                                    # Se usa el índice 'i' para obtener el valor correspondiente de la otra columna
-                                    if i < len(sub_prop_sources[source_col]):
-                                        sub_val = sub_prop_sources[source_col][i]
-                                    else:
-                                        self.log(f"ADVERTENCIA: Fila {idx + 1}, col '{col}'. El número de valores en '{col}' y '{source_col}' no coincide. "
-                                                 f"No se pudo asignar propiedad '{sub_prop['predicate']}' para '{value}'.")
-                                
-                                if sub_val and str(sub_val).strip():
-                                    self.graph.add((object_uri, sub_predicate, Literal(sub_val)))
-            
-            self.log(f"\n--- CONVERSIÓN COMPLETADA EXITOSAMENTE ---\nTotal de triples RDF generados: {len(self.graph)}")
+        # La serialización corre en el proceso de conversión; el resultado llega como evento 'saved'
+        self.log(f"Guardando RDF en: {path}")
+        self.worker.save(path)
 
-        except Exception as e:
-            # Log completo del error para facilitar la depuración
-            error_details = traceback.format_exc()
-            self.log(f"ERROR CRÍTICO DURANTE LA CONVERSIÓN: {e}\n{error_details}")
-            messagebox.showerror("Error de Conversión", f"Ocurrió un error inesperado:\n{e}\n\nRevise los logs para más detalles.")
-
-    def _resolve_prefix(self, value, ns_map):
-        if not isinstance(value, str) or ':' not in value:
-            return URIRef(value)
-        prefix, name = value.split(':', 1)
-        namespace = ns_map.get(prefix)
-        if namespace:
-            return namespace[name]
-        else:
-            self.log(f"ADVERTENCIA: Prefijo '{prefix}' no encontrado en los namespaces. Usando URN.")
-            return URIRef(f"urn:prefix-not-found:{prefix}:{name}")
-
-    def _sanitize_for_uri(self, value):
-        value = str(value).lower()
-        value = re.sub(r'\s+', '_', value)
-        value = re.sub(r'[^\w\-\._~]', '', value) # Caracteres permitidos en URIs
-        return value[:70]
+    def on_closing(self):
+        self.worker.close()
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
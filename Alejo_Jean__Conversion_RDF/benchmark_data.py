@@ -0,0 +1,236 @@
+"""
+Generador de CSV sintéticos para las pruebas de rendimiento.
+
+Produce archivos con las columnas de `map_scopus.yaml` (artículos de Scopus)
+y de `mapeo_salud.yaml` (encuesta de salud), con tantas filas como se pidan
+y siempre iguales para la misma semilla. En los de Scopus se controla el
+número de autores por artículo, el de palabras clave y su vocabulario, y la
+proporción de autores repetidos entre artículos, que es lo que más pesa en
+la caché de entidades y en el minado de URIs.
+
+Uso:
+    python -m benchmark_data scopus 100000 scopus_100k.csv --authors 8 --duplicate-authors 0.5
+    python -m benchmark_data salud 100000 salud_100k.csv
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+GENERATE_CHUNK_ROWS = 50000
+
+_SURNAMES = ['García', 'Smith', 'Müller', 'Rossi', 'Wang', 'Silva', 'Kowalski', 'Dubois', 'Andrade', 'Tanaka',
+             'Novak', 'Jensen', 'Okafor', 'Pérez', 'Ivanov', 'Kim', 'Nguyen', 'Cohen', 'Larsen', 'Mothes']
+_GIVEN_NAMES = ['Ana', 'John', 'Li', 'María', 'Pedro', 'Susanna', 'Tim', 'Yasser', 'Daniel', 'Milan',
+                'Jack', 'Eva', 'Luis', 'Sofía', 'Kenji', 'Amara', 'Olga', 'Jonas', 'Chloé', 'Ravi']
+_WORDS = ('deformation valley volcanic tectonic radar survey urban subsidence model health learning network '
+          'analysis data energy climate water soil protein cell patient risk study effect method system '
+          'control design signal image quantum graph policy market education student performance').split()
+_DOCUMENT_TYPES = ['Article', 'Review', 'Conference Paper', 'Book Chapter', 'Letter']
+_STAGES = ['Final', 'Article in press']
+_OPEN_ACCESS = ['All Open Access; Gold Open Access', 'All Open Access; Hybrid Gold Open Access', None]
+_FUNDERS = ['National Science Foundation, NSF', 'European Research Council, ERC', 'Royal Society',
+            'Secretaría de Educación Superior, SENESCYT', 'Natural Environment Research Council, NERC']
+
+_CITIES = ['Quito', 'Madrid', 'Lima', 'Bogotá', 'Guayaquil', 'Cuenca', 'Sevilla', 'Valencia']
+_PROFESSIONS = ['Student', 'Teacher', 'Engineer', 'Doctor', 'Lawyer', 'Pharmacist', None]
+_SLEEP = ['Less than 5 hours', '5-6 hours', '7-8 hours', 'More than 8 hours']
+_DIET = ['Healthy', 'Moderate', 'Unhealthy']
+_DEGREES = ['BSc', 'MSc', 'PhD', 'B.Ed', 'MBA', 'Class 12', None]
+
+
+def _choice(rng, values, size):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+
+def _join_groups(values, counts, sep='; '):
+    """Une `values` en grupos consecutivos de tamaño `counts` (una cadena por grupo)."""
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    values = values.tolist()
+    return [sep.join(values[start:end]) for start, end in zip(starts, ends)]
+
+
+def _texts(rng, rows, words):
+    """Textos de `words` palabras del vocabulario fijo."""
+    picks = _choice(rng, _WORDS, (rows, words))
+    return [' '.join(row).capitalize() + '.' for row in picks]
+
+
+class ScopusGenerator:
+    """Genera artículos con forma de exportación de Scopus por bloques."""
+
+    def __init__(self, authors_per_article=6, keywords_per_article=5, keyword_vocabulary=5000,
+                 duplicate_author_rate=0.3, missing_id_rate=0.02, abstract_words=60, seed=0):
+        self.authors_per_article = authors_per_article
+        self.keywords_per_article = keywords_per_article
+        self.keyword_vocabulary = keyword_vocabulary
+        self.duplicate_author_rate = duplicate_author_rate
+        # Artículos cuyo 'Author(s) ID' pierde el último id, como ocurre en exportaciones reales
+        self.missing_id_rate = missing_id_rate
+        self.abstract_words = abstract_words
+        self.rng = np.random.default_rng(seed)
+        self.authors_created = 0
+        self.articles_created = 0
+
+    def _author_ids(self, slots):
+        """
+        Un id de autor por hueco. Con probabilidad `duplicate_author_rate` el
+        hueco reutiliza un autor ya creado (elegido al azar); si no, es nuevo.
+        """
+        rng = self.rng
+        fresh = rng.random(slots) >= self.duplicate_author_rate
+        created_before = self.authors_created + np.cumsum(fresh) - fresh
+        # Sin autores previos no hay a quién repetir
+        fresh |= created_before == 0
+        created_before = self.authors_created + np.cumsum(fresh) - fresh
+        ids = np.where(fresh, created_before, (rng.random(slots) * np.maximum(created_before, 1)).astype(np.int64))
+        self.authors_created += int(fresh.sum())
+        return ids
+
+    def chunk(self, rows):
+        rng = self.rng
+        first = self.articles_created
+        self.articles_created += rows
+
+        # --- Autores ---
+        counts = np.maximum(1, rng.poisson(self.authors_per_article, rows))
+        author_ids = self._author_ids(int(counts.sum()))
+        surnames = np.asarray(_SURNAMES, dtype=object)[author_ids % len(_SURNAMES)]
+        given = np.asarray(_GIVEN_NAMES, dtype=object)[(author_ids // len(_SURNAMES)) % len(_GIVEN_NAMES)]
+        scopus_ids = (57000000000 + author_ids).astype(str).astype(object)
+        suffix = author_ids.astype(str).astype(object)
+        short_names = surnames + suffix + ' ' + np.asarray([name[0] for name in given], dtype=object) + '.'
+        full_names = surnames + suffix + ', ' + given + ' (' + scopus_ids + ')'
+        author_id_lists = _join_groups(scopus_ids, counts)
+        for row in np.flatnonzero((rng.random(rows) < self.missing_id_rate) & (counts > 1)):
+            author_id_lists[row] = author_id_lists[row].rsplit('; ', 1)[0]
+
+        # --- Palabras clave ---
+        kw_counts = np.maximum(1, rng.poisson(self.keywords_per_article, rows))
+        keywords = ('keyword ' + rng.integers(0, self.keyword_vocabulary, int(kw_counts.sum())).astype(str)).astype(object)
+        ix_counts = np.maximum(1, rng.poisson(2 * self.keywords_per_article, rows))
+        index_keywords = ('index term ' + rng.integers(0, 2 * self.keyword_vocabulary, int(ix_counts.sum())).astype(str)).astype(object)
+
+        numbers = np.arange(first, first + rows)
+        eids = [f"2-s2.0-{105000000000 + n}" for n in numbers]
+        dois = [f"10.5555/bench.{n}" for n in numbers]
+        with_pages = rng.random(rows) < 0.6
+        page_start = rng.integers(1, 2000, rows)
+        page_count = rng.integers(2, 40, rows)
+
+        return pd.DataFrame({
+            'Authors': _join_groups(short_names, counts),
+            'Author full names': _join_groups(full_names, counts),
+            'Author(s) ID': author_id_lists,
+            'Title': _texts(rng, rows, 10),
+            'Year': rng.integers(1990, 2026, rows),
+            'Source title': _choice(rng, ['Journal of ' + w.capitalize() for w in _WORDS], rows),
+            'Volume': np.where(rng.random(rows) < 0.9, rng.integers(1, 300, rows).astype(str), None),
+            'Issue': np.where(rng.random(rows) < 0.6, rng.integers(1, 12, rows).astype(str), None),
+            'Art. No.': np.where(with_pages, None, rng.integers(100000, 999999, rows).astype(str)),
+            'Page start': np.where(with_pages, page_start.astype(str), None),
+            'Page end': np.where(with_pages, (page_start + page_count).astype(str), None),
+            'Page count': np.where(with_pages, page_count.astype(str), None),
+            'Cited by': rng.poisson(8, rows),
+            'DOI': dois,
+            'Link': [f"https://www.scopus.com/inward/record.uri?eid={eid}&partnerID=40" for eid in eids],
+            'Abstract': _texts(rng, rows, self.abstract_words),
+            'Author Keywords': _join_groups(keywords, kw_counts),
+            'Index Keywords': _join_groups(index_keywords, ix_counts),
+            'Funding Details': _choice(rng, _FUNDERS, rows),
+            'Funding Texts': _texts(rng, rows, 20),
+            'Document Type': _choice(rng, _DOCUMENT_TYPES, rows),
+            'Publication Stage': _choice(rng, _STAGES, rows),
+            'Open Access': _choice(rng, _OPEN_ACCESS, rows),
+            'Source': 'Scopus',
+            'EID': eids,
+        })
+
+
+class HealthGenerator:
+    """Genera filas con las columnas de la encuesta de salud de `mapeo_salud.yaml`."""
+
+    def __init__(self, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.rows_created = 0
+
+    def chunk(self, rows):
+        rng = self.rng
+        first = self.rows_created
+        self.rows_created += rows
+        student = rng.random(rows) < 0.5
+
+        def scale(missing_mask):
+            values = rng.integers(1, 6, rows).astype(float)
+            values[missing_mask] = np.nan
+            return values
+
+        return pd.DataFrame({
+            'id': np.arange(first, first + rows),
+            'Name': _choice(rng, _GIVEN_NAMES, rows),
+            'Gender': _choice(rng, ['Female', 'Male'], rows),
+            'Age': rng.integers(18, 60, rows).astype(float),
+            'City': _choice(rng, _CITIES, rows),
+            'Working Professional or Student': np.where(student, 'Student', 'Working Professional'),
+            'Profession': np.where(student, None, _choice(rng, _PROFESSIONS, rows)),
+            'Academic Pressure': scale(~student),
+            'Work Pressure': scale(student),
+            'CGPA': np.where(student, np.round(rng.uniform(5, 10, rows), 2), np.nan),
+            'Study Satisfaction': scale(~student),
+            'Job Satisfaction': scale(student),
+            'Sleep Duration': _choice(rng, _SLEEP, rows),
+            'Dietary Habits': _choice(rng, _DIET, rows),
+            'Degree': _choice(rng, _DEGREES, rows),
+            'Have you ever had suicidal thoughts ?': _choice(rng, ['Yes', 'No'], rows),
+            'Work/Study Hours': rng.integers(0, 13, rows).astype(float),
+            'Financial Stress': scale(rng.random(rows) < 0.01),
+            'Family History of Mental Illness': _choice(rng, ['Yes', 'No'], rows),
+        })
+
+
+DATASETS = ('scopus', 'salud')
+
+
+def make_generator(dataset, seed=0, authors=6, keywords=5, keyword_vocabulary=5000, duplicate_authors=0.3):
+    if dataset == 'scopus':
+        return ScopusGenerator(authors_per_article=authors, keywords_per_article=keywords,
+                               keyword_vocabulary=keyword_vocabulary, duplicate_author_rate=duplicate_authors, seed=seed)
+    return HealthGenerator(seed=seed)
+
+
+def write_csv(generator, rows, path, chunk_rows=GENERATE_CHUNK_ROWS):
+    """Escribe `rows` filas del generador en `path`, bloque a bloque."""
+    written = 0
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        generator.chunk(n).to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += n
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='benchmark_data', description="Genera CSV sintéticos para las pruebas de rendimiento.")
+    parser.add_argument('dataset', choices=DATASETS, help="Tipo de CSV: 'scopus' o 'salud'.")
+    parser.add_argument('rows', type=int, help="Número de filas.")
+    parser.add_argument('out', help="Archivo CSV de salida.")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla del generador (por defecto 0).")
+    parser.add_argument('--authors', type=float, default=6, help="Media de autores por artículo (scopus).")
+    parser.add_argument('--keywords', type=float, default=5, help="Media de palabras clave por artículo (scopus).")
+    parser.add_argument('--keyword-vocabulary', type=int, default=5000, help="Palabras clave distintas (scopus).")
+    parser.add_argument('--duplicate-authors', type=float, default=0.3,
+                        help="Proporción de autores que ya aparecieron en otro artículo (scopus, 0-1).")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    generator = make_generator(args.dataset, seed=args.seed, authors=args.authors, keywords=args.keywords,
+                               keyword_vocabulary=args.keyword_vocabulary, duplicate_authors=args.duplicate_authors)
+    write_csv(generator, args.rows, args.out)
+    print(f"{args.out}: {args.rows} filas ({args.dataset})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Pruebas de rendimiento reproducibles del conversor.
+
+Para cada conjunto de datos (Scopus y salud) y cada tamaño (por defecto 1k
+y 100k filas; 1M con --sizes) genera el CSV sintético con benchmark_data (se
+reutiliza si ya existe) y lo convierte con `conversion_cli` en un proceso
+aparte, de modo que el pico de memoria de cada caso sea el suyo. Registra el
+tiempo de la conversión (`elapsed_s` de sus métricas, del que salen filas/s y
+triples/s), el tiempo total del proceso (`wall_s`, con el arranque del
+intérprete y la carga de librerías y archivos), los triples generados y el
+pico de RSS en un archivo de resultados JSON y los compara con una línea base
+guardada: el comando termina con código 1 si algún caso es más lento o usa
+más memoria que la línea base por encima de la tolerancia, si genera otro
+número de triples o si no tiene línea base.
+
+La línea base depende de la máquina; se regenera con --update-baseline.
+
+Uso:
+    python -m benchmark_suite --sizes 1000,100000
+    python -m benchmark_suite --update-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmark_data import DATASETS
+from conversion_metrics import metrics_path_for
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = (1000, 100000)
+DEFAULT_BASELINE = os.path.join(HERE, 'benchmark_baseline.json')
+DEFAULT_RESULTS = 'benchmark_results.json'
+DEFAULT_TOLERANCE = 0.25
+MAPPINGS = {'scopus': 'map_scopus.yaml', 'salud': 'mapeo_salud.yaml'}
+
+
+def case_key(result):
+    return f"{result['dataset']}/{result['rows']}/{result['engine']}/{result['mode']}"
+
+
+def ensure_dataset(data_dir, dataset, rows, seed):
+    """Ruta del CSV sintético; se genera sólo si no existe."""
+    path = os.path.join(data_dir, f"{dataset}_{rows}_s{seed}.csv")
+    if not os.path.exists(path):
+        print(f"Generando {path}...", file=sys.stderr, flush=True)
+        # En un subproceso: en Linux el pico de RSS se hereda al lanzar procesos
+        # hijos y falsearía la medida de las conversiones siguientes
+        subprocess.run([sys.executable, '-m', 'benchmark_data', dataset, str(rows), path, '--seed', str(seed)],
+                       cwd=HERE, check=True)
+    return path
+
+
+def run_case(csv_path, dataset, rows, engine, mode, data_dir):
+    """Convierte `csv_path` con conversion_cli en un subproceso y devuelve el resultado del caso."""
+    out_path = os.path.join(data_dir, f"{dataset}_{rows}.nt")
+    command = [sys.executable, '-m', 'conversion_cli', 'convert', '--csv', csv_path,
+               '--mapping', os.path.join(HERE, MAPPINGS[dataset]), '--out', out_path,
+               '--engine', engine, '--quiet']
+    if mode == 'stream':
+        command.append('--stream')
+    started = time.perf_counter()
+    subprocess.run(command, cwd=HERE, check=True, stdout=subprocess.DEVNULL)
+    wall = time.perf_counter() - started
+
+    with open(metrics_path_for(out_path), 'r', encoding='utf-8') as f:
+        metrics = json.load(f)
+    return {
+        'dataset': dataset,
+        'rows': rows,
+        'engine': engine,
+        'mode': mode,
+        'elapsed_s': metrics['elapsed_s'],
+        'wall_s': round(wall, 3),
+        # Sólo la conversión: el arranque del proceso no depende del tamaño y falsearía los casos pequeños
+        'rows_per_s': round(rows / metrics['elapsed_s'], 1),
+        'triples_per_s': round(metrics['triples'] / metrics['elapsed_s'], 1),
+        'triples': metrics['triples'],
+        'peak_rss_mb': metrics['peak_rss_mb'],
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Lista de regresiones de `results` frente a `baseline` (diccionario clave -> resultado)."""
+    regressions = []
+    for result in results:
+        key = case_key(result)
+        reference = baseline.get(key)
+        if reference is None:
+            # Sin referencia el caso no se puede dar por bueno
+            regressions.append(f"{key}: sin línea base (regenérela con --update-baseline)")
+            continue
+        if result['triples'] != reference['triples']:
+            regressions.append(f"{key}: {result['triples']} triples (línea base: {reference['triples']})")
+        if result['rows_per_s'] < reference['rows_per_s'] * (1 - tolerance):
+            regressions.append(f"{key}: {result['rows_per_s']} filas/s (línea base: {reference['rows_per_s']})")
+        if (result['peak_rss_mb'] and reference.get('peak_rss_mb')
+                and result['peak_rss_mb'] > reference['peak_rss_mb'] * (1 + tolerance)):
+            regressions.append(f"{key}: {result['peak_rss_mb']:.0f} MB de RSS máx. "
+                               f"(línea base: {reference['peak_rss_mb']:.0f} MB)")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='benchmark_suite', description="Pruebas de rendimiento del conversor CSV a RDF.")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Tamaños en filas separados por comas (por defecto 1000,100000).")
+    parser.add_argument('--datasets', default=','.join(DATASETS), help="Conjuntos de datos: scopus, salud o ambos.")
+    parser.add_argument('--engine', choices=('columnar', 'rows'), default='columnar', help="Modo del motor.")
+    parser.add_argument('--mode', choices=('memory', 'stream'), default='memory',
+                        help="Conversión en memoria o en streaming (--stream del CLI).")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla de los datos sintéticos.")
+    parser.add_argument('--data-dir', default='benchmark_runs',
+                        help="Carpeta para los CSV generados y las salidas (se reutilizan entre ejecuciones).")
+    parser.add_argument('--results', default=DEFAULT_RESULTS, help="Archivo JSON de resultados.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Archivo JSON con la línea base.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Empeoramiento admitido respecto a la línea base (por defecto 0.25 = 25%%).")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Guarda los resultados como nueva línea base en lugar de compararlos.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    datasets = [dataset.strip() for dataset in args.datasets.split(',')]
+    data_dir = os.path.abspath(args.data_dir)
+    os.makedirs(data_dir, exist_ok=True)
+
+    results = []
+    for dataset in datasets:
+        for rows in sizes:
+            csv_path = ensure_dataset(data_dir, dataset, rows, args.seed)
+            result = run_case(csv_path, dataset, rows, args.engine, args.mode, data_dir)
+            results.append(result)
+            print(f"{case_key(result)}: {result['elapsed_s']:.2f} s ({result['wall_s']:.2f} s con el arranque), "
+                  f"{result['rows_per_s']:.0f} filas/s, "
+                  f"{result['triples_per_s']:.0f} triples/s, {result['triples']} triples, "
+                  f"RSS máx. {result['peak_rss_mb']:.0f} MB", flush=True)
+
+    with open(args.results, 'w', encoding='utf-8') as f:
+        json.dump({'python': platform.python_version(), 'platform': platform.platform(),
+                   'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}, f, indent=2)
+    print(f"Resultados guardados en {args.results}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    if args.update_baseline:
+        baseline.update({case_key(result): result for result in results})
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Línea base actualizada en {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESIÓN: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
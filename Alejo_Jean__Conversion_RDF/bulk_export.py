@@ -0,0 +1,330 @@
+"""
+Exportación para carga masiva: N-Triples ordenado, sin duplicados y en shards gzip.
+
+Los cargadores masivos de los triple stores van más rápido con N-Triples
+ordenado y sin repeticiones. La exportación no necesita tener la salida en
+memoria: ordenación externa por fusión.
+
+1. Las líneas N-Triples se acumulan en memoria hasta `run_lines`; entonces
+   se ordenan, se descartan las repetidas y se vuelcan a un archivo temporal
+   (un "run").
+2. Los runs se fusionan con heapq.merge (de MERGE_FAN_IN en MERGE_FAN_IN si
+   hay muchos) y las líneas iguales, que quedan contiguas, se escriben una vez.
+3. La salida se reparte en shards `<nombre>-00000.nt.gz` de como mucho
+   `shard_bytes` bytes sin comprimir. Al final se escribe el manifiesto
+   `<nombre>.manifest.json` con el número de triples, el tamaño y el SHA-256
+   de cada shard.
+
+Las líneas se comparan como bytes UTF-8, el mismo orden que `LC_ALL=C sort`.
+El manifiesto se escribe el último: si existe, la exportación está completa.
+"""
+import glob
+import gzip
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from rdf_writers import nt_line
+
+BULK_MANIFEST_SUFFIX = '.manifest.json'
+SHARD_SUFFIX = '.nt.gz'
+# Líneas que se ordenan en memoria antes de volcarlas a un run (unos 100-200 MB con líneas típicas)
+DEFAULT_RUN_LINES = 500_000
+DEFAULT_SHARD_BYTES = 256 * 1024 * 1024
+# Runs abiertos a la vez al fusionar; con más se fusionan por grupos en varias pasadas
+MERGE_FAN_IN = 64
+SHARD_COMPRESSLEVEL = 6
+_WRITE_BATCH_BYTES = 1 << 20
+
+
+def is_bulk_manifest_path(path):
+    return path.endswith(BULK_MANIFEST_SUFFIX)
+
+
+def shard_prefix_for(manifest_path):
+    """`salida.manifest.json` -> `salida` (los shards son `salida-00000.nt.gz`, ...)."""
+    return manifest_path[:-len(BULK_MANIFEST_SUFFIX)] if is_bulk_manifest_path(manifest_path) \
+        else os.path.splitext(manifest_path)[0]
+
+
+class ExternalSorter:
+    """Ordena y elimina duplicados de un flujo de líneas (bytes) de cualquier tamaño usando runs en disco."""
+
+    def __init__(self, temp_dir=None, run_lines=DEFAULT_RUN_LINES):
+        self.run_lines = max(1, run_lines)
+        self.temp_dir = temp_dir
+        self.run_dir = None
+        self.runs = []
+        self.run_count = 0
+        self.pending = set()
+        self.lines_in = 0
+
+    def add_lines(self, lines):
+        """Añade líneas N-Triples codificadas en UTF-8 y terminadas en b'\\n'."""
+        lines = iter(lines)
+        while True:
+            batch = list(itertools.islice(lines, self.run_lines - len(self.pending)))
+            if not batch:
+                return
+            self.lines_in += len(batch)
+            self.pending.update(batch)
+            if len(self.pending) >= self.run_lines:
+                self._spill()
+
+    def add_run(self, path):
+        """Añade como run un archivo ya ordenado (como bytes) y sin líneas repetidas."""
+        self.runs.append(path)
+
+    def _new_run_path(self):
+        if self.run_dir is None:
+            self.run_dir = tempfile.mkdtemp(prefix='bulk_runs_', dir=self.temp_dir)
+        self.run_count += 1
+        return os.path.join(self.run_dir, f"run_{self.run_count:06d}")
+
+    def _spill(self):
+        if not self.pending:
+            return
+        path = self._new_run_path()
+        with open(path, 'wb') as run:
+            run.writelines(sorted(self.pending))
+        self.runs.append(path)
+        self.pending = set()
+
+    @staticmethod
+    def _unique(lines):
+        previous = None
+        for line in lines:
+            if line != previous:
+                yield line
+                previous = line
+
+    def _merge_runs(self, paths):
+        files = [open(path, 'rb') for path in paths]
+        try:
+            yield from self._unique(heapq.merge(*files))
+        finally:
+            for f in files:
+                f.close()
+
+    def merged(self):
+        """Todas las líneas añadidas, ordenadas y sin repetir."""
+        if not self.runs:
+            # Todo cupo en memoria: no hace falta pasar por disco
+            yield from sorted(self.pending)
+            return
+        self._spill()
+        while len(self.runs) > MERGE_FAN_IN:
+            groups = [self.runs[i:i + MERGE_FAN_IN] for i in range(0, len(self.runs), MERGE_FAN_IN)]
+            self.runs = []
+            for group in groups:
+                path = self._new_run_path()
+                with open(path, 'wb') as run:
+                    run.writelines(self._merge_runs(group))
+                for old in group:
+                    os.remove(old)
+                self.runs.append(path)
+        yield from self._merge_runs(self.runs)
+
+    def close(self):
+        """Borra los runs temporales."""
+        if self.run_dir is not None:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+            self.run_dir = None
+        self.runs = []
+        self.pending = set()
+
+
+class _HashingFile:
+    """Archivo binario que calcula el SHA-256 y el tamaño de lo que se escribe en él."""
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class _ShardWriter:
+    """Un shard gzip; el encabezado gzip no lleva nombre ni fecha para que el checksum sea reproducible."""
+
+    def __init__(self, path):
+        self.path = path
+        self.raw = _HashingFile(path)
+        self.gzip = gzip.GzipFile(filename='', mode='wb', fileobj=self.raw, mtime=0,
+                                  compresslevel=SHARD_COMPRESSLEVEL)
+        self.batch = []
+        self.batch_bytes = 0
+        self.triples = 0
+        self.uncompressed_bytes = 0
+
+    def write(self, line):
+        self.batch.append(line)
+        self.batch_bytes += len(line)
+        self.triples += 1
+        self.uncompressed_bytes += len(line)
+        if self.batch_bytes >= _WRITE_BATCH_BYTES:
+            self._write_batch()
+
+    def _write_batch(self):
+        self.gzip.write(b''.join(self.batch))
+        self.batch, self.batch_bytes = [], 0
+
+    def close(self):
+        self._write_batch()
+        self.gzip.close()
+        self.raw.close()
+        return {'file': os.path.basename(self.path), 'triples': self.triples,
+                'uncompressed_bytes': self.uncompressed_bytes, 'bytes': self.raw.size,
+                'sha256': self.raw.sha256.hexdigest()}
+
+
+def write_shards(lines, manifest_path, shard_bytes=DEFAULT_SHARD_BYTES):
+    """
+    Escribe `lines` (ya ordenadas y únicas) en shards gzip junto a
+    `manifest_path`. Borra antes los shards de una exportación anterior con
+    el mismo nombre. Devuelve la lista de shards para el manifiesto.
+    """
+    prefix = shard_prefix_for(manifest_path)
+    # El manifiesto anterior dejaría de describir los shards
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    for stale in glob.glob(glob.escape(prefix) + '-[0-9]*' + SHARD_SUFFIX):
+        os.remove(stale)
+    shards = []
+    current = None
+    for line in lines:
+        if current is not None and current.uncompressed_bytes + len(line) > shard_bytes:
+            shards.append(current.close())
+            current = None
+        if current is None:
+            current = _ShardWriter(f"{prefix}-{len(shards):05d}{SHARD_SUFFIX}")
+        current.write(line)
+    if current is not None:
+        shards.append(current.close())
+    return shards
+
+
+def write_manifest(manifest_path, shards, lines_in, shard_bytes, extra=None):
+    """Guarda el manifiesto (primero en un temporal, para que nunca quede a medias) y lo devuelve."""
+    triples = sum(shard['triples'] for shard in shards)
+    manifest = {
+        'format': 'application/n-triples',
+        'compression': 'gzip',
+        'sorted': True,
+        'deduplicated': True,
+        'triples': triples,
+        'duplicates_removed': lines_in - triples,
+        'shard_bytes': shard_bytes,
+        'shards': shards,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    manifest.update(extra or {})
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
+
+def export_lines(lines, manifest_path, shard_bytes=DEFAULT_SHARD_BYTES, run_lines=DEFAULT_RUN_LINES,
+                 temp_dir=None, extra=None):
+    """Exporta líneas N-Triples (bytes) para carga masiva. Devuelve el manifiesto."""
+    sorter = ExternalSorter(temp_dir or os.path.dirname(os.path.abspath(manifest_path)), run_lines)
+    try:
+        sorter.add_lines(lines)
+        shards = write_shards(sorter.merged(), manifest_path, shard_bytes)
+    finally:
+        sorter.close()
+    return write_manifest(manifest_path, shards, sorter.lines_in, shard_bytes, extra)
+
+
+def ntriples_file_lines(path):
+    """Líneas de un archivo N-Triples (también .nt.gz) como bytes, sin comentarios ni líneas vacías."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped and not stripped.startswith(b'#'):
+                yield stripped + b'\n'
+
+
+def triple_lines(triples):
+    """Líneas N-Triples (bytes) de un iterable de triples rdflib (un Graph, un TripleBuffer, un almacén SQLite)."""
+    for triple in triples:
+        yield nt_line(triple).encode('utf-8')
+
+
+def sink_lines(sink):
+    """Líneas N-Triples (bytes) de un TripleBuffer o un almacén SQLite, por su camino rápido `nt_lines()`."""
+    nt_lines = getattr(sink, 'nt_lines', None)
+    if nt_lines is None:
+        return triple_lines(sink)
+    return (line.encode('utf-8') for line in nt_lines())
+
+
+def summary(manifest, manifest_path):
+    return (f"Exportación para carga masiva: {manifest['triples']} triples en {len(manifest['shards'])} shards "
+            f"({manifest['duplicates_removed']} duplicados descartados) -> {manifest_path}")
+
+
+class BulkLoadWriter:
+    """
+    Destino del motor (como los escritores de rdf_writers) que exporta para
+    carga masiva: cada bloque pasa al ordenador externo y al cerrar se
+    escriben los shards y el manifiesto.
+    """
+
+    def __init__(self, manifest_path, shard_bytes=DEFAULT_SHARD_BYTES, run_lines=DEFAULT_RUN_LINES,
+                 temp_dir=None, extra=None):
+        self.manifest_path = manifest_path
+        self.shard_bytes = shard_bytes
+        self.extra = extra
+        self.sorter = ExternalSorter(temp_dir or os.path.dirname(os.path.abspath(manifest_path)), run_lines)
+        self.pending = {}
+        self.manifest = None
+
+    def bind(self, prefix, namespace):
+        # N-Triples no usa prefijos
+        pass
+
+    def add(self, triple):
+        self.pending[triple] = None
+
+    def flush(self):
+        self.sorter.add_lines(triple_lines(self.pending))
+        self.pending = {}
+
+    def close(self):
+        """Fusiona los runs y escribe los shards y el manifiesto. Devuelve el manifiesto."""
+        try:
+            self.flush()
+            shards = write_shards(self.sorter.merged(), self.manifest_path, self.shard_bytes)
+            self.manifest = write_manifest(self.manifest_path, shards, self.sorter.lines_in, self.shard_bytes,
+                                           self.extra)
+        finally:
+            self.sorter.close()
+        return self.manifest
+
+    def discard(self):
+        """Abandona la exportación (p. ej. si la conversión se detuvo) borrando los runs."""
+        self.sorter.close()
+
+    def __len__(self):
+        if self.manifest is not None:
+            return self.manifest['triples']
+        return self.sorter.lines_in + len(self.pending)
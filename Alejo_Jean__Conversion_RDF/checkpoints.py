@@ -0,0 +1,133 @@
+"""
+Puntos de control de las conversiones por bloques.
+
+Cada cierto tiempo, al terminar un bloque ya vaciado en la salida, se guarda
+junto a ella (`salida.checkpoint`) la última fila convertida, el byte hasta
+el que llega el archivo de salida y el estado del motor (caché de entidades
+e índice de URIs truncadas). Si la conversión se detiene o el proceso muere,
+al reanudarla el archivo se recorta a ese byte, se restaura el estado y se
+sigue desde la fila siguiente con los mismos bloques, de modo que la salida
+es idéntica a la de una ejecución sin interrupciones. Al terminar bien el
+punto de control se borra.
+
+El punto de control registra también el CSV (ruta, tamaño y fecha), el
+mapeo y las opciones que afectan a la salida; si algo cambió no se reanuda.
+"""
+import hashlib
+import json
+import os
+import pickle
+import time
+
+from join_sources import source_fingerprints
+
+CHECKPOINT_SUFFIX = '.checkpoint'
+CHECKPOINT_VERSION = 1
+DEFAULT_CHECKPOINT_SECONDS = 30
+
+
+def checkpoint_path_for(out_path):
+    return out_path + CHECKPOINT_SUFFIX
+
+
+def conversion_signature(csv_path, mapping_data, **options):
+    """Identifica la entrada y las opciones de una conversión para comprobar que se reanuda la misma."""
+    stat = os.stat(csv_path)
+    mapping = json.dumps(mapping_data, sort_keys=True, ensure_ascii=False, default=str)
+    return {
+        'csv': os.path.abspath(csv_path),
+        'csv_size': stat.st_size,
+        'csv_mtime_ns': stat.st_mtime_ns,
+        'mapping_sha1': hashlib.sha1(mapping.encode('utf-8')).hexdigest(),
+        'sources': source_fingerprints(mapping_data),
+        'options': options,
+    }
+
+
+def load_checkpoint(path, signature):
+    """
+    Lee el punto de control de `path` y comprueba que corresponde a la misma
+    conversión. Lanza ValueError si no existe o no coincide.
+    """
+    if not os.path.exists(path):
+        raise ValueError(f"No hay un punto de control en {path}.")
+    with open(path, 'rb') as f:
+        checkpoint = pickle.load(f)
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError("El punto de control es de una versión anterior del conversor.")
+    saved = checkpoint['signature']
+    if saved['csv'] != signature['csv']:
+        raise ValueError(f"El punto de control es de otro CSV ({saved['csv']}).")
+    if (saved['csv_size'], saved['csv_mtime_ns']) != (signature['csv_size'], signature['csv_mtime_ns']):
+        raise ValueError("El CSV ha cambiado desde el punto de control.")
+    if saved['mapping_sha1'] != signature['mapping_sha1']:
+        raise ValueError("El mapeo ha cambiado desde el punto de control.")
+    if saved.get('sources', []) != signature['sources']:
+        raise ValueError("Un origen de datos del mapeo (sources) ha cambiado desde el punto de control.")
+    if saved['options'] != signature['options']:
+        changed = ', '.join(sorted(key for key in set(saved['options']) | set(signature['options'])
+                                   if saved['options'].get(key) != signature['options'].get(key)))
+        raise ValueError(f"Las opciones de conversión han cambiado desde el punto de control ({changed}).")
+    return checkpoint
+
+
+def check_output(checkpoint, out_path):
+    """Comprueba que el archivo de salida contiene al menos lo que registra el punto de control."""
+    offset = checkpoint['output_offset']
+    if offset is not None and (not os.path.exists(out_path) or os.path.getsize(out_path) < offset):
+        raise ValueError(f"El archivo de salida {out_path} es más corto que el registrado en el punto de control.")
+
+
+class Checkpointer:
+    """
+    Guarda puntos de control de una conversión por bloques; se pasa como
+    `on_chunk` a ConversionEngine.run_chunks. `sink` es un escritor en
+    streaming (se registra su posición y su número de triples) o un almacén
+    que confirma cada bloque por sí mismo, como SQLiteTripleStore.
+    """
+
+    def __init__(self, path, engine, sink, signature, interval=DEFAULT_CHECKPOINT_SECONDS):
+        self.path = path
+        self.engine = engine
+        self.sink = sink
+        self.signature = signature
+        self.interval = interval
+        self.last_saved = time.monotonic()
+        self.rows_saved = None
+
+    def __call__(self, rows_done):
+        if time.monotonic() - self.last_saved >= self.interval:
+            self.save(rows_done)
+
+    def save(self, rows_done, engine_state=None):
+        """
+        Guarda el punto de control tras `rows_done` filas. `engine_state` es el
+        estado del motor en esa fila si ya no es el actual (al detenerse a
+        mitad de un bloque); por defecto se toma el del motor.
+        """
+        stream = getattr(self.sink, 'stream', None)
+        if stream is not None:
+            # La salida registrada debe estar en disco antes que el punto de control que la cita
+            os.fsync(stream.fileno())
+        checkpoint = {
+            'version': CHECKPOINT_VERSION,
+            'signature': self.signature,
+            'rows_done': rows_done,
+            'output_offset': stream.tell() if stream is not None else None,
+            'triples': getattr(self.sink, 'count', None),
+            'engine_state': engine_state if engine_state is not None else self.engine.snapshot_state(),
+        }
+        # Se escribe aparte y se renombra: un fallo a mitad nunca deja un punto de control corrupto
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.last_saved = time.monotonic()
+        self.rows_saved = rows_done
+        self.engine.log(f"Punto de control guardado: {rows_done} filas convertidas.")
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,516 @@
+"""
+Modo por lotes (sin interfaz gráfica) del conversor CSV a RDF.
+
+Uso:
+    python -m conversion_cli convert --csv scopus.csv --mapping map_scopus.yaml --out salida.nt
+    python -m conversion_cli infer --csv scopus.csv --out mapeo.yaml
+    python -m conversion_cli validate --csv scopus.csv --mapping map_scopus.yaml
+    python -m conversion_cli export --in salida.nt --out carga.manifest.json
+
+No importa tkinter, por lo que puede ejecutarse en servidores sin entorno
+gráfico, en cron o en trabajos paralelos.
+"""
+import argparse
+import os
+import sys
+import time
+import traceback
+
+import yaml
+from rdflib import Graph
+
+from bulk_export import (DEFAULT_RUN_LINES, DEFAULT_SHARD_BYTES, BulkLoadWriter, export_lines,
+                         is_bulk_manifest_path, ntriples_file_lines, sink_lines, summary as bulk_summary, triple_lines)
+from checkpoints import (DEFAULT_CHECKPOINT_SECONDS, Checkpointer, check_output, checkpoint_path_for,
+                         conversion_signature, load_checkpoint)
+from conversion_engine import ENGINE_MODES, ConversionEngine, load_mapping_file, rdf_format_for_path
+from conversion_metrics import metrics_path_for, profile_path_for, profile_top, profiled
+from csv_ingest import DEFAULT_CHUNK_SIZE, iter_csv_chunks, mapping_columns, read_csv_frame
+from entity_cache import DEFAULT_MAX_ENTITIES
+from incremental_conversion import IncrementalConverter
+from mapping_inference import DEFAULT_SAMPLE_SIZE, DEFAULT_SCAN_ROWS, profile_csv, suggest_mapping
+from parallel_conversion import convert_parallel
+from preflight import preflight_path_for, validate_csv
+from rdf_writers import STREAM_FORMATS, open_stream_writer
+from sqlite_store import SQLiteTripleStore
+from triple_buffer import TripleBuffer
+from uri_minting import COLLISION_POLICIES
+from void_stats import dataset_uri_for, void_path_for
+
+
+def _log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def cmd_convert(args):
+    """Ejecuta una conversión CSV -> RDF en el modo pedido, opcionalmente bajo cProfile."""
+    profile_path = profile_path_for(args.out) if args.profile else None
+    with profiled(profile_path):
+        status = _convert(args)
+    if profile_path:
+        _log(f"Perfil de cProfile guardado en {profile_path}")
+        if not args.quiet:
+            _log(profile_top(profile_path))
+    return status
+
+
+def _save_metrics(metrics, args, mode):
+    """Guarda el informe de métricas en JSON junto a la salida."""
+    path = metrics_path_for(args.out)
+    metrics.save(path, extra={'csv': args.csv, 'mapping': args.mapping, 'output': args.out,
+                              'engine': args.engine, 'mode': mode})
+    _log(f"Métricas guardadas en {path}")
+
+
+def _save_void(engine, args, mapping_data, triples, complete=True):
+    """
+    Guarda la descripción VoID junto a la salida. Si las estadísticas no
+    cubren toda la salida (almacén con triples de otra ejecución) se omite.
+    """
+    if engine.statistics is None:
+        return
+    if not complete:
+        _log("Descripción VoID omitida: la salida incluye triples de una ejecución anterior sin estadísticas.")
+        return
+    path = void_path_for(args.out)
+    engine.statistics.save_void(path, dataset_uri_for(mapping_data), triples=triples,
+                                data_dump=os.path.basename(args.out))
+    _log(f"Descripción VoID guardada en {path}")
+
+
+def _statistics_complete(checkpoint, existing_triples=0):
+    """True si las estadísticas del motor cubrirán toda la salida (también al reanudar)."""
+    if checkpoint:
+        return checkpoint['engine_state'].get('statistics') is not None
+    return existing_triples == 0
+
+
+def _convert(args):
+    if args.resume and (args.incremental or args.workers != 1 or not (args.stream or args.store)):
+        _log("ERROR: --resume sólo está disponible en los modos --stream y --store.")
+        return 2
+    if args.preflight:
+        status = _run_preflight(args)
+        if status:
+            return status
+    if is_bulk_manifest_path(args.out):
+        return _convert_bulk(args)
+    if args.incremental:
+        return _convert_incremental(args)
+    if args.workers != 1:
+        return _convert_parallel(args)
+    if args.stream:
+        return _convert_stream(args)
+    if args.store:
+        return _convert_store(args)
+    return _convert_memory(args)
+
+
+def _run_preflight(args):
+    """Valida el CSV contra el mapeo antes de convertir; el informe se guarda junto a la salida."""
+    try:
+        report = validate_csv(args.csv, load_mapping_file(args.mapping), chunksize=args.chunk_size)
+    except Exception as e:
+        _log(f"ERROR: No se pudieron cargar los archivos de entrada: {e}")
+        return 2
+    path = preflight_path_for(args.out)
+    report.save(path)
+    _log(report.summary())
+    _log(f"Informe de validación guardado en {path}")
+    if report.errors:
+        _log("ERROR: La validación previa encontró errores en el mapeo; no se convierte.")
+        return 2
+    return 0
+
+
+def _convert_memory(args):
+    """Convierte el CSV completo en memoria y serializa el resultado."""
+    start = time.perf_counter()
+    try:
+        mapping_data = load_mapping_file(args.mapping)
+        df = read_csv_frame(args.csv, columns=mapping_columns(mapping_data))
+    except Exception as e:
+        _log(f"ERROR: No se pudieron cargar los archivos de entrada: {e}")
+        return 2
+
+    log = (lambda message: None) if args.quiet else _log
+    engine = ConversionEngine(mapping_data, log=log, mode=args.engine, entity_cache_size=args.entity_cache,
+                              uri_collisions=args.uri_collisions, row_warnings=not args.preflight,
+                              statistics=not args.no_void)
+    graph = TripleBuffer()
+    try:
+        engine.run(df, graph)
+        rdf_format = args.format or rdf_format_for_path(args.out)
+        with engine.metrics.timed('serialization'):
+            graph.serialize(destination=args.out, format=rdf_format, encoding='utf-8')
+        _save_metrics(engine.metrics, args, 'memory')
+        _save_void(engine, args, mapping_data, len(graph))
+    except Exception as e:
+        _log(f"ERROR CRÍTICO DURANTE LA CONVERSIÓN: {e}\n{traceback.format_exc()}")
+        return 1
+
+    elapsed = time.perf_counter() - start
+    _log(f"{args.csv}: {len(df)} filas, {len(graph)} triples -> {args.out} ({rdf_format}) en {elapsed:.2f} s")
+    return 0
+
+
+def _open_checkpoint(args, checkpoint_path, mapping_data, **options):
+    """
+    (firma, punto de control) de una conversión por bloques. Con --resume se
+    carga y valida el punto de control; si no, se descarta el que hubiera,
+    que ya no corresponde a la salida que se va a escribir.
+    """
+    signature = conversion_signature(args.csv, mapping_data, engine=args.engine, chunk_size=args.chunk_size,
+                                     entity_cache=args.entity_cache, uri_collisions=args.uri_collisions, **options)
+    if args.resume:
+        return signature, load_checkpoint(checkpoint_path, signature)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return signature, None
+
+
+def _run_checkpointed(args, engine, chunks, sink, checkpoint_path, signature, checkpoint):
+    """Ejecuta run_chunks guardando puntos de control y, si termina, borra el último."""
+    checkpointer = (Checkpointer(checkpoint_path, engine, sink, signature, interval=args.checkpoint_interval)
+                    if args.checkpoint_interval > 0 else None)
+    finished = engine.run_chunks(chunks, sink, first_row=checkpoint['rows_done'] if checkpoint else 0,
+                                 state=checkpoint['engine_state'] if checkpoint else None, on_chunk=checkpointer)
+    if finished and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return finished
+
+
+def _convert_stream(args):
+    """Lee el CSV por bloques y escribe los triples directamente en el archivo de salida."""
+    start = time.perf_counter()
+    rdf_format = args.format or rdf_format_for_path(args.out)
+    if rdf_format not in STREAM_FORMATS:
+        _log(f"ERROR: El modo --stream sólo admite los formatos {', '.join(STREAM_FORMATS)}.")
+        return 2
+    checkpoint_path = checkpoint_path_for(args.out)
+    try:
+        mapping_data = load_mapping_file(args.mapping)
+        signature, checkpoint = _open_checkpoint(args, checkpoint_path, mapping_data, mode='stream', format=rdf_format)
+        if checkpoint: check_output(checkpoint, args.out)
+        chunks = iter_csv_chunks(args.csv, columns=mapping_columns(mapping_data), chunksize=args.chunk_size,
+                                 skip_rows=checkpoint['rows_done'] if checkpoint else 0)
+    except Exception as e:
+        _log(f"ERROR: No se pudieron cargar los archivos de entrada: {e}")
+        return 2
+
+    log = (lambda message: None) if args.quiet else _log
+    engine = ConversionEngine(mapping_data, log=log, mode=args.engine, entity_cache_size=args.entity_cache,
+                              uri_collisions=args.uri_collisions, row_warnings=not args.preflight,
+                              statistics=not args.no_void)
+    try:
+        writer = open_stream_writer(args.out, rdf_format, resume_offset=checkpoint['output_offset'] if checkpoint else None)
+        if checkpoint: writer.count = checkpoint['triples']
+        try:
+            finished = _run_checkpointed(args, engine, chunks, writer, checkpoint_path, signature, checkpoint)
+        finally:
+            writer.close()
+        _save_metrics(engine.metrics, args, 'stream')
+        if finished:
+            _save_void(engine, args, mapping_data, len(writer), _statistics_complete(checkpoint))
+    except Exception as e:
+        _log(f"ERROR CRÍTICO DURANTE LA CONVERSIÓN: {e}\n{traceback.format_exc()}")
+        return 1
+
+    elapsed = time.perf_counter() - start
+    _log(f"{args.csv}: {len(writer)} triples -> {args.out} ({rdf_format}, streaming) en {elapsed:.2f} s")
+    return 0
+
+
+def _convert_bulk(args):
+    """Lee el CSV por bloques y exporta los triples ordenados y sin duplicados para carga masiva."""
+    start = time.perf_counter()
+    if args.resume or args.incremental or args.workers != 1 or args.store:
+        _log("ERROR: La exportación para carga masiva (--out *.manifest.json) no admite --resume, --incremental, "
+             "--workers ni --store; use el subcomando export sobre su salida.")
+        return 2
+    try:
+        mapping_data = load_mapping_file(args.mapping)
+        chunks = iter_csv_chunks(args.csv, columns=mapping_columns(mapping_data), chunksize=args.chunk_size)
+    except Exception as e:
+        _log(f"ERROR: No se pudieron cargar los archivos de entrada: {e}")
+        return 2
+
+    log = (lambda message: None) if args.quiet else _log
+    engine = ConversionEngine(mapping_data, log=log, mode=args.engine, entity_cache_size=args.entity_cache,
+                              uri_collisions=args.uri_collisions, row_warnings=not args.preflight,
+                              statistics=not args.no_void)
+    writer = BulkLoadWriter(args.out, shard_bytes=args.shard_size * 1024 * 1024, extra={'csv': args.csv})
+    try:
+        try:
+            engine.run_chunks(chunks, writer)
+        except BaseException:
+            writer.discard()
+            raise
+        with engine.metrics.timed('serialization'):
+            manifest = writer.close()
+        _save_metrics(engine.metrics, args, 'bulk')
+        _save_void(engine, args, mapping_data, manifest['triples'])
+    except Exception as e:
+        _log(f"ERROR CRÍTICO DURANTE LA CONVERSIÓN: {e}\n{traceback.format_exc()}")
+        return 1
+
+    elapsed = time.perf_counter() - start
+    _log(f"{bulk_summary(manifest, args.out)} en {elapsed:.2f} s")
+    return 0
+
+
+def _convert_store(args):
+    """Convierte por bloques en un almacén SQLite en disco y serializa la salida desde él."""
+    start = time.perf_counter()
+    rdf_format = args.format or rdf_format_for_path(args.out)
+    checkpoint_path = checkpoint_path_for(args.store)
+    try:
+        mapping_data = load_mapping_file(args.mapping)
+        signature, checkpoint = _open_checkpoint(args, checkpoint_path, mapping_data, mode='store')
+        chunks = iter_csv_chunks(args.csv, columns=mapping_columns(mapping_data), chunksize=args.chunk_size,
+                                 skip_rows=checkpoint['rows_done'] if checkpoint else 0)
+    except Exception as e:
+        _log(f"ERROR: No se pudieron cargar los archivos de entrada: {e}")
+        return 2
+
+    log = (lambda message: None) if args.quiet else _log
+    engine = ConversionEngine(mapping_data, log=log, mode=args.engine, entity_cache_size=args.entity_cache,
+                              uri_collisions=args.uri_collisions, row_warnings=not args.preflight,
+                              statistics=not args.no_void)
+    try:
+        store = SQLiteTripleStore(args.store)
+        try:
+            existing = len(store)
+            log(f"Almacén en disco: {args.store} ({existing} triples existentes).")
+            _run_checkpointed(args, engine, chunks, store, checkpoint_path, signature, checkpoint)
+            with engine.metrics.timed('serialization'):
+                store.serialize(destination=args.out, format=rdf_format, encoding='utf-8')
+            count = len(store)
+            _save_metrics(engine.metrics, args, 'store')
+            _save_void(engine, args, mapping_data, count, _statistics_complete(checkpoint, existing))
+        finally:
+            store.close()
+    except Exception as e:
+        _log(f"ERROR CRÍTICO DURANTE LA CONVERSIÓN: {e}\n{traceback.format_exc()}")
+        return 1
+
+    elapsed = time.perf_counter() - start
+    _log(f"{args.csv}: {count} triples en {args.store} -> {args.out} ({rdf_format}) en {elapsed:.2f} s")
+    return 0
+
+
+def _convert_parallel(args):
+    """Reparte los bloques del CSV entre varios procesos y fusiona sus shards N-Triples."""
+    start = time.perf_counter()
+    rdf_format = args.format or rdf_format_for_path(args.out)
+    if rdf_format != 'nt':
+        _log("ERROR: La conversión en paralelo (--workers) sólo admite salida N-Triples (.nt).")
+        return 2
+    try:
+        mapping_data = load_mapping_file(args.mapping)
+    except Exception as e:
+        _log(f"ERROR: No se pudieron cargar los archivos de entrada: {e}")
+        return 2
+
+    log = (lambda message: None) if args.quiet else _log
+    try:
+        count = convert_parallel(args.csv, mapping_data, args.out, workers=args.workers or None,
+                                 chunk_size=args.chunk_size, mode=args.engine,
+                                 entity_cache_size=args.entity_cache, uri_collisions=args.uri_collisions,
+                                 row_warnings=not args.preflight, log=log)
+    except Exception as e:
+        _log(f"ERROR CRÍTICO DURANTE LA CONVERSIÓN: {e}\n{traceback.format_exc()}")
+        return 1
+
+    elapsed = time.perf_counter() - start
+    _log(f"{args.csv}: {count} triples -> {args.out} (nt, {args.workers or 'todos los'} procesos) en {elapsed:.2f} s")
+    return 0
+
+
+def _convert_incremental(args):
+    """Convierte sólo las filas añadidas o modificadas desde la ejecución anterior (ver incremental_conversion)."""
+    start = time.perf_counter()
+    rdf_format = args.format or rdf_format_for_path(args.out)
+    if rdf_format != 'nt':
+        _log("ERROR: La conversión incremental (--incremental) sólo admite salida N-Triples (.nt).")
+        return 2
+    try:
+        mapping_data = load_mapping_file(args.mapping)
+    except Exception as e:
+        _log(f"ERROR: No se pudieron cargar los archivos de entrada: {e}")
+        return 2
+
+    log = (lambda message: None) if args.quiet else _log
+    converter = IncrementalConverter(mapping_data, log=log, chunk_size=args.chunk_size,
+                                     uri_collisions=args.uri_collisions, row_warnings=not args.preflight)
+    try:
+        added, deleted = converter.run(args.csv, args.out, delta_path=args.delta)
+    except Exception as e:
+        _log(f"ERROR CRÍTICO DURANTE LA CONVERSIÓN: {e}\n{traceback.format_exc()}")
+        return 1
+
+    elapsed = time.perf_counter() - start
+    _log(f"{args.csv}: +{added} / -{deleted} triples -> {args.out} (nt, incremental) en {elapsed:.2f} s")
+    return 0
+
+
+def cmd_validate(args):
+    """Valida un CSV contra su mapeo sin convertirlo y muestra un único informe."""
+    try:
+        report = validate_csv(args.csv, load_mapping_file(args.mapping), chunksize=args.chunk_size)
+    except Exception as e:
+        _log(f"ERROR: No se pudieron cargar los archivos de entrada: {e}")
+        return 2
+    if args.report:
+        report.save(args.report)
+    if args.quiet:
+        for error in report.errors:
+            _log(error)
+    else:
+        _log(report.summary())
+    if args.report:
+        _log(f"Informe de validación guardado en {args.report}")
+    return 1 if report.errors else 0
+
+
+def cmd_export(args):
+    """Exporta una salida ya generada (N-Triples, almacén SQLite u otro RDF) para carga masiva."""
+    start = time.perf_counter()
+    source = args.input
+    store = None
+    try:
+        if source.endswith('.sqlite'):
+            store = SQLiteTripleStore(source)
+            lines = sink_lines(store)
+        elif source.endswith(('.nt', '.nt.gz')):
+            # Las líneas se reordenan tal cual, sin analizar el RDF
+            lines = ntriples_file_lines(source)
+        else:
+            lines = triple_lines(Graph().parse(source, format=rdf_format_for_path(source)))
+        manifest = export_lines(lines, args.out, shard_bytes=args.shard_size * 1024 * 1024, run_lines=args.run_lines,
+                                temp_dir=args.temp_dir, extra={'source': source})
+    except Exception as e:
+        _log(f"ERROR: No se pudo exportar {source}: {e}")
+        return 1
+    finally:
+        if store is not None:
+            store.close()
+    _log(f"{bulk_summary(manifest, args.out)} en {time.perf_counter() - start:.2f} s")
+    return 0
+
+
+def cmd_infer(args):
+    """Genera un mapeo YAML sugerido a partir de una muestra del CSV."""
+    log = (lambda message: None) if args.quiet else _log
+    try:
+        stats = profile_csv(args.csv, sample_size=args.sample_size, scan_rows=args.scan_rows or None, seed=args.seed, log=log)
+        mapping = suggest_mapping(list(stats), stats, log=log)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            yaml.dump(mapping, f, allow_unicode=True, sort_keys=False, default_flow_style=False)
+    except Exception as e:
+        _log(f"ERROR: No se pudo generar el mapeo. {e}")
+        return 1
+    _log(f"Mapeo sugerido guardado en: {args.out}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='conversion_cli', description="Conversor CSV a RDF en modo por lotes.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    convert = subparsers.add_parser('convert', help="Convierte un CSV a RDF usando un mapeo YAML.")
+    convert.add_argument('--csv', required=True, help="Archivo CSV de entrada.")
+    convert.add_argument('--mapping', required=True, help="Archivo de mapeo YAML.")
+    convert.add_argument('--out', required=True, help="Archivo RDF de salida (.ttl, .rdf o .nt), o un manifiesto "
+                              "*.manifest.json para exportar en shards de carga masiva.")
+    convert.add_argument('--format', choices=['turtle', 'xml', 'nt'],
+                         help="Formato de salida. Por defecto se deduce de la extensión de --out.")
+    convert.add_argument('--engine', choices=ENGINE_MODES, default='columnar',
+                         help="Modo del motor: 'columnar' (vectorizado, por defecto) o 'rows' (fila a fila).")
+    convert.add_argument('--stream', action='store_true',
+                         help="Lee el CSV por bloques y escribe los triples directamente en --out (nt o turtle), "
+                              "sin construir el grafo en memoria.")
+    convert.add_argument('--store',
+                         help="Archivo SQLite donde acumular los triples en disco en lugar de en memoria. Si ya existe, "
+                              "los triples se añaden a los que contiene y --out incluye el conjunto completo.")
+    convert.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                         help=f"Filas por bloque en los modos --stream, --store y --workers (por defecto {DEFAULT_CHUNK_SIZE}).")
+    convert.add_argument('--entity-cache', type=int, default=DEFAULT_MAX_ENTITIES,
+                         help="Máximo de entidades relacionadas (autores, palabras clave...) recordadas para no "
+                              f"repetir sus triples (por defecto {DEFAULT_MAX_ENTITIES}; 0 = desactivada).")
+    convert.add_argument('--uri-collisions', choices=COLLISION_POLICIES, default='report',
+                         help="Qué hacer si dos valores distintos comparten URI al truncarse: 'report' (avisar, "
+                              "por defecto) o 'disambiguate' (añadir un hash del valor completo).")
+    convert.add_argument('--workers', type=int, default=1,
+                         help="Número de procesos. Con más de 1 el CSV se reparte por bloques entre procesos "
+                              "y sus shards se fusionan en --out (sólo .nt). 0 = todos los núcleos.")
+    convert.add_argument('--incremental', action='store_true',
+                         help="Convierte sólo las filas añadidas o modificadas desde la ejecución anterior, según el "
+                              "manifiesto guardado junto a --out (sólo .nt), y escribe un delta SPARQL Update.")
+    convert.add_argument('--delta',
+                         help="Archivo delta del modo --incremental (por defecto, --out con extensión .delta.ru).")
+    convert.add_argument('--resume', action='store_true',
+                         help="Reanuda una conversión --stream o --store interrumpida desde su último punto de control "
+                              "(guardado junto a --out o a --store con extensión .checkpoint).")
+    convert.add_argument('--checkpoint-interval', type=float, default=DEFAULT_CHECKPOINT_SECONDS,
+                         help="Segundos entre puntos de control en los modos --stream y --store "
+                              f"(por defecto {DEFAULT_CHECKPOINT_SECONDS}; 0 = no guardarlos).")
+    convert.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_BYTES // (1024 * 1024),
+                         help="Con --out *.manifest.json los triples se exportan ordenados y sin duplicados en shards "
+                              "gzip para carga masiva (ver el subcomando export); MB sin comprimir por shard "
+                              f"(por defecto {DEFAULT_SHARD_BYTES // (1024 * 1024)}).")
+    convert.add_argument('--preflight', action='store_true',
+                         help="Valida antes el CSV contra el mapeo (ver el subcomando validate) y guarda el informe "
+                              "junto a --out (.preflight.json); la conversión omite entonces los avisos fila a fila.")
+    convert.add_argument('--no-void', action='store_true',
+                         help="No calcular las estadísticas del conjunto de datos ni escribir su descripción VoID "
+                              "junto a --out (.void.ttl). Los modos --workers e --incremental no la generan.")
+    convert.add_argument('--profile', action='store_true',
+                         help="Ejecuta la conversión bajo cProfile y guarda el perfil junto a --out (.prof).")
+    convert.add_argument('--quiet', action='store_true', help="No mostrar los logs del motor.")
+    convert.set_defaults(func=cmd_convert)
+
+    validate = subparsers.add_parser('validate', help="Valida un CSV contra un mapeo YAML sin convertirlo.")
+    validate.add_argument('--csv', required=True, help="Archivo CSV de entrada.")
+    validate.add_argument('--mapping', required=True, help="Archivo de mapeo YAML.")
+    validate.add_argument('--report', help="Archivo JSON donde guardar el informe.")
+    validate.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                          help=f"Filas por bloque (por defecto {DEFAULT_CHUNK_SIZE}).")
+    validate.add_argument('--quiet', action='store_true', help="Mostrar sólo los errores.")
+    validate.set_defaults(func=cmd_validate)
+
+    export = subparsers.add_parser('export', help="Exporta una salida RDF ordenada, sin duplicados y en shards gzip "
+                                                  "para la carga masiva en un triple store.")
+    export.add_argument('--in', dest='input', required=True,
+                        help="Salida del conversor: N-Triples (.nt, .nt.gz), almacén SQLite (.sqlite) u otro RDF.")
+    export.add_argument('--out', required=True,
+                        help="Manifiesto de la exportación (p. ej. carga.manifest.json); los shards se escriben "
+                             "junto a él (carga-00000.nt.gz, ...).")
+    export.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_BYTES // (1024 * 1024),
+                        help=f"MB sin comprimir por shard (por defecto {DEFAULT_SHARD_BYTES // (1024 * 1024)}).")
+    export.add_argument('--run-lines', type=int, default=DEFAULT_RUN_LINES,
+                        help=f"Líneas ordenadas en memoria antes de volcarlas a disco (por defecto {DEFAULT_RUN_LINES}).")
+    export.add_argument('--temp-dir', help="Directorio de los archivos temporales (por defecto, el de --out).")
+    export.set_defaults(func=cmd_export)
+
+    infer = subparsers.add_parser('infer', help="Genera un mapeo YAML sugerido a partir de una muestra del CSV.")
+    infer.add_argument('--csv', required=True, help="Archivo CSV de entrada.")
+    infer.add_argument('--out', required=True, help="Archivo YAML de salida.")
+    infer.add_argument('--sample-size', type=int, default=DEFAULT_SAMPLE_SIZE,
+                       help=f"Filas de la muestra aleatoria (por defecto {DEFAULT_SAMPLE_SIZE}).")
+    infer.add_argument('--scan-rows', type=int, default=DEFAULT_SCAN_ROWS,
+                       help=f"Filas del CSV recorridas para tomar la muestra (por defecto {DEFAULT_SCAN_ROWS}; "
+                            "0 = todo el archivo).")
+    infer.add_argument('--seed', type=int, default=0, help="Semilla del muestreo.")
+    infer.add_argument('--quiet', action='store_true', help="No mostrar los logs.")
+    infer.set_defaults(func=cmd_infer)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,567 @@
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+from rdflib import Literal, RDF, URIRef
+import yaml
+
+from conversion_metrics import ConversionMetrics
+from entity_cache import DEFAULT_MAX_ENTITIES, EntityCache
+from join_sources import load_join_indexes, resolve_source_paths
+from mapping_plan import compile_mapping
+from multivalue_store import MISSING_TEXT, MultiValueStore
+from uri_minting import UriMinter
+from void_stats import DatasetStatistics, StatisticsSink
+
+# Modos del motor: fila a fila (referencia) o por columnas (vectorizado)
+ENGINE_MODES = ('columnar', 'rows')
+
+# Extensión de archivo -> formato de serialización de rdflib
+RDF_FORMATS = {'.ttl': 'turtle', '.rdf': 'xml', '.nt': 'nt'}
+
+
+def rdf_format_for_path(path, default='turtle'):
+    """Devuelve el formato rdflib correspondiente a la extensión del archivo."""
+    file_ext = '.' + path.split('.')[-1]
+    return RDF_FORMATS.get(file_ext, default)
+
+
+def load_mapping_file(path):
+    """
+    Carga un archivo de mapeo YAML y valida su estructura mínima. Las rutas
+    de `sources` se toman relativas al archivo de mapeo (ver join_sources).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        mapping_data = yaml.safe_load(f)
+    if not isinstance(mapping_data, dict) or 'base_uri' not in mapping_data or 'subject' not in mapping_data:
+        raise ValueError("El archivo de mapeo debe contener 'base_uri' y 'subject'.")
+    return resolve_source_paths(mapping_data, os.path.dirname(os.path.abspath(path)))
+
+
+# Caracteres que rdflib no admite en una URIRef al serializarla (los de rdflib.term._is_valid_uri)
+_INVALID_URI_RE = re.compile(r'[<>" {}|\\^`]')
+
+
+def is_valid_uri(value):
+    """True si `value` puede usarse como URIRef sin que falle la serialización."""
+    return _INVALID_URI_RE.search(value) is None
+
+
+def valid_uri_mask(values):
+    """Versión vectorizada de is_valid_uri para una Serie de cadenas."""
+    return ~values.str.contains(_INVALID_URI_RE.pattern, regex=True).to_numpy(dtype=bool)
+
+
+# Texto de una celda vacía en las columnas de origen de las sub-propiedades.
+# Es lo que producía str(NaN) con los tipos por defecto de pandas; se fija para
+# que el resultado no dependa del tipo de columna (NaN, None o pd.NA).
+def _cell_text(value):
+    return MISSING_TEXT if pd.isna(value) else str(value)
+
+
+def _row_tokens(tokens, row, column_index, separator):
+    """Elementos sin espacios (incluidos los vacíos) de una celda, memorizados en `tokens` para el resto de la fila."""
+    key = (column_index, separator)
+    values = tokens.get(key)
+    if values is None:
+        values = tokens[key] = [v.strip() for v in _cell_text(row[column_index]).split(separator)]
+    return values
+
+
+def _first_of_pairs(a, b):
+    """Índices de la primera aparición de cada par distinto (a[i], b[i]) de dos arrays de enteros."""
+    keys = a.astype(np.int64) * (int(b.max()) + 1) + b
+    _, first = np.unique(keys, return_index=True)
+    return first
+
+
+class ConversionEngine:
+    """
+    Motor de conversión CSV -> RDF guiado por un mapeo YAML.
+
+    No depende de tkinter: la interfaz gráfica y el modo por lotes comparten
+    este mismo objeto y sólo se diferencian en los callbacks que le pasan
+    para los logs, el progreso y la detención.
+
+    Con `row_warnings=False` no se registra una advertencia por cada fila o
+    valor omitido (clave primaria vacía, URI no válida, número de valores
+    que no coincide): la validación previa ya los resumió (ver preflight).
+
+    Con `statistics=True` se cuentan los triples emitidos por propiedad, clase
+    y tipo de datos en `self.statistics`, para la descripción VoID (ver void_stats).
+    """
+    def __init__(self, mapping_data, log=None, progress=None, should_stop=None, mode='columnar',
+                 entity_cache_size=DEFAULT_MAX_ENTITIES, uri_collisions='report', row_warnings=True,
+                 statistics=False):
+        if mode not in ENGINE_MODES:
+            raise ValueError(f"Modo de motor desconocido: '{mode}'. Use uno de {ENGINE_MODES}.")
+        self.mapping_data = mapping_data
+        self.mode = mode
+        self.log = log or (lambda message: None)
+        self.progress = progress or (lambda value, maximum: None)
+        self.should_stop = should_stop or (lambda: False)
+        self.row_warnings = row_warnings
+        # Caché de entidades relacionadas; se comparte entre bloques de una misma ejecución
+        self.entity_cache = EntityCache(entity_cache_size) if entity_cache_size else None
+        self.minter = UriMinter(collisions=uri_collisions, log=self.log)
+        # Tiempos y contadores de la última ejecución (ver conversion_metrics)
+        self.metrics = ConversionMetrics()
+        self.statistics = DatasetStatistics() if statistics else None
+        # Índices de los orígenes unidos con `join`; se cargan al compilar la primera vez
+        self.join_indexes = None
+        # Transformaciones (`transform`) del último plan compilado
+        self.transforms = []
+
+    def _record_entity_triple(self, entity, predicate, value):
+        """True si el triple de la entidad relacionada aún no se emitió (ver entity_cache)."""
+        return self.entity_cache is None or self.entity_cache.record(entity, predicate, value)
+
+    def _start(self, message, keep_state=False):
+        self.log(message)
+        self.metrics.reset()
+        if keep_state:
+            return
+        self.minter.reset()
+        if self.entity_cache is not None:
+            self.entity_cache.clear()
+        if self.statistics is not None:
+            self.statistics.reset()
+
+    def _finish(self, message, rows, triples):
+        self.metrics.finish(rows, triples)
+        self.log(self.minter.summary())
+        if self.entity_cache is not None:
+            self.log(self.entity_cache.summary())
+        if self.statistics is not None:
+            self.log(self.statistics.summary(triples))
+        for index in (self.join_indexes or {}).values():
+            self.log(index.summary())
+        for transform in self.transforms:
+            if transform.dropped:
+                self.log(transform.summary())
+        self.log(self.metrics.summary())
+        self.log(message)
+
+    def snapshot_state(self):
+        """
+        Estado que condiciona los triples de los bloques siguientes (caché de
+        entidades e índice de claves de URI truncadas), para los puntos de
+        control de una conversión por bloques (ver checkpoints). Es una copia:
+        no cambia al seguir convirtiendo.
+        """
+        return {'entity_cache': self.entity_cache.state() if self.entity_cache is not None else None,
+                'minter': self.minter.state(),
+                'statistics': self.statistics.state() if self.statistics is not None else None}
+
+    def restore_state(self, state):
+        if self.entity_cache is not None and state.get('entity_cache') is not None:
+            self.entity_cache.restore(state['entity_cache'])
+        self.minter.restore(state['minter'])
+        if self.statistics is not None and state.get('statistics') is not None:
+            self.statistics.restore(state['statistics'])
+
+    def compile(self, columns):
+        """Compila el mapeo contra las columnas del CSV (ver mapping_plan), cargando antes los orígenes unidos."""
+        if self.join_indexes is None:
+            self.join_indexes = load_join_indexes(self.mapping_data, log=self.log)
+        for index in self.join_indexes.values():
+            index.reset_counts()
+        plan = compile_mapping(self.mapping_data, columns, log=self.log, join_indexes=self.join_indexes)
+        # Las transformaciones se compilan con el plan: sus contadores empiezan en cada ejecución
+        self.transforms = [transform for prop in plan.properties
+                           for transform in (prop.transform, *(sub.transform for sub in prop.sub_properties))
+                           if transform is not None]
+        return plan
+
+    def run(self, df, graph):
+        """
+        Convierte las filas de `df` añadiendo los triples a `graph`.
+        Devuelve False si la conversión fue detenida y True si terminó.
+        """
+        self._start(f"--- INICIANDO MOTOR DE CONVERSIÓN RDF (modo {self.mode}) ---")
+
+        plan = self.compile(df.columns)
+        for prefix, namespace in plan.namespaces: graph.bind(prefix, namespace)
+
+        if self.statistics is not None:
+            graph = StatisticsSink(graph, self.statistics, self.metrics)
+        finished = self._run_mode(df, graph, plan, self.progress)
+        if self.statistics is not None:
+            graph.forward()
+        if not finished:
+            self.log("--- CONVERSIÓN DETENIDA POR EL USUARIO ---")
+            return False
+
+        triples = len(graph)
+        self._finish(f"\n--- CONVERSIÓN COMPLETADA EXITOSAMENTE ---\nTotal de triples RDF generados: {triples}",
+                     len(df), triples)
+        return True
+
+    def run_chunks(self, chunks, sink, total_rows=None, first_row=0, state=None, on_chunk=None, keep_state=False):
+        """
+        Convierte un iterable de DataFrames (p. ej. `pd.read_csv(..., chunksize=n)`)
+        entregando los triples a `sink`, que puede ser un Graph o un escritor en
+        streaming (ver rdf_writers). Tras cada bloque se llama a `sink.flush()`
+        si existe, de modo que sólo un bloque vive en memoria a la vez.
+
+        Para reanudar una conversión, `chunks` empieza tras las `first_row`
+        filas ya convertidas y `state` es el estado del motor guardado en ese
+        punto (ver snapshot_state). `on_chunk(filas)` se llama tras vaciar cada
+        bloque completo con el total de filas convertidas hasta entonces.
+        Con `keep_state=True` se conserva el estado de la ejecución anterior de
+        este mismo motor en lugar de empezar de cero (ver parallel_conversion).
+        Devuelve False si la conversión fue detenida y True si terminó.
+        """
+        self._start(f"--- INICIANDO MOTOR DE CONVERSIÓN RDF (modo {self.mode}, por bloques) ---", keep_state)
+        if first_row:
+            self.log(f"Reanudando la conversión desde la fila {first_row + 1}.")
+        if state is not None:
+            self.restore_state(state)
+
+        plan = None
+        rows_done = first_row
+        if self.statistics is not None:
+            # Los triples se cuentan por lotes acotados; el envoltorio mide cada parte por separado
+            sink = StatisticsSink(sink, self.statistics, self.metrics)
+            flush = sink.flush
+        else:
+            flush = getattr(sink, 'flush', None)
+            if flush:
+                # En los escritores en streaming vaciar el bloque es serializarlo
+                flush = self.metrics.wrap('serialization', flush)
+        for chunk in chunks:
+            if plan is None:
+                plan = self.compile(chunk.columns)
+                for prefix, namespace in plan.namespaces: sink.bind(prefix, namespace)
+
+            offset = rows_done
+            def chunk_progress(value, maximum, offset=offset):
+                self.progress(offset + value, total_rows)
+
+            if not self._run_mode(chunk, sink, plan, chunk_progress):
+                if flush: flush()
+                self.log("--- CONVERSIÓN DETENIDA POR EL USUARIO ---")
+                return False
+            if flush: flush()
+            rows_done += len(chunk)
+            if on_chunk: on_chunk(rows_done)
+
+        triples = len(sink)
+        self._finish(f"\n--- CONVERSIÓN COMPLETADA EXITOSAMENTE ---\nFilas procesadas: {rows_done}\nTotal de triples RDF generados: {triples}",
+                     rows_done - first_row, triples)
+        return True
+
+    def _run_mode(self, df, graph, plan, progress):
+        run_mode = self._run_columnar if self.mode == 'columnar' else self._run_rows
+        return run_mode(df, graph, plan, progress)
+
+    def _run_rows(self, df, graph, plan, progress):
+        """Motor de referencia: recorre el CSV fila a fila."""
+        pk_index = plan.primary_key_index
+        record = self._record_entity_triple
+        metrics = self.metrics
+        perf_counter = time.perf_counter
+        mint_key = metrics.wrap('uri_minting', self.minter.key)
+        # Un sink que necesite saber a qué fila pertenece cada triple (ver incremental_conversion) define start_row
+        start_row = getattr(graph, 'start_row', None)
+
+        total_rows = len(df)
+
+        for pos, (idx, row) in enumerate(zip(df.index, df.itertuples(index=False, name=None))):
+            if self.should_stop():
+                return False
+
+            progress(pos + 1, total_rows)
+            if start_row: start_row(pos)
+            pk_val = row[pk_index] if pk_index is not None else None
+            if pd.isna(pk_val) or str(pk_val).strip() == '':
+                if self.row_warnings:
+                    self.log(f"ADVERTENCIA: Saltando fila {idx + 1} por clave primaria vacía.")
+                continue
+
+            s_uri_val = mint_key(str(pk_val))
+            subject_uri = plan.subject_uri(s_uri_val)
+            graph.add((subject_uri, RDF.type, plan.subject_class))
+
+            # Cada columna multivaluada se divide una sola vez por fila, aunque la usen varias propiedades
+            tokens = {}
+            for prop in plan.properties:
+                started = perf_counter()
+                self._add_row_property(prop, row, idx, subject_uri, graph, record, mint_key, tokens)
+                metrics.record_property(prop.column, prop.type, perf_counter() - started)
+        return True
+
+    def _add_row_property(self, prop, row, idx, subject_uri, graph, record, mint_key, tokens):
+        """Genera los triples de una propiedad mapeada para una fila (motor fila a fila)."""
+        cell = row[prop.column_index]
+        if pd.isna(cell): return
+
+        predicate = prop.predicate
+
+        ## MEJORA ##: Lógica robusta para dividir valores multivaluados.
+        # Se eliminan los espacios en blanco de cada valor y se ignoran los valores vacíos
+        # que podrían resultar de separadores al final de la cadena (ej: "val1;val2;").
+        separator = prop.separator
+        if separator:
+            values = [v for v in _row_tokens(tokens, row, prop.column_index, separator) if v]
+        else:
+            values = [str(cell)]
+        if prop.transform is not None and values:
+            with self.metrics.timed('transforms'):
+                values = [value for value in map(prop.transform.apply_value, values) if value is not None]
+
+        if not values: return
+
+        if prop.type == 'literal':
+            datatype = prop.datatype
+            for value in values:
+                graph.add((subject_uri, predicate, Literal(value, datatype=datatype)))
+
+        elif prop.type == 'uri':
+            for value in values:
+                if is_valid_uri(value):
+                    graph.add((subject_uri, predicate, URIRef(value)))
+                elif self.row_warnings:
+                    self.log(f"ADVERTENCIA: Fila {idx+1}, valor '{value}' en columna '{prop.column}' no es una URI válida. Saltando.")
+
+        ## MEJORA ##: Lógica robusta para manejar relaciones multivaluadas y sus propiedades.
+        # Se reemplaza el frágil sistema de búsqueda por índice con una iteración paralela por índice (i),
+        # lo que permite manejar correctamente valores duplicados y listas de diferente longitud.
+        elif prop.type == 'relation':
+            target_class = prop.target_class
+
+            # Recolectar las columnas de origen para las sub-propiedades
+            sub_prop_sources = {}
+            for source_col_name, source_index in prop.sub_sources:
+                if source_index is None:
+                    sub_prop_sources[source_col_name] = ['']
+                elif separator:
+                    sub_prop_sources[source_col_name] = _row_tokens(tokens, row, source_index, separator)
+                else:
+                    sub_prop_sources[source_col_name] = [_cell_text(row[source_index]).strip()]
+
+            # Iterar sobre cada valor de la columna principal usando un índice
+            join = prop.join
+            for i, value in enumerate(values):
+                o_uri_val = mint_key(value)
+                # Se elimina el UUID para que la misma entidad (ej. autor) tenga la misma URI en todo el grafo
+                object_uri = prop.target_uri(o_uri_val)
+
+                graph.add((subject_uri, predicate, object_uri))
+                if record(object_uri, RDF.type, target_class):
+                    graph.add((object_uri, RDF.type, target_class))
+
+                # Fila del origen unido cuya clave es el valor (o el elemento i de la columna `on`)
+                if join is not None:
+                    if join.column == 'self':
+                        join_key = value
+                    else:
+                        join_keys = sub_prop_sources[join.column]
+                        join_key = join_keys[i] if i < len(join_keys) else None
+                    join_position = join.index.position(join_key)
+
+                # Añadir propiedades a la entidad relacionada (objeto)
+                for sub_prop in prop.sub_properties:
+                    source_col = sub_prop.source
+                    sub_val = None
+
+                    if sub_prop.joined:
+                        sub_val = join.index.value(source_col, join_position)
+                    elif source_col == 'self':
+                        sub_val = value
+                    elif source_col in sub_prop_sources:
+                        # Se usa el índice 'i' para obtener el valor correspondiente de la otra columna
+                        if i < len(sub_prop_sources[source_col]):
+                            sub_val = sub_prop_sources[source_col][i]
+                        elif self.row_warnings:
+                            self.log(f"ADVERTENCIA: Fila {idx + 1}, col '{prop.column}'. El número de valores en '{prop.column}' y '{source_col}' no coincide. "
+                                     f"No se pudo asignar propiedad '{sub_prop.predicate_name}' para '{value}'.")
+
+                    if sub_val and sub_prop.transform is not None:
+                        with self.metrics.timed('transforms'):
+                            sub_val = sub_prop.transform.apply_value(sub_val)
+
+                    if sub_val and str(sub_val).strip() and record(object_uri, sub_prop.predicate, sub_val):
+                        graph.add((object_uri, sub_prop.predicate, Literal(sub_val, datatype=sub_prop.datatype)))
+
+    def _run_columnar(self, df, graph, plan, progress):
+        """
+        Motor vectorizado: procesa cada propiedad mapeada como una columna
+        completa (máscaras de nulos, split + explode, saneado de URIs en bloque)
+        y sólo crea los términos RDF al final, a partir de arrays alineados.
+        Produce exactamente los mismos triples que _run_rows.
+        """
+        total_rows = len(df)
+        row_labels = df.index.to_numpy()
+        # Se trabaja por posición para no depender de que el índice sea único
+        df = df.set_axis(pd.RangeIndex(total_rows), axis=0)
+        add = graph.add
+
+        # --- Sujetos ---
+        if plan.primary_key_index is not None:
+            pk_raw = df.iloc[:, plan.primary_key_index]
+            pk_str = pk_raw.astype(str)
+            valid = pk_raw.notna().to_numpy() & (pk_str.str.strip() != '').to_numpy()
+        else:
+            pk_str = pd.Series('', index=df.index)
+            valid = np.zeros(total_rows, dtype=bool)
+
+        if self.row_warnings:
+            for pos in np.flatnonzero(~valid):
+                self.log(f"ADVERTENCIA: Saltando fila {row_labels[pos] + 1} por clave primaria vacía.")
+
+        positions = np.flatnonzero(valid)
+        subjects = np.empty(total_rows, dtype=object)
+        subject_codes, subject_uris = self._mint_uris(pk_str.iloc[positions], plan.subject_uri)
+        subjects[positions] = subject_uris[subject_codes]
+        subject_class = plan.subject_class
+        for subject_uri in subject_uris:
+            add((subject_uri, RDF.type, subject_class))
+
+        # Las columnas multivaluadas se dividen una vez y las comparten todas las propiedades que las leen
+        store = MultiValueStore(df.iloc[positions])
+        n_props = len(plan.properties)
+
+        # --- Propiedades, una columna cada vez ---
+        for k, prop in enumerate(plan.properties):
+            if self.should_stop():
+                return False
+            progress(int(total_rows * k / n_props), total_rows)
+
+            started = time.perf_counter()
+            self._add_property_columnar(prop, store, subjects, row_labels, add)
+            self.metrics.record_property(prop.column, prop.type, time.perf_counter() - started)
+
+        progress(total_rows, total_rows)
+        return True
+
+    def _add_property_columnar(self, prop, store, subjects, row_labels, add):
+        """Genera los triples de una propiedad mapeada para todas las filas válidas a la vez."""
+        if prop.separator:
+            values = store.values(prop.column_index, prop.separator)
+        else:
+            cells = store.frame.iloc[:, prop.column_index]
+            values = cells[cells.notna()].astype(str)
+        if prop.transform is not None and not values.empty:
+            with self.metrics.timed('transforms'):
+                values = prop.transform.apply(values)
+        if values.empty: return
+
+        predicate = prop.predicate
+        value_rows = values.index.to_numpy()
+
+        if prop.type == 'literal':
+            codes, literals = self._make_literals(values, prop.datatype)
+            for i in _first_of_pairs(value_rows, codes):
+                add((subjects[value_rows[i]], predicate, literals[codes[i]]))
+
+        elif prop.type == 'uri':
+            # Los valores que no pueden ser URIs se descartan con una máscara, sin excepciones por valor
+            valid = valid_uri_mask(values)
+            if self.row_warnings:
+                value_arr = values.to_numpy()
+                for i in np.flatnonzero(~valid):
+                    self.log(f"ADVERTENCIA: Fila {row_labels[value_rows[i]] + 1}, valor '{value_arr[i]}' en columna '{prop.column}' no es una URI válida. Saltando.")
+            value_rows = value_rows[valid]
+            if value_rows.size == 0: return
+            codes, uniques = pd.factorize(values[valid])
+            uris = np.array([URIRef(value) for value in uniques], dtype=object)
+            for i in _first_of_pairs(value_rows, codes):
+                add((subjects[value_rows[i]], predicate, uris[codes[i]]))
+
+        elif prop.type == 'relation':
+            self._add_relation_columnar(prop, values, subjects, store, row_labels, add)
+
+    def _add_relation_columnar(self, prop, values, subjects, store, row_labels, add):
+        """Genera los triples de una propiedad de tipo relation a partir de sus valores ya divididos."""
+        value_rows = values.index.to_numpy()
+        value_arr = values.to_numpy()
+        object_codes, object_uris = self._mint_uris(values, prop.target_uri)
+
+        # El grafo es un conjunto: cada triple distinto se añade una sola vez
+        for i in _first_of_pairs(value_rows, object_codes):
+            add((subjects[value_rows[i]], prop.predicate, object_uris[object_codes[i]]))
+        record = self._record_entity_triple
+        target_class = prop.target_class
+        for object_uri in object_uris:
+            if record(object_uri, RDF.type, target_class):
+                add((object_uri, RDF.type, target_class))
+
+        # Posición de cada valor dentro de la lista (ya filtrada) de su fila
+        value_pos = values.groupby(level=0, sort=False).cumcount().to_numpy()
+
+        # Valores de las columnas de origen, alineados con (fila, posición); None si la fila no tiene tantos
+        aligned_sources = {}
+        for source_col, source_index in prop.sub_sources:
+            if source_index is None:
+                # Columna ausente del CSV: una celda vacía en cada fila
+                aligned = np.where(value_pos == 0, '', None)
+            elif prop.separator:
+                source = store.column(source_index, prop.separator)
+                aligned = source.aligned(store.rows_of(value_rows), value_pos)
+            else:
+                raw = store.frame.iloc[:, source_index].loc[value_rows]
+                aligned = raw.astype(str).where(raw.notna(), MISSING_TEXT).str.strip().to_numpy(dtype=object)
+            aligned_sources[source_col] = aligned
+
+        # Filas del origen unido: las claves de todos los valores se buscan de una vez en su índice
+        join = prop.join
+        if join is not None:
+            join_positions = join.index.lookup(value_arr if join.column == 'self' else aligned_sources[join.column])
+
+        for sub_prop in prop.sub_properties:
+            source_col = sub_prop.source
+            sub_predicate = sub_prop.predicate
+            if sub_prop.joined:
+                # Los valores del origen ya vienen sin espacios y con None en las celdas vacías
+                joined = join.index.values(source_col, join_positions)
+                sub_idx = np.flatnonzero(pd.notna(joined))
+                sub_vals = pd.Series(joined[sub_idx], dtype=object)
+            elif source_col == 'self':
+                sub_idx = np.arange(len(value_arr))
+                sub_vals = values
+            elif source_col in aligned_sources:
+                aligned = aligned_sources[source_col]
+                missing = pd.isna(aligned)
+                for i in (np.flatnonzero(missing) if self.row_warnings else ()):
+                    self.log(f"ADVERTENCIA: Fila {row_labels[value_rows[i]] + 1}, col '{prop.column}'. El número de valores en '{prop.column}' y '{source_col}' no coincide. "
+                             f"No se pudo asignar propiedad '{sub_prop.predicate_name}' para '{value_arr[i]}'.")
+                # Los valores de origen ya vienen sin espacios: basta con descartar los vacíos
+                sub_idx = np.flatnonzero(~missing)
+                sub_vals = pd.Series(aligned[sub_idx], dtype=object)
+                keep = (sub_vals != '').to_numpy()
+                sub_idx, sub_vals = sub_idx[keep], sub_vals[keep]
+            else:
+                continue
+            if sub_prop.transform is not None and sub_idx.size:
+                with self.metrics.timed('transforms'):
+                    sub_vals = sub_prop.transform.apply(pd.Series(sub_vals.to_numpy(), index=sub_idx, dtype=object))
+                sub_idx = sub_vals.index.to_numpy()
+            if sub_idx.size == 0: continue
+
+            literal_codes, literals = self._make_literals(sub_vals, sub_prop.datatype)
+            sub_objects = object_codes[sub_idx]
+            for i in _first_of_pairs(sub_objects, literal_codes):
+                object_uri, literal = object_uris[sub_objects[i]], literals[literal_codes[i]]
+                if record(object_uri, sub_predicate, str(literal)):
+                    add((object_uri, sub_predicate, literal))
+
+    def _make_literals(self, values, datatype):
+        """Crea un Literal por valor distinto. Devuelve (códigos por valor, literales)."""
+        codes, uniques = pd.factorize(values)
+        literals = np.array([Literal(value, datatype=datatype) for value in uniques], dtype=object)
+        return codes, literals
+
+    def _mint_uris(self, values, uri_template):
+        """
+        Sanea y construye las URIs de una Serie, una sola vez por valor distinto.
+        Devuelve (códigos por valor, URIs distintas).
+        """
+        with self.metrics.timed('uri_minting'):
+            codes, uniques = pd.factorize(values)
+            # La memoria del minter evita volver a sanear los valores ya vistos en bloques anteriores
+            key_codes, keys = pd.factorize(np.array([self.minter.key(value) for value in uniques], dtype=object))
+            uris = np.array([uri_template(key) for key in keys], dtype=object)
+            return key_codes[codes], uris
@@ -0,0 +1,175 @@
+"""
+Métricas y perfilado de una conversión.
+
+El motor anota en un ConversionMetrics el tiempo de cada columna mapeada y de
+cada tipo de propiedad (literal, uri, relation), el del minado de URIs y el
+de la serialización, y al terminar calcula filas/s y triples/s y el pico de
+memoria (RSS) del proceso. El informe se muestra en los logs y se guarda en
+JSON junto a la salida (`salida.metrics.json`); opcionalmente se puede
+capturar un perfil de cProfile de toda la ejecución (`salida.prof`).
+"""
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+METRICS_SUFFIX = '.metrics.json'
+PROFILE_SUFFIX = '.prof'
+
+
+def metrics_path_for(out_path):
+    return os.path.splitext(out_path)[0] + METRICS_SUFFIX
+
+
+def profile_path_for(out_path):
+    return os.path.splitext(out_path)[0] + PROFILE_SUFFIX
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso en MB, o None si no se puede medir."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux lo da en KB y macOS en bytes
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    if psutil is not None:
+        memory = psutil.Process().memory_info()
+        return getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+    return None
+
+
+class ConversionMetrics:
+    """Tiempos y contadores de una ejecución del motor."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.rows = 0
+        self.triples = 0
+        self.columns = {}
+        self.types = {}
+        self.sections = {}
+
+    def record_property(self, column, prop_type, seconds):
+        self.columns[column] = self.columns.get(column, 0.0) + seconds
+        self.types[prop_type] = self.types.get(prop_type, 0.0) + seconds
+
+    def record_section(self, section, seconds):
+        self.sections[section] = self.sections.get(section, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def timed(self, section):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_section(section, time.perf_counter() - started)
+
+    def wrap(self, section, func):
+        """Devuelve `func` cronometrada: cada llamada suma su tiempo a `section`."""
+        perf_counter = time.perf_counter
+        def timed_func(*args):
+            started = perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self.record_section(section, perf_counter() - started)
+        return timed_func
+
+    def finish(self, rows, triples):
+        self.finished = time.perf_counter()
+        self.rows = rows
+        self.triples = triples
+
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def live_summary(self, rows_done):
+        """Línea corta para mostrar durante la conversión."""
+        elapsed = self.elapsed()
+        rate = rows_done / elapsed if elapsed > 0 else 0.0
+        rss = peak_rss_mb()
+        rss_text = f" | RSS máx.: {rss:.0f} MB" if rss is not None else ""
+        return f"Tiempo: {elapsed:.1f} s | {rows_done} filas ({rate:.0f} filas/s){rss_text}"
+
+    def report(self):
+        elapsed = self.elapsed()
+        def rate(count):
+            return round(count / elapsed, 1) if elapsed > 0 else None
+        def by_time(times):
+            return {key: round(seconds, 4) for key, seconds in sorted(times.items(), key=lambda item: -item[1])}
+        return {
+            'rows': self.rows,
+            'triples': self.triples,
+            'elapsed_s': round(elapsed, 4),
+            'rows_per_s': rate(self.rows),
+            'triples_per_s': rate(self.triples),
+            'column_s': by_time(self.columns),
+            'property_type_s': by_time(self.types),
+            'uri_minting_s': round(self.sections.get('uri_minting', 0.0), 4),
+            'serialization_s': round(self.sections.get('serialization', 0.0), 4),
+            'statistics_s': round(self.sections.get('statistics', 0.0), 4),
+            'transforms_s': round(self.sections.get('transforms', 0.0), 4),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+    def summary(self, top=5):
+        """Resumen legible del informe para los logs."""
+        report = self.report()
+        lines = [f"Métricas: {report['rows']} filas y {report['triples']} triples en {report['elapsed_s']:.2f} s "
+                 f"({report['rows_per_s']} filas/s, {report['triples_per_s']} triples/s).",
+                 f"  Minado de URIs: {report['uri_minting_s']:.2f} s | Serialización: {report['serialization_s']:.2f} s"
+                 + (f" | Estadísticas: {report['statistics_s']:.2f} s" if report['statistics_s'] else "")
+                 + (f" | Transformaciones: {report['transforms_s']:.2f} s" if report['transforms_s'] else "")
+                 + (f" | RSS máx.: {report['peak_rss_mb']:.0f} MB" if report['peak_rss_mb'] is not None else "")]
+        if report['property_type_s']:
+            lines.append("  Por tipo: " + ", ".join(f"{key} {seconds:.2f} s" for key, seconds in report['property_type_s'].items()))
+        if report['column_s']:
+            slowest = list(report['column_s'].items())[:top]
+            lines.append("  Columnas más lentas: " + ", ".join(f"'{key}' {seconds:.2f} s" for key, seconds in slowest))
+        return "\n".join(lines)
+
+    def save(self, path, extra=None):
+        """Guarda el informe en JSON en `path`."""
+        report = self.report()
+        report.update(extra or {})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+@contextlib.contextmanager
+def profiled(path):
+    """Ejecuta el bloque bajo cProfile y guarda el perfil en `path` (si `path` es None no perfila)."""
+    if path is None:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def profile_top(path, limit=15):
+    """Texto con las `limit` funciones de mayor tiempo acumulado de un perfil guardado."""
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,357 @@
+"""
+Proceso de conversión separado de la interfaz gráfica.
+
+El motor, la lectura del CSV y los triples generados viven en un proceso
+hijo; la interfaz sólo le envía órdenes y presenta lo que recibe. Así la
+conversión no compite con Tk por el GIL y, si no atiende a tiempo la
+petición de detención, el proceso se puede terminar al instante.
+
+El canal es un Pipe de multiprocessing. Órdenes (interfaz -> proceso):
+('convert', opciones), ('save', opciones) y ('close', {}). Eventos
+(proceso -> interfaz), como tuplas cortas:
+
+    ('tick', mensajes, progreso, métricas)  como mucho uno cada UI_TICK_MS
+    ('done', resultado)                     al terminar o detenerse una conversión
+    ('saved', ruta, formato)                al guardar el RDF
+    ('refused', título, mensaje)            orden rechazada (nada que reanudar, mapeo no válido)
+    ('error', orden, mensaje)               excepción inesperada (el detalle va en los logs)
+
+Los logs se agrupan en el propio proceso con UiChannel, de modo que por el
+canal sólo pasa un mensaje por tic con los logs pendientes, el último
+progreso y la línea de métricas.
+"""
+import multiprocessing
+import os
+import threading
+import traceback
+
+from bulk_export import export_lines, is_bulk_manifest_path, sink_lines, summary as bulk_summary
+from checkpoints import Checkpointer, checkpoint_path_for, conversion_signature, load_checkpoint
+from conversion_engine import ConversionEngine, rdf_format_for_path
+from conversion_metrics import metrics_path_for
+from csv_ingest import DEFAULT_CHUNK_SIZE, iter_csv_chunks, iter_frame_chunks, mapping_columns, read_csv_frame
+from entity_cache import DEFAULT_MAX_ENTITIES
+from preflight import validate_csv
+from sqlite_store import SQLiteTripleStore
+from triple_buffer import TripleBuffer
+from ui_channel import UI_TICK_MS, UiChannel
+from void_stats import dataset_uri_for, void_path_for
+
+# Tiempo que se espera a que el motor atienda la detención antes de terminar el proceso
+STOP_GRACE_MS = 2000
+
+
+def gui_conversion_signature(csv_path, mapping_data):
+    """Firma de las conversiones de la interfaz, con las mismas opciones que `conversion_cli --store`."""
+    return conversion_signature(csv_path, mapping_data, engine='columnar', chunk_size=DEFAULT_CHUNK_SIZE,
+                                entity_cache=DEFAULT_MAX_ENTITIES, uri_collisions='report', mode='store')
+
+
+class CommandRefused(Exception):
+    """La orden no puede ejecutarse en el estado actual; se informa a la interfaz como ('refused', título, mensaje)."""
+
+    def __init__(self, message, title="No se puede reanudar"):
+        super().__init__(message)
+        self.title = title
+
+
+class _WorkerSession:
+    """Estado del proceso hijo: los triples acumulados y el motor de la última conversión."""
+
+    def __init__(self, conn, stop_event):
+        self.conn = conn
+        self.stop_event = stop_event
+        self.send_lock = threading.Lock()
+        self.channel = UiChannel()
+        self.sink = TripleBuffer()
+        self.engine = None
+        self.converting = False
+        self.rows_done = 0
+        self.resume_row = None        # Filas ya convertidas de la última conversión en memoria detenida
+        self.resume_state = None      # Estado del motor al terminar el último bloque completo
+        self.void_complete = False    # Las estadísticas del motor cubren todos los triples acumulados
+        self.last_metrics = None
+
+    def send(self, *event):
+        with self.send_lock:
+            self.conn.send(event)
+
+    def flush_events(self):
+        messages, progress = self.channel.drain()
+        if progress is not None:
+            self.rows_done = progress[0]
+        metrics = None
+        if self.engine is not None:
+            if self.engine.metrics.finished is not None:
+                metrics = self.engine.metrics.summary().splitlines()[0]
+            elif self.converting:
+                metrics = self.engine.metrics.live_summary(self.rows_done)
+        if metrics == self.last_metrics:
+            metrics = None
+        else:
+            self.last_metrics = metrics
+        if messages or progress is not None or metrics is not None:
+            self.send('tick', messages, progress, metrics)
+
+    def _tick_loop(self, closed):
+        while not closed.wait(UI_TICK_MS / 1000):
+            self.flush_events()
+
+    def serve(self):
+        closed = threading.Event()
+        ticker = threading.Thread(target=self._tick_loop, args=(closed,), daemon=True)
+        ticker.start()
+        try:
+            while True:
+                try:
+                    command, options = self.conn.recv()
+                except EOFError:
+                    # La interfaz se cerró
+                    break
+                if command == 'close':
+                    break
+                try:
+                    getattr(self, command)(**options)
+                except CommandRefused as e:
+                    self.send('refused', e.title, str(e))
+                except Exception as e:
+                    during = "DURANTE LA CONVERSIÓN" if command == 'convert' else "AL GUARDAR EL RDF"
+                    self.channel.log(f"ERROR CRÍTICO {during}: {e}\n{traceback.format_exc()}")
+                    self.flush_events()
+                    self.send('error', command, str(e))
+        finally:
+            closed.set()
+            if isinstance(self.sink, SQLiteTripleStore):
+                self.sink.close()
+
+    def _open_sink(self, store_path, resume):
+        """TripleBuffer en memoria o el almacén SQLite `store_path`, que se mantiene abierto entre conversiones."""
+        current = self.sink.path if isinstance(self.sink, SQLiteTripleStore) else None
+        if store_path is None:
+            if current is not None:
+                self.sink.close()
+                self.sink = TripleBuffer()
+            elif not resume:
+                self.sink = TripleBuffer()
+            return
+        if current == store_path:
+            self.channel.log(f"Acumulando en el almacén {store_path} ({len(self.sink)} triples).")
+            return
+        if current is not None:
+            self.sink.close()
+        self.sink = SQLiteTripleStore(store_path)
+        self.channel.log(f"Almacén en disco: {store_path} ({len(self.sink)} triples existentes).")
+
+    def convert(self, csv_path, mapping_data, store_path=None, resume=False, total_rows=None):
+        """
+        Convierte el CSV leyéndolo por bloques. Con `resume` continúa la
+        última conversión detenida: en memoria desde el último bloque
+        completado; con el almacén en disco, desde su punto de control.
+
+        Una conversión nueva empieza con la validación previa (ver preflight):
+        su informe sustituye a las advertencias fila a fila del motor y, si el
+        mapeo no sirve para el CSV, la conversión se rechaza sin tocar los
+        triples acumulados.
+        """
+        self.stop_event.clear()
+        first_row, state, checkpointer = 0, None, None
+        if resume and store_path is None and (self.resume_row is None or isinstance(self.sink, SQLiteTripleStore)):
+            raise CommandRefused("No hay una conversión detenida que reanudar.")
+        if not resume and not self._preflight(csv_path, mapping_data):
+            return
+        self._open_sink(store_path, resume)
+        void_complete = len(self.sink) == 0
+
+        # Al reanudar no hay informe previo en esta sesión: se conservan las advertencias fila a fila
+        engine = self.engine = ConversionEngine(mapping_data, log=self.channel.log, progress=self.channel.progress,
+                                                should_stop=self.stop_event.is_set, row_warnings=resume,
+                                                statistics=True)
+        if store_path is not None:
+            # Con el almacén en disco se guardan puntos de control junto a él (ver checkpoints)
+            signature = gui_conversion_signature(csv_path, mapping_data)
+            checkpointer = Checkpointer(checkpoint_path_for(store_path), engine, self.sink, signature)
+            if resume:
+                try:
+                    checkpoint = load_checkpoint(checkpointer.path, signature)
+                except ValueError as e:
+                    raise CommandRefused(str(e))
+                first_row, state = checkpoint['rows_done'], checkpoint['engine_state']
+                void_complete = state.get('statistics') is not None
+            else:
+                # Un punto de control anterior ya no corresponde a esta conversión
+                checkpointer.remove()
+        elif resume:
+            # Los triples ya generados siguen en el buffer; repetir alguno no cambia el resultado
+            first_row = self.resume_row
+            # Las estadísticas y la caché siguen desde el último bloque completo de la conversión detenida
+            state = self.resume_state
+            void_complete = self.void_complete
+
+        self.void_complete = void_complete
+
+        self.resume_row = self.rows_done = first_row
+        # Sin estado previo, el del motor recién creado
+        self.resume_state = state if state is not None else engine.snapshot_state()
+        self.last_metrics = None
+
+        def on_chunk(rows_done):
+            # Al detenerse a mitad de un bloque, las estadísticas y la caché de entidades ya cuentan
+            # parte de él; al reanudar esas filas se repiten, así que se guarda el estado de este punto
+            self.resume_row = rows_done
+            self.resume_state = engine.snapshot_state()
+            if checkpointer: checkpointer(rows_done)
+
+        self.converting = True
+        try:
+            if store_path is None:
+                # En memoria el CSV se lee completo con los tipos de pandas, como la conversión original
+                chunks = iter_frame_chunks(read_csv_frame(csv_path, columns=mapping_columns(mapping_data)),
+                                           skip_rows=first_row)
+            else:
+                chunks = iter_csv_chunks(csv_path, columns=mapping_columns(mapping_data), skip_rows=first_row)
+            finished = engine.run_chunks(chunks, self.sink, total_rows=total_rows, first_row=first_row,
+                                         state=state, on_chunk=on_chunk)
+            if finished:
+                self.resume_row = self.resume_state = None
+                if checkpointer: checkpointer.remove()
+            elif checkpointer:
+                # El almacén ya confirmó lo convertido: se reanudará desde el último bloque completo
+                checkpointer.save(self.resume_row, self.resume_state)
+        finally:
+            self.converting = False
+            self.channel.summarize_warnings()
+            self.flush_events()
+        self.send('done', {'finished': finished, 'resume_row': self.resume_row, 'triples': len(self.sink)})
+
+    def _preflight(self, csv_path, mapping_data):
+        """Valida el CSV y muestra el informe. False si se pidió detenerse durante la validación."""
+        self.channel.log("Validando el CSV contra el mapeo...")
+        self.flush_events()
+        report = validate_csv(csv_path, mapping_data, should_stop=self.stop_event.is_set)
+        if report is None:
+            self.channel.log("Validación detenida por el usuario.")
+            self.flush_events()
+            # Se empezaba una conversión nueva: ya no se reanuda la anterior en memoria
+            self.resume_row = None
+            self.send('done', {'finished': False, 'resume_row': self.resume_row, 'triples': len(self.sink)})
+            return False
+        self.channel.log(report.summary())
+        if report.errors:
+            self.flush_events()
+            raise CommandRefused("\n".join(report.errors), title="Mapeo no válido")
+        return True
+
+    def save(self, path):
+        """
+        Serializa los triples acumulados en `path`, con el formato que indica
+        su extensión; un `*.manifest.json` exporta para carga masiva (ver bulk_export).
+        """
+        if is_bulk_manifest_path(path):
+            manifest = export_lines(sink_lines(self.sink), path)
+            self.channel.log(bulk_summary(manifest, path))
+            self._save_void(path)
+            self.flush_events()
+            self.send('saved', path, 'bulk')
+            return
+        rdf_format = rdf_format_for_path(path)
+        if self.engine is None:
+            self.sink.serialize(destination=path, format=rdf_format, encoding='utf-8')
+        else:
+            with self.engine.metrics.timed('serialization'):
+                self.sink.serialize(destination=path, format=rdf_format, encoding='utf-8')
+            self.engine.metrics.save(metrics_path_for(path), extra={'output': path, 'engine': self.engine.mode})
+        self.channel.log(f"Archivo RDF guardado exitosamente en: {path}")
+        self._save_void(path)
+        self.flush_events()
+        self.send('saved', path, rdf_format)
+
+    def _save_void(self, path):
+        """Descripción VoID junto a `path`, si las estadísticas cubren todos los triples guardados (ver void_stats)."""
+        if self.engine is None or not self.void_complete:
+            return
+        void_path = void_path_for(path)
+        self.engine.statistics.save_void(void_path, dataset_uri_for(self.engine.mapping_data),
+                                         triples=len(self.sink), data_dump=os.path.basename(path))
+        self.channel.log(f"Descripción VoID guardada en {void_path}")
+
+
+def _worker_main(conn, stop_event):
+    _WorkerSession(conn, stop_event).serve()
+
+
+class ConversionWorker:
+    """
+    Lado de la interfaz: arranca el proceso hijo cuando hace falta, le envía
+    órdenes y recoge sus eventos sin bloquear (se llama desde el tic de la
+    interfaz). Se usa el método 'spawn' en todas las plataformas: el hijo no
+    hereda Tk ni los hilos de la interfaz.
+    """
+
+    def __init__(self):
+        self.context = multiprocessing.get_context('spawn')
+        self.process = None
+        self.conn = None
+        self.stop_event = None
+        self.busy = False             # Hay una orden en curso (conversión o guardado)
+
+    def _ensure_started(self):
+        if self.process is not None and self.process.is_alive():
+            return
+        self.conn, child_conn = self.context.Pipe()
+        self.stop_event = self.context.Event()
+        self.process = self.context.Process(target=_worker_main, args=(child_conn, self.stop_event),
+                                            name='conversion-worker', daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def _send(self, command, **options):
+        self._ensure_started()
+        self.busy = True
+        self.conn.send((command, options))
+
+    def convert(self, csv_path, mapping_data, store_path=None, resume=False, total_rows=None):
+        self._send('convert', csv_path=os.path.abspath(csv_path), mapping_data=mapping_data,
+                   store_path=store_path, resume=resume, total_rows=total_rows)
+
+    def save(self, path):
+        self._send('save', path=path)
+
+    def stop(self):
+        """Pide al motor que se detenga al terminar la propiedad o la fila en curso."""
+        if self.stop_event is not None:
+            self.stop_event.set()
+
+    def kill(self):
+        """Termina el proceso de inmediato; los triples en memoria se pierden, el almacén en disco no."""
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+        self.process = self.conn = None
+        self.busy = False
+
+    def events(self):
+        """Eventos recibidos desde la última llamada. ('died',) si el proceso terminó inesperadamente."""
+        received = []
+        if self.conn is None:
+            return received
+        try:
+            while self.conn.poll():
+                event = self.conn.recv()
+                if event[0] in ('done', 'saved', 'refused', 'error'):
+                    self.busy = False
+                received.append(event)
+        except (EOFError, OSError):
+            self.process.join()
+            received.append(('died', self.process.exitcode))
+            self.process = self.conn = None
+            self.busy = False
+        return received
+
+    def close(self):
+        if self.process is not None and self.process.is_alive():
+            try:
+                self.conn.send(('close', {}))
+                self.process.join(timeout=STOP_GRACE_MS / 1000)
+            except (BrokenPipeError, OSError):
+                pass
+        self.kill()
@@ -0,0 +1,127 @@
+"""
+Índice de posiciones de registros de un CSV para previsualizarlo por páginas.
+
+Se recorre el archivo una sola vez, proyectado en memoria (mmap) y por
+bloques, buscando con NumPy los saltos de línea y las comillas: un salto de
+línea termina un registro sólo si antes de él hay un número par de comillas,
+de modo que los campos entre comillas con saltos de línea (los resúmenes de
+Scopus) no parten el registro. El índice guarda el byte donde empieza cada
+registro (8 bytes por fila) y permite leer cualquier página de filas con el
+módulo csv sin cargar el archivo en pandas.
+
+El índice puede consultarse mientras se construye en otro hilo: las páginas
+ya indexadas se leen de inmediato.
+"""
+import csv
+import io
+import mmap
+import os
+import threading
+
+import numpy as np
+
+# Bytes del archivo examinados en cada paso del recorrido
+INDEX_BLOCK_SIZE = 64 * 1024 * 1024
+# El primer bloque es pequeño para que la primera página esté disponible al instante
+FIRST_BLOCK_SIZE = 1024 * 1024
+
+_QUOTE = ord('"')
+_NEWLINE = ord('\n')
+
+
+class CsvRecordIndex:
+    """Posiciones (en bytes) del inicio de cada registro de un CSV, con lectura por páginas."""
+
+    def __init__(self, path, encoding='utf-8', block_size=INDEX_BLOCK_SIZE):
+        self.path = path
+        self.encoding = encoding
+        self.block_size = block_size
+        self.size = os.path.getsize(path)
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self.lock = threading.Lock()
+        # Inicios de registro por bloque recorrido; el primero es la cabecera
+        self.blocks = [np.zeros(1, dtype=np.int64)]
+        self.starts = self.blocks[0]
+        self.indexed_bytes = 0
+        self.complete = self.size == 0
+        self.cancelled = False
+        self.header = []
+
+    def build(self):
+        """Recorre el archivo completo. Puede ejecutarse en un hilo aparte."""
+        buffer = np.frombuffer(self.mm, dtype=np.uint8) if self.mm is not None else np.empty(0, dtype=np.uint8)
+        quotes_before = 0
+        offset, block_size = 0, min(FIRST_BLOCK_SIZE, self.block_size)
+        while offset < self.size:
+            if self.cancelled:
+                return
+            block = buffer[offset:offset + block_size]
+            quotes = np.flatnonzero(block == _QUOTE)
+            newlines = np.flatnonzero(block == _NEWLINE)
+            # Comillas anteriores a cada salto de línea: si son pares, el salto está fuera de un campo
+            outside = (np.searchsorted(quotes, newlines) + quotes_before) % 2 == 0
+            quotes_before += len(quotes)
+            starts = newlines[outside].astype(np.int64) + offset + 1
+            with self.lock:
+                self.blocks.append(starts[starts < self.size])
+                self.starts = None
+                self.indexed_bytes = min(offset + block_size, self.size)
+            offset, block_size = offset + block_size, self.block_size
+        with self.lock:
+            self.complete = True
+        del buffer
+
+    def _all_starts(self):
+        with self.lock:
+            if self.starts is None:
+                self.blocks = [np.concatenate(self.blocks)]
+                self.starts = self.blocks[0]
+            return self.starts, self.indexed_bytes, self.complete
+
+    def __len__(self):
+        """Filas de datos indexadas hasta ahora (sin la cabecera)."""
+        starts, _, complete = self._all_starts()
+        # El último inicio sólo delimita un registro completo cuando ya se ha recorrido todo
+        return max(len(starts) - 1, 0) if complete else max(len(starts) - 2, 0)
+
+    def _parse(self, start, end):
+        text = self.mm[start:end].decode(self.encoding, errors='replace') if self.mm is not None else ''
+        return list(csv.reader(io.StringIO(text.lstrip('\ufeff') if start == 0 else text)))
+
+    def read_header(self):
+        """Nombres de columna (primer registro)."""
+        if not self.header:
+            starts, indexed, complete = self._all_starts()
+            if len(starts) > 1:
+                end = starts[1]
+            elif complete:
+                end = self.size
+            else:
+                return []
+            rows = self._parse(0, int(end))
+            self.header = rows[0] if rows else []
+        return self.header
+
+    def rows(self, first, count):
+        """Filas de datos [first, first + count) ya indexadas, como listas de cadenas."""
+        starts, _, complete = self._all_starts()
+        available = len(self)
+        first = max(0, min(first, available))
+        last = min(first + count, available)
+        if last <= first:
+            return []
+        start = int(starts[first + 1])
+        end = int(starts[last + 1]) if last + 1 < len(starts) else self.size
+        return self._parse(start, end)[:last - first]
+
+    def close(self):
+        self.cancelled = True
+        with self.lock:
+            if self.mm is not None:
+                try:
+                    self.mm.close()
+                except BufferError:
+                    # El hilo de indexado aún tiene una vista del mapa; se libera al terminar
+                    pass
+            self.file.close()
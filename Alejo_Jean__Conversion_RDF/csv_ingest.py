@@ -0,0 +1,86 @@
+"""
+Lectura de CSV por bloques y limitada a las columnas que usa el mapeo.
+
+Al leer por bloques todas las columnas se leen como texto con un tipo
+compacto (cadenas de Arrow): el motor trabaja
+siempre con el valor textual de cada celda, y así el resultado no depende del
+tipo que pandas infiera en cada bloque. El CSV completo (conversión en
+memoria) se lee con los tipos que infiere pandas, como hacía el conversor
+original, para que el resultado no cambie: una columna numérica con celdas
+vacías se lee como decimal y "1" se escribe "1.0".
+"""
+import pandas as pd
+
+# pyarrow es una dependencia obligatoria (ver requirements.txt); también la usa multivalue_store
+TEXT_DTYPE = 'string[pyarrow]'
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def mapping_columns(mapping_data):
+    """
+    Columnas del CSV referenciadas por el mapeo, en orden de aparición:
+    la clave primaria, las claves de `properties`, las columnas `column` de los
+    join y las columnas `source` de las propiedades de las entidades
+    relacionadas (salvo las que se leen de otro origen con `from`).
+    """
+    columns = {}
+    subject_conf = mapping_data.get('subject') or {}
+    if subject_conf.get('primary_key'):
+        columns[subject_conf['primary_key']] = None
+    for col, prop_conf in (mapping_data.get('properties') or {}).items():
+        columns[col] = None
+        target_conf = prop_conf.get('target') or {}
+        join_column = (target_conf.get('join') or {}).get('column')
+        if join_column and join_column != 'self':
+            columns[join_column] = None
+        for sub_prop in target_conf.get('properties', []):
+            source = sub_prop.get('source')
+            if source and source != 'self' and not sub_prop.get('from'):
+                columns[source] = None
+    return list(columns)
+
+
+def read_csv_header(path):
+    """Devuelve los nombres de columna del CSV sin leer sus filas."""
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _read_kwargs(columns, text=True):
+    kwargs = {'dtype': TEXT_DTYPE} if text else {}
+    if columns is not None:
+        wanted = set(columns)
+        # Un callable evita errores si el mapeo menciona columnas que el CSV no tiene
+        kwargs['usecols'] = lambda col: col in wanted
+    return kwargs
+
+
+def iter_csv_chunks(path, columns=None, chunksize=DEFAULT_CHUNK_SIZE, skip_rows=0):
+    """
+    Itera el CSV en DataFrames de `chunksize` filas, leyendo sólo `columns`
+    si se indica. Con `skip_rows` se omiten las primeras filas de datos (al
+    reanudar una conversión) y el índice de los bloques sigue contando desde
+    ellas, como si se hubieran leído.
+    """
+    if not skip_rows:
+        return pd.read_csv(path, chunksize=chunksize, **_read_kwargs(columns))
+    # pandas cuenta registros, no líneas: los campos entre comillas con saltos de línea no lo desplazan
+    chunks = pd.read_csv(path, chunksize=chunksize, skiprows=lambda i: 0 < i <= skip_rows, **_read_kwargs(columns))
+    return _shift_index(chunks, skip_rows)
+
+
+def _shift_index(chunks, offset):
+    for chunk in chunks:
+        chunk.index += offset
+        yield chunk
+
+
+def iter_frame_chunks(df, chunksize=DEFAULT_CHUNK_SIZE, skip_rows=0):
+    """Itera un DataFrame ya cargado en bloques de `chunksize` filas, a partir de la fila `skip_rows`."""
+    for start in range(skip_rows, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def read_csv_frame(path, columns=None):
+    """Lee el CSV completo con los tipos que infiere pandas, leyendo sólo `columns` si se indica."""
+    return pd.read_csv(path, **_read_kwargs(columns, text=False))
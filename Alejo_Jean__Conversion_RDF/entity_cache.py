@@ -0,0 +1,75 @@
+"""
+Caché de entidades relacionadas ya materializadas (autores, palabras clave...).
+
+En las propiedades de tipo `relation` la misma entidad aparece en muchas filas
+y, a veces, en varias columnas (p. ej. `Authors` y `Author full names`
+generan ambas `person/{value}`). La caché recuerda qué triples de cada
+entidad (su rdf:type y sus sub-propiedades) ya se emitieron, de modo que una
+entidad repetida sólo cuesta el triple que la enlaza con el sujeto.
+
+Está acotada: cuando supera `max_entities` se descartan las entidades usadas
+hace más tiempo. Si una entidad descartada reaparece sus triples se vuelven a
+emitir, lo que no cambia el grafo resultante (sólo puede repetir líneas en
+la salida en streaming).
+"""
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTITIES = 200000
+
+
+def _copy_entities(entities):
+    # Los conjuntos de cada entidad cambian al convertir: un estado guardado no los comparte con la caché
+    return OrderedDict(zip(entities, map(set.copy, entities.values())))
+
+
+class EntityCache:
+    """Caché LRU de entidades -> conjunto de (predicado, valor) ya emitidos."""
+
+    def __init__(self, max_entities=DEFAULT_MAX_ENTITIES):
+        self.max_entities = max_entities
+        self.entities = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def record(self, entity, predicate, value):
+        """
+        Registra el triple (entity, predicate, value).
+        Devuelve True si es nuevo (hay que emitirlo) y False si ya se emitió.
+        """
+        emitted = self.entities.get(entity)
+        if emitted is None:
+            emitted = self.entities[entity] = set()
+            if len(self.entities) > self.max_entities:
+                self.entities.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.entities.move_to_end(entity)
+
+        key = (predicate, value)
+        if key in emitted:
+            self.hits += 1
+            return False
+        emitted.add(key)
+        self.misses += 1
+        return True
+
+    def state(self):
+        """Contenido de la caché para guardarlo en un punto de control (ver checkpoints)."""
+        return {'entities': _copy_entities(self.entities), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+    def restore(self, state):
+        self.entities = _copy_entities(state['entities'])
+        self.hits, self.misses, self.evictions = state['hits'], state['misses'], state['evictions']
+
+    def clear(self):
+        self.entities.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def summary(self):
+        return (f"Caché de entidades: {len(self.entities)} entidades, {self.misses} triples emitidos, "
+                f"{self.hits} repetidos evitados, {self.evictions} entidades descartadas.")
+
+    def __len__(self):
+        return len(self.entities)
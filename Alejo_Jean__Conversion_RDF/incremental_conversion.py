@@ -0,0 +1,302 @@
+"""
+Re-conversión incremental a partir de huellas de fila.
+
+Junto a la salida N-Triples se guarda un manifiesto SQLite con, para cada
+valor de `subject.primary_key`, una huella (hash) del contenido de sus filas
+y los triples que produjeron. En la siguiente ejecución sólo se convierten
+las filas añadidas o modificadas; los triples de las filas eliminadas o
+modificadas se retiran, salvo que otra fila los siga produciendo (p. ej. el
+rdf:type de un autor compartido). Además del conjunto de datos actualizado
+se escribe un archivo delta con las altas y bajas como SPARQL Update
+(`DELETE DATA` / `INSERT DATA`), aplicable directamente a un triplestore.
+
+El coste de una actualización es proporcional al cambio: el CSV se recorre
+para calcular las huellas (vectorizado), pero sólo se convierten las filas
+que cambiaron. Si el mapeo cambia, el manifiesto deja de ser válido y se
+hace una conversión completa; su delta se calcula contra la salida anterior,
+de modo que también retira los triples que el mapeo nuevo ya no produce.
+"""
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from conversion_engine import ConversionEngine
+from csv_ingest import DEFAULT_CHUNK_SIZE, iter_csv_chunks, mapping_columns, read_csv_header
+from join_sources import source_fingerprints
+from rdf_writers import nt_line
+
+MANIFEST_SUFFIX = '.manifest.sqlite'
+DELTA_SUFFIX = '.delta.ru'
+# Se incrementa si cambia el esquema del manifiesto o la forma de calcular las huellas
+MANIFEST_VERSION = '1'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS rows (pk TEXT PRIMARY KEY, fingerprint INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS triples (id INTEGER PRIMARY KEY, nt TEXT NOT NULL UNIQUE, refs INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS row_triples (pk TEXT NOT NULL, triple_id INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS row_triples_pk ON row_triples (pk);
+"""
+
+
+def manifest_path_for(out_path):
+    return out_path + MANIFEST_SUFFIX
+
+
+def delta_path_for(out_path):
+    return os.path.splitext(out_path)[0] + DELTA_SUFFIX
+
+
+def _config_hash(mapping_data, engine_options):
+    """
+    Huella del mapeo y de las opciones que cambian las URIs generadas. Si el
+    mapeo une otros orígenes, también de su versión: los triples de una fila
+    dependen de ellos, así que si cambian se convierte todo de nuevo.
+    """
+    config = [MANIFEST_VERSION, mapping_data, engine_options]
+    fingerprints = source_fingerprints(mapping_data)
+    if fingerprints:
+        config.append(fingerprints)
+    text = yaml.safe_dump(config, sort_keys=True, allow_unicode=True)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _primary_keys(chunk, primary_key):
+    """Claves primarias (texto) de un bloque y máscara de las filas con clave no vacía."""
+    raw = chunk[primary_key]
+    keys = raw.astype(str)
+    valid = (raw.notna() & (keys.str.strip() != '')).to_numpy()
+    return keys.to_numpy(dtype=object), valid
+
+
+def _fingerprints(chunks, primary_key):
+    """
+    Recorre el CSV y devuelve una Serie clave primaria -> huella.
+    Si una clave aparece en varias filas su huella combina las de todas ellas.
+    """
+    keys, hashes = [], []
+    for chunk in chunks:
+        chunk_keys, valid = _primary_keys(chunk, primary_key)
+        row_hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        keys.append(chunk_keys[valid])
+        hashes.append(row_hashes[valid])
+    if not keys:
+        return pd.Series(dtype='int64')
+    by_row = pd.Series(np.concatenate(hashes), index=pd.Index(np.concatenate(keys)))
+    # La suma (módulo 2^64) no depende del orden de las filas repetidas; SQLite guarda enteros con signo
+    combined = by_row.groupby(level=0, sort=False).sum()
+    return pd.Series(combined.to_numpy().view('int64'), index=combined.index)
+
+
+class _RowTriples:
+    """Sink para ConversionEngine (modo filas) que reparte los triples por fila."""
+
+    def __init__(self):
+        self.by_row = {}
+        self.current = None
+
+    def bind(self, prefix, namespace):
+        pass
+
+    def start_row(self, pos):
+        self.current = self.by_row.setdefault(pos, set())
+
+    def add(self, triple):
+        self.current.add(nt_line(triple))
+
+    def __len__(self):
+        return sum(len(triples) for triples in self.by_row.values())
+
+
+class IncrementalConverter:
+    """Conversión incremental CSV -> N-Triples con manifiesto de huellas por fila."""
+
+    def __init__(self, mapping_data, log=None, progress=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 uri_collisions='report', row_warnings=True):
+        self.mapping_data = mapping_data
+        self.log = log or (lambda message: None)
+        self.progress = progress or (lambda value, maximum: None)
+        self.chunk_size = chunk_size
+        self.engine_options = {'uri_collisions': uri_collisions}
+        # No forma parte de la huella de configuración: sólo decide qué se muestra en los logs
+        self.row_warnings = row_warnings
+        self.primary_key = (mapping_data.get('subject') or {}).get('primary_key')
+
+    def run(self, csv_path, out_path, delta_path=None):
+        """
+        Actualiza `out_path` (N-Triples) y su manifiesto a partir de `csv_path`
+        y escribe el delta en `delta_path`. Devuelve (triples añadidos, triples eliminados).
+        """
+        delta_path = delta_path or delta_path_for(out_path)
+        columns = mapping_columns(self.mapping_data)
+        if self.primary_key not in read_csv_header(csv_path):
+            raise ValueError(f"El modo incremental necesita la columna de clave primaria '{self.primary_key}' en el CSV.")
+
+        db, rebuilt = self._open_manifest(manifest_path_for(out_path), out_path)
+        try:
+            self.log("Calculando huellas de las filas...")
+            current = _fingerprints(iter_csv_chunks(csv_path, columns=columns, chunksize=self.chunk_size),
+                                    self.primary_key)
+            previous = pd.read_sql_query("SELECT pk, fingerprint FROM rows", db, index_col='pk')['fingerprint']
+
+            common = current.index.intersection(previous.index)
+            changed = common[current[common].to_numpy() != previous[common].to_numpy()]
+            added = current.index.difference(previous.index)
+            removed = previous.index.difference(current.index)
+            self.log(f"Filas: {len(added)} añadidas, {len(changed)} modificadas, {len(removed)} eliminadas, "
+                     f"{len(common) - len(changed)} sin cambios.")
+
+            new_triples = self._convert_keys(csv_path, columns, set(added).union(changed))
+            with db:
+                additions, deletions = self._apply(db, list(removed) + list(changed), new_triples, current)
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('config', ?)",
+                           (_config_hash(self.mapping_data, self.engine_options),))
+            if rebuilt:
+                additions, deletions = self._rebuild_delta(db)
+
+            self._write_dataset(db, out_path)
+            self._write_delta(delta_path, additions, deletions)
+        finally:
+            db.close()
+
+        self.log(f"\n--- CONVERSIÓN INCREMENTAL COMPLETADA ---\n"
+                 f"Triples añadidos: {len(additions)}\nTriples eliminados: {len(deletions)}\n"
+                 f"Delta: {delta_path}")
+        return len(additions), len(deletions)
+
+    def _open_manifest(self, manifest_path, out_path):
+        """
+        Abre el manifiesto; si no es válido para este mapeo o falta la salida,
+        empieza uno nuevo. Devuelve (conexión, True si hay que convertir todo);
+        en ese caso la tabla temporal `previous` guarda los triples de la
+        salida anterior, contra los que se calcula el delta (ver _rebuild_delta).
+        """
+        config = _config_hash(self.mapping_data, self.engine_options)
+        previous = []
+        if os.path.exists(manifest_path):
+            db = sqlite3.connect(manifest_path)
+            db.executescript(_SCHEMA)
+            stored = db.execute("SELECT value FROM meta WHERE name = 'config'").fetchone()
+            if stored and stored[0] == config and os.path.exists(out_path):
+                return db, False
+            if not os.path.exists(out_path):
+                # Sin la salida, el manifiesto es lo único que queda de lo que se publicó
+                previous = [nt for (nt,) in db.execute("SELECT nt FROM triples")]
+            db.close()
+            os.remove(manifest_path)
+            self.log("El manifiesto no corresponde a este mapeo o falta la salida: se hará una conversión completa.")
+        else:
+            self.log("No hay manifiesto previo: se hará una conversión completa.")
+        db = sqlite3.connect(manifest_path)
+        db.executescript(_SCHEMA)
+        db.execute("CREATE TEMP TABLE previous (nt TEXT PRIMARY KEY)")
+        db.executemany("INSERT OR IGNORE INTO previous VALUES (?)", ((nt,) for nt in previous))
+        if os.path.exists(out_path):
+            with open(out_path, encoding='utf-8', newline='\n') as f:
+                db.executemany("INSERT OR IGNORE INTO previous VALUES (?)", ((nt,) for nt in f if nt.strip()))
+        return db, True
+
+    def _rebuild_delta(self, db):
+        """
+        Delta de una conversión completa: los triples nuevos que no estaban en
+        la salida anterior y los de la salida anterior que ya no se producen.
+        """
+        additions = [nt for (nt,) in db.execute(
+            "SELECT nt FROM triples WHERE nt NOT IN (SELECT nt FROM previous) ORDER BY id")]
+        deletions = [nt for (nt,) in db.execute(
+            "SELECT nt FROM previous WHERE nt NOT IN (SELECT nt FROM triples)")]
+        return additions, deletions
+
+    def _convert_keys(self, csv_path, columns, keys):
+        """Convierte las filas cuyas claves están en `keys`. Devuelve {clave: conjunto de líneas N-Triples}."""
+        if not keys:
+            return {}
+        # Sin caché de entidades: cada fila debe conservar todos sus triples
+        engine = ConversionEngine(self.mapping_data, log=self.log, mode='rows', entity_cache_size=0,
+                                  row_warnings=self.row_warnings, **self.engine_options)
+        parts = []
+        for chunk in iter_csv_chunks(csv_path, columns=columns, chunksize=self.chunk_size):
+            chunk_keys, _ = _primary_keys(chunk, self.primary_key)
+            selected = pd.Series(chunk_keys).isin(keys).to_numpy()
+            if selected.any():
+                parts.append(chunk[selected])
+        df = pd.concat(parts)
+
+        self.log(f"Convirtiendo {len(df)} filas añadidas o modificadas...")
+        sink = _RowTriples()
+        engine.progress = lambda value, maximum: self.progress(value, len(df))
+        engine.run(df, sink)
+
+        triples = {}
+        df_keys, _ = _primary_keys(df, self.primary_key)
+        for pos, row_triples in sink.by_row.items():
+            triples.setdefault(df_keys[pos], set()).update(row_triples)
+        return triples
+
+    def _apply(self, db, retired_keys, new_triples, fingerprints):
+        """
+        Actualiza el manifiesto: retira los triples de `retired_keys` y registra
+        los de `new_triples`, contando cuántas claves producen cada triple.
+        Devuelve (triples añadidos, triples eliminados) del conjunto de datos.
+        """
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS retired (pk TEXT PRIMARY KEY)")
+        db.execute("DELETE FROM retired")
+        db.executemany("INSERT INTO retired VALUES (?)", ((key,) for key in retired_keys))
+
+        # Variación del número de referencias de cada triple afectado
+        delta = {}
+        for (nt,) in db.execute("SELECT t.nt FROM retired r JOIN row_triples rt ON rt.pk = r.pk "
+                                "JOIN triples t ON t.id = rt.triple_id"):
+            delta[nt] = delta.get(nt, 0) - 1
+        for row_triples in new_triples.values():
+            for nt in row_triples:
+                delta[nt] = delta.get(nt, 0) + 1
+
+        db.execute("DELETE FROM row_triples WHERE pk IN (SELECT pk FROM retired)")
+        db.execute("DELETE FROM rows WHERE pk IN (SELECT pk FROM retired)")
+
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS delta (nt TEXT PRIMARY KEY, d INTEGER)")
+        db.execute("DELETE FROM delta")
+        db.executemany("INSERT INTO delta VALUES (?, ?)", delta.items())
+        additions, deletions = [], []
+        for nt, d, refs in db.execute("SELECT d.nt, d.d, COALESCE(t.refs, 0) FROM delta d "
+                                      "LEFT JOIN triples t ON t.nt = d.nt").fetchall():
+            if refs == 0 and refs + d > 0:
+                additions.append(nt)
+            elif refs > 0 and refs + d == 0:
+                deletions.append(nt)
+        db.execute("INSERT OR IGNORE INTO triples (nt, refs) SELECT nt, 0 FROM delta")
+        db.execute("UPDATE triples SET refs = refs + (SELECT d FROM delta WHERE delta.nt = triples.nt) "
+                   "WHERE nt IN (SELECT nt FROM delta)")
+        db.execute("DELETE FROM triples WHERE refs = 0")
+
+        db.executemany("INSERT INTO rows VALUES (?, ?)",
+                       ((key, int(fingerprints[key])) for key in new_triples))
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS added (pk TEXT, nt TEXT)")
+        db.execute("DELETE FROM added")
+        db.executemany("INSERT INTO added VALUES (?, ?)",
+                       ((key, nt) for key, row_triples in new_triples.items() for nt in row_triples))
+        db.execute("INSERT INTO row_triples SELECT a.pk, t.id FROM added a JOIN triples t ON t.nt = a.nt")
+        return additions, deletions
+
+    def _write_dataset(self, db, out_path):
+        """Reescribe el conjunto de datos completo desde el manifiesto (sin convertir nada)."""
+        tmp_path = out_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n') as out:
+            out.writelines(nt for (nt,) in db.execute("SELECT nt FROM triples ORDER BY id"))
+        os.replace(tmp_path, out_path)
+
+    def _write_delta(self, delta_path, additions, deletions):
+        with open(delta_path, 'w', encoding='utf-8', newline='\n') as out:
+            if deletions:
+                out.write("DELETE DATA {\n")
+                out.writelines(deletions)
+                out.write("} ;\n")
+            if additions:
+                out.write("INSERT DATA {\n")
+                out.writelines(additions)
+                out.write("} ;\n")
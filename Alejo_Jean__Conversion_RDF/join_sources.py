@@ -0,0 +1,232 @@
+"""
+Orígenes de datos adicionales del mapeo y uniones (joins) por clave.
+
+Un mapeo puede declarar otros CSV en `sources` y tomar de ellos las
+propiedades de las entidades relacionadas:
+
+    sources:
+      autores:
+        path: autores.csv          # relativa al archivo de mapeo
+        key: Author ID             # columna clave del origen
+    properties:
+      Authors:
+        type: relation
+        separator: ;
+        target:
+          uri_template: person/{value}
+          class: foaf:Person
+          join:
+            source: autores
+            column: Author(s) ID   # 'self' o columna del CSV principal alineada con los valores
+          properties:
+          - predicate: schema:affiliation
+            type: literal
+            from: autores          # la columna se lee del origen unido
+            source: Affiliation
+
+Cada origen se lee una sola vez (sólo la clave y las columnas que usa el
+mapeo) y se indexa por su clave en un JoinIndex: un índice hash de pandas
+sobre las claves y un array por columna. El motor busca en bloque las claves
+de cada relación mientras recorre el CSV principal (`get_indexer`); nunca se
+construye la tabla unida.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from csv_ingest import TEXT_DTYPE
+
+# Claves admitidas en `target.join`
+JOIN_KEYS = ('source', 'column')
+# Último índice construido en este proceso para cada archivo: ruta -> (versión, JoinIndex)
+_INDEX_CACHE = {}
+
+
+def declared_sources(mapping_data):
+    return mapping_data.get('sources') or {}
+
+
+def resolve_source_paths(mapping_data, base_dir):
+    """Hace absolutas las rutas relativas de `sources`, tomándolas respecto a `base_dir` (el del mapeo)."""
+    for conf in declared_sources(mapping_data).values():
+        if isinstance(conf, dict) and conf.get('path') and not os.path.isabs(conf['path']):
+            conf['path'] = os.path.normpath(os.path.join(base_dir, conf['path']))
+    return mapping_data
+
+
+def iter_joins(mapping_data):
+    """(columna de la relación, configuración del join, sub-propiedades) de cada target con `join`."""
+    for col, prop_conf in (mapping_data.get('properties') or {}).items():
+        target_conf = (prop_conf or {}).get('target') or {}
+        join_conf = target_conf.get('join')
+        if join_conf:
+            yield col, join_conf, target_conf.get('properties', [])
+
+
+def joined_columns(mapping_data):
+    """{origen: columnas que el mapeo lee de él}, sin contar la clave."""
+    columns = {}
+    for _, join_conf, sub_props in iter_joins(mapping_data):
+        used = columns.setdefault(join_conf.get('source'), {})
+        for sub_prop in sub_props:
+            if sub_prop.get('from'):
+                used[sub_prop.get('source')] = None
+    return {name: list(used) for name, used in columns.items()}
+
+
+def join_mapping_errors(mapping_data):
+    """Errores de estructura de `sources` y de los `join` del mapeo (sin leer los archivos)."""
+    errors = []
+    sources = mapping_data.get('sources')
+    if sources is not None and not isinstance(sources, dict):
+        return ["El campo 'sources' debe ser un objeto"]
+    for name, conf in (sources or {}).items():
+        if not isinstance(conf, dict) or not conf.get('path') or not conf.get('key'):
+            errors.append(f"El origen '{name}' de 'sources' necesita 'path' y 'key'")
+    for col, prop_conf in (mapping_data.get('properties') or {}).items():
+        target_conf = (prop_conf or {}).get('target') or {}
+        join_conf = target_conf.get('join')
+        if join_conf is not None and (not isinstance(join_conf, dict) or join_conf.get('source') not in (sources or {})):
+            errors.append(f"El 'join' de '{col}' debe indicar en 'source' un origen declarado en 'sources'")
+            continue
+        for key in (join_conf or {}):
+            if isinstance(key, bool):
+                # YAML 1.1 lee `on:`, `yes:`, `off:`... sin comillas como booleanos
+                errors.append(f"El 'join' de '{col}' tiene una clave que YAML lee como el booleano {key} "
+                              "(p. ej. 'on'); indique la columna con 'column'")
+            elif key not in JOIN_KEYS:
+                errors.append(f"El 'join' de '{col}' tiene una clave desconocida '{key}'; "
+                              f"admite {', '.join(JOIN_KEYS)}")
+        if join_conf and not isinstance(join_conf.get('column', 'self'), str):
+            errors.append(f"La 'column' del 'join' de '{col}' debe ser 'self' o el nombre de una columna del CSV")
+        for sub_prop in target_conf.get('properties', []):
+            if sub_prop.get('from') and (not join_conf or sub_prop['from'] != join_conf.get('source')):
+                errors.append(f"La propiedad '{sub_prop.get('predicate')}' de '{col}' lee de '{sub_prop['from']}', "
+                              "que no es el origen del 'join' de su target")
+    return errors
+
+
+def source_fingerprints(mapping_data):
+    """(ruta, tamaño, fecha de modificación) de los orígenes declarados, para detectar si cambiaron."""
+    fingerprints = []
+    for name, conf in sorted(declared_sources(mapping_data).items()):
+        path = (conf or {}).get('path')
+        if path and os.path.exists(path):
+            stat = os.stat(path)
+            fingerprints.append([name, path, stat.st_size, stat.st_mtime_ns])
+    return fingerprints
+
+
+def _stripped_text(cells):
+    """Celdas sin espacios como array de objetos; las vacías quedan como None."""
+    text = cells.astype('string').str.strip()
+    arr = text.to_numpy(dtype=object, na_value=None)
+    arr[~(text != '').fillna(False).to_numpy(dtype=bool)] = None
+    return arr
+
+
+class JoinIndex:
+    """
+    Un origen de datos indexado por su clave. Las claves y los valores se
+    guardan sin espacios; con claves repetidas se usa la primera fila.
+    """
+
+    def __init__(self, name, frame, key):
+        self.name = name
+        self.key = key
+        keys = _stripped_text(frame[key])
+        # Filas con clave, y de ellas la primera de cada clave
+        rows = np.flatnonzero(pd.notna(keys))
+        rows = rows[~pd.Series(keys[rows]).duplicated().to_numpy()]
+        self.rows = int(len(frame))
+        self.duplicates = int(np.count_nonzero(pd.notna(keys))) - len(rows)
+        self.index = pd.Index(keys[rows], dtype=object)
+        self.columns = {column: _stripped_text(frame[column])[rows] for column in frame.columns if column != key}
+        self._positions = None
+        self.reset_counts()
+
+    @classmethod
+    def load(cls, name, conf, columns=()):
+        """Lee del CSV del origen la clave y `columns` (las que no existan se ignoran)."""
+        path, key = conf['path'], conf['key']
+        wanted = {key, *columns}
+        frame = pd.read_csv(path, dtype=TEXT_DTYPE, sep=conf.get('delimiter', ','),
+                            usecols=lambda col: col in wanted)
+        if key not in frame.columns:
+            raise ValueError(f"La columna clave '{key}' no existe en el origen '{name}' ({path}).")
+        return cls(name, frame, key)
+
+    def reset_counts(self):
+        self.found = 0
+        self.missing = 0
+
+    def lookup(self, keys):
+        """Posición de cada clave en el índice (-1 si no está), buscadas en bloque."""
+        keys = pd.Series(keys, dtype=object).str.strip()
+        positions = self.index.get_indexer(keys)
+        missing = int(np.count_nonzero(positions < 0))
+        self.found += len(positions) - missing
+        self.missing += missing
+        return positions
+
+    def position(self, key):
+        """Versión de `lookup` para una sola clave (motor fila a fila)."""
+        if self._positions is None:
+            self._positions = dict(zip(self.index, range(len(self.index))))
+        position = self._positions.get(key.strip() if isinstance(key, str) else key, -1)
+        if position < 0:
+            self.missing += 1
+        else:
+            self.found += 1
+        return position
+
+    def values(self, column, positions):
+        """Valores de `column` en `positions` (None si la posición es -1, la columna no existe o la celda está vacía)."""
+        source = self.columns.get(column)
+        result = np.full(len(positions), None, dtype=object)
+        if source is not None:
+            hit = positions >= 0
+            result[hit] = source[positions[hit]]
+        return result
+
+    def value(self, column, position):
+        source = self.columns.get(column)
+        return source[position] if source is not None and position >= 0 else None
+
+    def summary(self):
+        text = f"Unión con '{self.name}': {self.found} claves encontradas, {self.missing} sin fila en el origen"
+        if self.duplicates:
+            text += f" ({self.duplicates} claves repetidas en el origen: se usa la primera fila)"
+        return text + "."
+
+
+def load_join_indexes(mapping_data, log=None):
+    """
+    {origen: JoinIndex} de los orígenes que usan los `join` del mapeo. Un
+    índice se construye una vez por proceso mientras el archivo no cambie:
+    los motores nuevos del mismo proceso (otra conversión desde la interfaz,
+    una reconstrucción incremental) lo reutilizan. En la conversión en
+    paralelo cada worker crea su motor, y con él sus índices, una sola vez
+    al arrancar (ver parallel_conversion).
+    """
+    sources = declared_sources(mapping_data)
+    indexes = {}
+    for name, columns in joined_columns(mapping_data).items():
+        conf = sources.get(name)
+        if not isinstance(conf, dict) or not conf.get('path') or not conf.get('key'):
+            raise ValueError(f"El origen de datos '{name}' de un 'join' no está declarado en 'sources' "
+                             "con 'path' y 'key'.")
+        stat = os.stat(conf['path'])
+        cache_key = (conf['path'], conf['key'], conf.get('delimiter', ','), tuple(columns),
+                     stat.st_size, stat.st_mtime_ns)
+        cached = _INDEX_CACHE.get(conf['path'])
+        if cached is not None and cached[0] == cache_key:
+            index = cached[1]
+        else:
+            index = JoinIndex.load(name, conf, columns)
+            _INDEX_CACHE[conf['path']] = (cache_key, index)
+            if log:
+                log(f"Origen '{name}': {index.rows} filas indexadas por '{index.key}' ({conf['path']}).")
+        indexes[name] = index
+    return indexes
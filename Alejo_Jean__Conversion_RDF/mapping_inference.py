@@ -0,0 +1,275 @@
+"""
+Generación automática de un mapeo YAML a partir de una muestra del CSV.
+
+En lugar de cargar el archivo completo, se recorre por bloques y se guarda
+una muestra aleatoria de tamaño fijo (muestreo por reservorio: cada fila
+recibe una clave aleatoria y se conservan las de clave más baja). De la
+muestra se calculan, por columna, la proporción de vacíos, la de valores
+enteros, decimales y fechas ISO, y la frecuencia de los separadores de
+valores múltiples. Con esas estadísticas el mapeo sugerido añade los tipos
+`xsd:integer`, `xsd:decimal` y `xsd:date` y los separadores, además de las
+reglas por nombre de columna (autores, palabras clave, títulos, DOI...).
+"""
+import numpy as np
+import pandas as pd
+
+from csv_ingest import DEFAULT_CHUNK_SIZE, iter_csv_chunks, read_csv_header
+from uri_minting import sanitize_for_uri
+
+DEFAULT_SAMPLE_SIZE = 10000
+# Filas recorridas como máximo para tomar la muestra (None = todo el archivo)
+DEFAULT_SCAN_ROWS = 200000
+
+_INTEGER_RE = r'[+-]?\d+'
+_DECIMAL_RE = r'[+-]?(?:\d+\.\d*|\.\d+|\d+)'
+_DATE_RE = r'\d{4}-\d{2}-\d{2}'
+_YEAR_RE = r'\d{4}'
+
+# Separador -> (proporción mínima de celdas que lo contienen, media mínima de
+# valores en esas celdas). La coma es más exigente porque aparece en títulos,
+# nombres de organismos ("National Science Foundation, NSF") y textos libres.
+SEPARATOR_CANDIDATES = {';': (0.2, 2), '|': (0.2, 2), ',': (0.5, 3)}
+# Longitud media máxima de cada valor separado (evita partir resúmenes)
+MAX_TOKEN_LENGTH = 60
+
+DEFAULT_NAMESPACES = {
+    'ex': 'http://example.org/data/',
+    'schema': 'http://schema.org/',
+    'foaf': 'http://xmlns.com/foaf/0.1/',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'dcterms': 'http://purl.org/dc/terms/',
+    'bibo': 'http://purl.org/ontology/bibo/',
+    'xsd': 'http://www.w3.org/2001/XMLSchema#'
+}
+
+
+def sample_csv(path, sample_size=DEFAULT_SAMPLE_SIZE, scan_rows=DEFAULT_SCAN_ROWS, seed=0, chunksize=DEFAULT_CHUNK_SIZE):
+    """
+    Muestra aleatoria de hasta `sample_size` filas de las primeras
+    `scan_rows` del CSV, leído por bloques. Devuelve (muestra, filas leídas).
+    """
+    rng = np.random.default_rng(seed)
+    sample, keys = None, np.empty(0)
+    scanned = 0
+    for chunk in iter_csv_chunks(path, chunksize=chunksize):
+        if scan_rows is not None:
+            chunk = chunk.iloc[:scan_rows - scanned]
+        scanned += len(chunk)
+        chunk_keys = rng.random(len(chunk))
+        if len(keys) >= sample_size:
+            # Sólo pueden entrar filas con clave menor que la mayor de la muestra
+            wanted = chunk_keys < keys.max()
+            chunk, chunk_keys = chunk[wanted], chunk_keys[wanted]
+        sample = chunk if sample is None else pd.concat([sample, chunk], ignore_index=True)
+        keys = np.concatenate([keys, chunk_keys])
+        if len(keys) > sample_size:
+            keep = np.sort(np.argpartition(keys, sample_size)[:sample_size])
+            sample, keys = sample.iloc[keep].reset_index(drop=True), keys[keep]
+        if scan_rows is not None and scanned >= scan_rows:
+            break
+    if sample is None:
+        sample = pd.DataFrame(columns=read_csv_header(path))
+    return sample, scanned
+
+
+def column_stats(cells):
+    """Estadísticas de una columna de texto de la muestra."""
+    total = len(cells)
+    values = cells.dropna().astype(str).str.strip()
+    values = values[values != '']
+    stats = {'null_ratio': 1 - len(values) / total if total else 1.0, 'values': len(values)}
+    if values.empty:
+        stats.update(integer_ratio=0.0, decimal_ratio=0.0, date_ratio=0.0, year_ratio=0.0,
+                     unique_ratio=0.0, leading_zeros=False, separator=None, separator_ratio=0.0)
+        return stats
+
+    integers = values.str.fullmatch(_INTEGER_RE)
+    dates = values.str.fullmatch(_DATE_RE)
+    if dates.any():
+        # Descarta fechas con el formato correcto pero imposibles (2021-13-45)
+        dates &= pd.to_datetime(values.where(dates), format='%Y-%m-%d', errors='coerce').notna()
+    stats.update(
+        integer_ratio=integers.mean(),
+        decimal_ratio=values.str.fullmatch(_DECIMAL_RE).mean(),
+        date_ratio=dates.mean(),
+        year_ratio=values.str.fullmatch(_YEAR_RE).mean(),
+        unique_ratio=values.nunique() / len(values),
+        # '007' o '08001' son códigos, no cantidades
+        leading_zeros=bool(values[integers].str.lstrip('+-').str.match(r'0\d').any()),
+        separator=None,
+        separator_ratio=0.0,
+    )
+    for separator, (min_ratio, min_tokens) in SEPARATOR_CANDIDATES.items():
+        contains = values.str.contains(separator, regex=False)
+        ratio = contains.mean()
+        if ratio < min_ratio:
+            continue
+        tokens = values[contains].str.split(separator, regex=False).explode().str.strip()
+        if len(tokens) / contains.sum() >= min_tokens and tokens.str.len().mean() <= MAX_TOKEN_LENGTH:
+            stats.update(separator=separator, separator_ratio=ratio)
+            break
+    return stats
+
+
+def profile_csv(path, sample_size=DEFAULT_SAMPLE_SIZE, scan_rows=DEFAULT_SCAN_ROWS, seed=0, log=print):
+    """Estadísticas por columna de una muestra del CSV: {columna: estadísticas}."""
+    sample, scanned = sample_csv(path, sample_size=sample_size, scan_rows=scan_rows, seed=seed)
+    log(f"Muestra de {len(sample)} filas tomada de {scanned} filas leídas del CSV.")
+    return {col: column_stats(sample[col]) for col in sample.columns}
+
+
+def inferred_datatype(stats):
+    """Tipo xsd de una columna según su muestra, o None si no todos los valores lo cumplen."""
+    if not stats or not stats['values'] or stats['separator']:
+        return None
+    if stats['date_ratio'] == 1:
+        return 'xsd:date'
+    if stats['integer_ratio'] == 1:
+        return None if stats['leading_zeros'] else 'xsd:integer'
+    if stats['decimal_ratio'] == 1:
+        return 'xsd:decimal'
+    return None
+
+
+def detect_csv_context(cols, log=print):
+    """Detecta si el CSV es de naturaleza académica o general."""
+    cols_lower = {c.lower().replace(' ', '').replace('_', '') for c in cols}
+    academic_kws = {'doi', 'abstract', 'sourcetitle', 'publication', 'journal', 'volume', 'issue', 'citedby', 'authorkeywords', 'authorsid'}
+    academic_score = len(cols_lower.intersection(academic_kws))
+
+    if academic_score >= 3:
+        log("Contexto detectado: Académico (se usarán vocabularios DC, DCTERMS, FOAF).")
+        return 'academic'
+
+    log("Contexto detectado: General (se usará Schema.org y FOAF).")
+    return 'general'
+
+
+def _primary_key(cols, stats):
+    """Columna sugerida como clave primaria: por nombre o, si no, la primera sin vacíos ni repetidos en la muestra."""
+    pk_candidates = ['id', 'doi', 'title', 'name', 'identifier']
+    lower_cols = [col.lower() for col in cols]
+    pk_col_lower = next((c for c in pk_candidates if c in lower_cols), None)
+    if pk_col_lower is not None:
+        return next(c for c in cols if c.lower() == pk_col_lower)
+    if stats:
+        unique = next((c for c in cols if c in stats and stats[c]['values']
+                       and stats[c]['null_ratio'] == 0 and stats[c]['unique_ratio'] == 1), None)
+        if unique is not None:
+            return unique
+    return cols[0]
+
+
+def _apply_stats(col, prop, stats, log):
+    """Ajusta tipo y separador de la propiedad de `col` según las estadísticas de su muestra."""
+    if stats is None:
+        return
+    if stats['values'] == 0:
+        log(f"Columna '{col}': sin valores en la muestra.")
+        return
+    separator = stats['separator']
+    if prop['type'] == 'relation' or 'separator' in prop:
+        # Autores y palabras clave: se usa el separador observado si lo hay
+        if separator and prop.get('separator') != separator:
+            log(f"Columna '{col}': separador '{separator}' ({stats['separator_ratio']:.0%} de las celdas).")
+            prop['separator'] = separator
+        return
+    if prop['type'] != 'literal':
+        return
+
+    datatype = prop.get('datatype')
+    if datatype == 'xsd:gYear' and stats['year_ratio'] < 1:
+        log(f"Columna '{col}': no todos los valores son años; se omite xsd:gYear.")
+        del prop['datatype']
+    elif datatype == 'xsd:date' and stats['date_ratio'] < 1:
+        log(f"Columna '{col}': no todos los valores son fechas AAAA-MM-DD; se omite xsd:date.")
+        del prop['datatype']
+    elif datatype is None:
+        if separator:
+            prop['separator'] = separator
+            log(f"Columna '{col}': valores múltiples separados por '{separator}' ({stats['separator_ratio']:.0%} de las celdas).")
+        else:
+            datatype = inferred_datatype(stats)
+            if datatype:
+                prop['datatype'] = datatype
+                log(f"Columna '{col}': {datatype} ({stats['null_ratio']:.0%} vacíos).")
+
+
+def suggest_mapping(cols, stats=None, log=print):
+    """
+    Genera un mapeo inteligente basado en el contexto detectado del CSV y,
+    si se dan, en las estadísticas de su muestra (ver profile_csv).
+    """
+    log("Iniciando generación de mapeo inteligente...")
+    context = detect_csv_context(cols, log)
+
+    mapping = {
+        'base_uri': 'http://example.org/data/',
+        'namespaces': dict(DEFAULT_NAMESPACES),
+        'subject': {},
+        'properties': {}
+    }
+
+    mapping['subject']['class'] = 'bibo:AcademicArticle' if context == 'academic' else 'schema:Thing'
+
+    pk_col = _primary_key(cols, stats)
+    mapping['subject']['primary_key'] = pk_col
+    mapping['subject']['uri_template'] = f"resource/{sanitize_for_uri(pk_col)}/{{value}}"
+    log(f"Clave primaria sugerida: '{pk_col}'")
+
+    processed_cols = set()
+
+    for col in cols:
+        if col in processed_cols: continue
+        col_lower = col.lower()
+        prop = {}
+
+        if 'author' in col_lower and 'id' not in col_lower and 'keyword' not in col_lower:
+            prop = {
+                'predicate': 'dc:creator' if context == 'academic' else 'schema:author',
+                'type': 'relation', 'separator': ';',
+                'target': {
+                    'uri_template': 'person/{value}', 'class': 'foaf:Person',
+                    'properties': [{'predicate': 'foaf:name', 'type': 'literal', 'source': 'self'}]
+                }
+            }
+            id_col_candidate = next((c for c in cols if 'author' in c.lower() and 'id' in c.lower()), None)
+            if id_col_candidate:
+                prop['target']['properties'].append({'predicate': 'dc:identifier', 'type': 'literal', 'source': id_col_candidate})
+                log(f"Relación de persona encontrada: '{col}' -> '{id_col_candidate}' (usando FOAF)")
+                processed_cols.add(id_col_candidate)
+
+        elif col_lower in ['id', 'identifier']:
+            prop = {'predicate': 'dcterms:identifier' if context == 'academic' else 'schema:identifier', 'type': 'literal'}
+
+        elif context == 'academic':
+            if 'keyword' in col_lower or 'subject' in col_lower: prop = {'predicate': 'dcterms:subject', 'type': 'literal', 'separator': ';'}
+            elif 'year' in col_lower: prop = {'predicate': 'dcterms:issued', 'type': 'literal', 'datatype': 'xsd:gYear'}
+            elif 'date' in col_lower: prop = {'predicate': 'dcterms:issued', 'type': 'literal', 'datatype': 'xsd:date'}
+            elif 'title' in col_lower: prop = {'predicate': 'dc:title', 'type': 'literal'}
+            elif 'abstract' in col_lower: prop = {'predicate': 'dcterms:abstract', 'type': 'literal'}
+            elif 'doi' in col_lower: prop = {'predicate': 'bibo:doi', 'type': 'literal'}
+            elif 'link' in col_lower or 'url' in col_lower: prop = {'predicate': 'foaf:page', 'type': 'uri'}
+            else: prop = {'predicate': f'ex:{sanitize_for_uri(col)}', 'type': 'literal'}
+
+        else: # General context
+            if 'keyword' in col_lower or 'subject' in col_lower: prop = {'predicate': 'schema:keywords', 'type': 'literal', 'separator': ';'}
+            elif 'year' in col_lower: prop = {'predicate': 'schema:datePublished', 'type': 'literal', 'datatype': 'xsd:gYear'}
+            elif 'date' in col_lower: prop = {'predicate': 'schema:datePublished', 'type': 'literal', 'datatype': 'xsd:date'}
+            elif 'title' in col_lower or 'name' in col_lower: prop = {'predicate': 'schema:name', 'type': 'literal'}
+            elif 'description' in col_lower: prop = {'predicate': 'schema:description', 'type': 'literal'}
+            elif 'doi' in col_lower: prop = {'predicate': 'bibo:doi', 'type': 'literal'}
+            elif 'link' in col_lower or 'url' in col_lower: prop = {'predicate': 'schema:url', 'type': 'uri'}
+            else: prop = {'predicate': f'ex:{sanitize_for_uri(col)}', 'type': 'literal'}
+
+        if prop:
+            col_stats = (stats or {}).get(col)
+            if col == pk_col and col_stats:
+                # La clave primaria nunca se divide en varios valores
+                col_stats = dict(col_stats, separator=None)
+            _apply_stats(col, prop, col_stats, log)
+            mapping['properties'][col] = prop
+            processed_cols.add(col)
+
+    log("Generación de mapeo inteligente completada.")
+    return mapping
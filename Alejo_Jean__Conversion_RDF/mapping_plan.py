@@ -0,0 +1,188 @@
+"""
+Compilación del mapeo YAML a un plan inmutable.
+
+El motor de conversión resolvía prefijos, tipos de datos, clases destino y
+plantillas de URI en cada fila. El plan hace todo ese trabajo una sola vez,
+antes del bucle, y guarda además la posición de cada columna de origen en el
+CSV para acceder a los valores por índice. Los `join` de las entidades
+relacionadas se enlazan con el índice ya cargado de su origen (ver join_sources),
+y los `transform` se compilan a su secuencia de operaciones (ver value_transforms).
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+
+from rdflib import Namespace, URIRef
+
+from join_sources import JOIN_KEYS
+from value_transforms import check_datatype, compile_transform
+
+
+@dataclass(frozen=True)
+class SubPropertyPlan:
+    """Propiedad de una entidad relacionada (target.properties)."""
+    predicate: URIRef
+    predicate_name: str          # Forma abreviada original, usada en los mensajes
+    source: Optional[str]        # 'self', nombre de columna o None
+    source_index: Optional[int]  # Posición de la columna de origen (None si no existe en el CSV)
+    joined: bool = False         # `source` es una columna del origen unido (`from`), no del CSV
+    transform: Any = None        # value_transforms.ValueTransform
+    datatype: Optional[URIRef] = None  # Tipo de datos que produce `transform`
+
+
+@dataclass(frozen=True)
+class JoinPlan:
+    """`target.join`: la clave de cada valor se busca en el índice de otro origen."""
+    source: str                  # Nombre del origen en `sources`
+    column: str                  # 'self' o columna del CSV alineada con los valores de la relación
+    index: Any                   # join_sources.JoinIndex
+
+
+@dataclass(frozen=True)
+class PropertyPlan:
+    """Entrada compilada de `properties`."""
+    column: str
+    column_index: int
+    predicate: URIRef
+    type: str
+    separator: Optional[str]
+    datatype: Optional[URIRef] = None
+    target_class: Optional[URIRef] = None
+    target_uri: Optional[Callable[[str], URIRef]] = None
+    sub_properties: Tuple[SubPropertyPlan, ...] = ()
+    # Columnas de origen distintas de 'self' de las sub-propiedades (y la clave del join), en orden de aparición
+    sub_sources: Tuple[Tuple[str, Optional[int]], ...] = ()
+    join: Optional[JoinPlan] = None
+    transform: Any = None        # value_transforms.ValueTransform
+
+
+@dataclass(frozen=True)
+class MappingPlan:
+    """Mapeo completo listo para ejecutarse."""
+    namespaces: Tuple[Tuple[str, Namespace], ...]
+    primary_key: str
+    primary_key_index: Optional[int]
+    subject_class: URIRef
+    subject_uri: Callable[[str], URIRef]
+    properties: Tuple[PropertyPlan, ...]
+
+
+def make_uri_template(base_uri, template):
+    """Devuelve una función que construye la URI `base_uri + template` para un valor."""
+    # Se escapan las llaves de la URI base para que sólo se formatee la plantilla
+    full_template = str(base_uri).replace('{', '{{').replace('}', '}}') + template
+    def build(value):
+        return URIRef(full_template.format(value=value))
+    return build
+
+
+def resolve_prefix(value, ns_map, log=None):
+    """Resuelve 'prefijo:nombre' a una URIRef usando el mapa de namespaces."""
+    if not isinstance(value, str) or ':' not in value:
+        return URIRef(value)
+    prefix, name = value.split(':', 1)
+    namespace = ns_map.get(prefix)
+    if namespace:
+        return namespace[name]
+    else:
+        if log:
+            log(f"ADVERTENCIA: Prefijo '{prefix}' no encontrado en los namespaces. Usando URN.")
+        return URIRef(f"urn:prefix-not-found:{prefix}:{name}")
+
+
+def compile_mapping(mapping_data, columns, log=None, join_indexes=None):
+    """
+    Compila `mapping_data` contra las columnas del CSV.
+    Las propiedades cuya columna no existe en el CSV se descartan, igual que
+    hacía el motor fila a fila. `join_indexes` son los índices de los
+    orígenes unidos (ver join_sources.load_join_indexes).
+    """
+    ns_map = {k: Namespace(v) for k, v in mapping_data.get('namespaces', {}).items()}
+    base_uri = mapping_data['base_uri']
+    positions = {}
+    for i, col in enumerate(columns):
+        positions.setdefault(col, i)
+
+    subject_conf = mapping_data['subject']
+    pk_col = subject_conf['primary_key']
+
+    properties = []
+    for col, prop_conf in mapping_data.get('properties', {}).items():
+        if col not in positions: continue
+
+        prop_type = prop_conf.get('type', 'literal')
+        separator = prop_conf.get('separator')
+        plan_kwargs = {}
+        transform = compile_transform(prop_conf, col)
+
+        if prop_type == 'literal' and 'datatype' in prop_conf:
+            plan_kwargs['datatype'] = resolve_prefix(prop_conf['datatype'], ns_map, log)
+            try:
+                check_datatype(transform, plan_kwargs['datatype'])
+            except ValueError as e:
+                raise ValueError(f"Propiedad '{col}': {e}") from e
+        elif prop_type == 'literal' and transform is not None:
+            plan_kwargs['datatype'] = transform.datatype
+
+        elif prop_type == 'relation':
+            target_conf = prop_conf['target']
+            sub_properties = []
+            sub_sources = {}
+            join = None
+            if target_conf.get('join'):
+                join_conf = target_conf['join']
+                unknown = [key for key in join_conf if key not in JOIN_KEYS]
+                if unknown:
+                    # `on:` sin comillas llega como True (YAML 1.1): sin este error el join usaría el propio valor
+                    raise ValueError(f"El join de '{col}' tiene claves no admitidas {unknown}; "
+                                     f"admite {', '.join(JOIN_KEYS)} (la columna se indica con 'column').")
+                name = join_conf['source']
+                if name not in (join_indexes or {}):
+                    raise ValueError(f"El origen de datos '{name}' del join de '{col}' no está cargado.")
+                join = JoinPlan(source=name, column=join_conf.get('column', 'self'), index=join_indexes[name])
+                if join.column != 'self':
+                    sub_sources.setdefault(join.column, positions.get(join.column))
+            for sub_prop in target_conf.get('properties', []):
+                source = sub_prop.get('source')
+                joined = bool(sub_prop.get('from'))
+                if joined and (join is None or sub_prop['from'] != join.source):
+                    raise ValueError(f"La propiedad '{sub_prop['predicate']}' de '{col}' lee del origen "
+                                     f"'{sub_prop['from']}', que no es el del join de su target.")
+                source_index = None if joined else positions.get(source)
+                if source and source != 'self' and not joined:
+                    sub_sources.setdefault(source, source_index)
+                sub_transform = compile_transform(sub_prop, f"{col} -> {sub_prop['predicate']}")
+                sub_properties.append(SubPropertyPlan(
+                    predicate=resolve_prefix(sub_prop['predicate'], ns_map, log),
+                    predicate_name=sub_prop['predicate'],
+                    source=source,
+                    source_index=source_index,
+                    joined=joined,
+                    transform=sub_transform,
+                    datatype=sub_transform.datatype if sub_transform is not None else None,
+                ))
+            plan_kwargs.update(
+                target_class=resolve_prefix(target_conf['class'], ns_map, log),
+                target_uri=make_uri_template(base_uri, target_conf['uri_template']),
+                sub_properties=tuple(sub_properties),
+                sub_sources=tuple(sub_sources.items()),
+                join=join,
+            )
+
+        properties.append(PropertyPlan(
+            column=col,
+            column_index=positions[col],
+            predicate=resolve_prefix(prop_conf['predicate'], ns_map, log),
+            type=prop_type,
+            separator=separator,
+            transform=transform,
+            **plan_kwargs
+        ))
+
+    return MappingPlan(
+        namespaces=tuple(ns_map.items()),
+        primary_key=pk_col,
+        primary_key_index=positions.get(pk_col),
+        subject_class=resolve_prefix(subject_conf['class'], ns_map, log),
+        subject_uri=make_uri_template(base_uri, subject_conf['uri_template']),
+        properties=tuple(properties),
+    )
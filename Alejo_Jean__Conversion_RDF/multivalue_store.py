@@ -0,0 +1,101 @@
+"""
+Columnas multivaluadas divididas una sola vez por bloque.
+
+Varias propiedades del mapeo leen la misma columna multivaluada: en
+`map_scopus.yaml`, 'Author(s) ID' es columna de origen de 'Authors' y de
+'Author full names'. MultiValueStore divide cada (columna, separador) una
+única vez por bloque y guarda el resultado como una lista de Arrow: un
+array plano con los elementos ya sin espacios y los offsets donde empieza
+cada fila. Las propiedades que comparten la columna reutilizan esos arrays,
+y buscar el elemento i de una fila es indexar `values[starts[fila] + i]`.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Texto de una celda vacía cuando se usa como columna de origen (igual que str(nan) en el motor fila a fila)
+MISSING_TEXT = 'nan'
+
+
+def _arrow_text(cells):
+    """Celdas de una Serie como array de texto de Arrow; las vacías quedan como nulos."""
+    if not isinstance(cells.dtype, pd.StringDtype):
+        cells = cells.astype(str).where(cells.notna(), None)
+    arr = pa.array(cells, type=pa.string(), from_pandas=True)
+    return arr.combine_chunks() if isinstance(arr, pa.ChunkedArray) else arr
+
+
+class TokenizedColumn:
+    """
+    Las celdas de una columna divididas por `separator`, una entrada por
+    fila del bloque: `values[starts[k]:starts[k] + lengths[k]]` son los
+    elementos (sin espacios, incluidos los vacíos) de la fila k. Las celdas
+    vacías tienen longitud 0 y se marcan en `null`.
+    """
+
+    def __init__(self, cells, separator):
+        lists = pc.split_pattern(_arrow_text(cells), pattern=separator)
+        offsets = lists.offsets.to_numpy()
+        self.null = lists.is_null().to_numpy(zero_copy_only=False)
+        self.starts = offsets[:-1].astype(np.int64)
+        self.lengths = np.where(self.null, 0, np.diff(offsets)).astype(np.int64)
+        # Los offsets son absolutos respecto a `lists.values`, también si el array es un corte de otro
+        self.values = pc.utf8_trim_whitespace(lists.values).to_numpy(zero_copy_only=False)
+        self._nonempty = None
+
+    def nonempty(self):
+        """(fila, elemento) de los elementos no vacíos, en orden de fila y posición."""
+        if self._nonempty is None:
+            rows = np.repeat(np.arange(len(self.starts)), self.lengths)
+            flat = (np.arange(rows.size) - np.repeat(np.cumsum(self.lengths) - self.lengths, self.lengths)
+                    + self.starts[rows])
+            tokens = self.values[flat]
+            keep = tokens != ''
+            self._nonempty = (rows[keep], tokens[keep])
+        return self._nonempty
+
+    def item_counts(self, rows):
+        """Elementos de cada fila como columna de origen: una celda vacía cuenta como 'nan'."""
+        return np.where(self.null[rows], 1, self.lengths[rows])
+
+    def aligned(self, rows, positions):
+        """
+        Elemento en la posición `positions[i]` de la fila `rows[i]`, como
+        columna de origen de una relación; None si la fila no tiene tantos.
+        """
+        result = np.full(len(rows), None, dtype=object)
+        present = positions < self.lengths[rows]
+        result[present] = self.values[self.starts[rows[present]] + positions[present]]
+        missing_cell = self.null[rows] & (positions == 0)
+        result[missing_cell] = MISSING_TEXT
+        return result
+
+
+class MultiValueStore:
+    """
+    Columnas de un bloque divididas bajo demanda y memorizadas por
+    (columna, separador). Las filas se identifican por su etiqueta en
+    `frame` (la posición en el bloque que usa el motor columnar).
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.labels = frame.index.to_numpy()
+        self.columns = {}
+
+    def column(self, column_index, separator):
+        key = (column_index, separator)
+        column = self.columns.get(key)
+        if column is None:
+            column = self.columns[key] = TokenizedColumn(self.frame.iloc[:, column_index], separator)
+        return column
+
+    def rows_of(self, labels):
+        """Etiquetas de fila -> filas internas de las columnas divididas."""
+        return np.searchsorted(self.labels, labels)
+
+    def values(self, column_index, separator):
+        """Elementos no vacíos de la columna como Serie indexada por la etiqueta de su fila."""
+        rows, tokens = self.column(column_index, separator).nonempty()
+        return pd.Series(tokens, index=self.labels[rows], dtype=object)
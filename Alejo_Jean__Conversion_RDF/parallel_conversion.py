@@ -0,0 +1,135 @@
+"""
+Conversión en paralelo con varios procesos.
+
+El CSV se lee por bloques en el proceso principal y cada bloque (shard) se
+convierte en un proceso del pool, que escribe su propio archivo N-Triples
+con las líneas ya ordenadas y sin repetir. Cada proceso usa un único motor
+para todos sus bloques, de modo que la caché de entidades y el índice de
+claves de URI se comparten entre ellos. Al final los shards se fusionan con
+la fusión externa de bulk_export (heapq.merge de archivos ordenados), que
+descarta los triples repetidos entre shards sin guardarlos en memoria: el
+resultado es el mismo conjunto de triples que una conversión en serie,
+ordenado como bytes.
+"""
+import itertools
+import os
+import shutil
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from bulk_export import ExternalSorter
+from conversion_engine import ConversionEngine
+from csv_ingest import DEFAULT_CHUNK_SIZE, iter_csv_chunks, mapping_columns
+from entity_cache import DEFAULT_MAX_ENTITIES
+from rdf_writers import NTriplesWriter, nt_line
+
+# Líneas que se escriben de una vez al fusionar los shards
+_MERGE_BATCH_LINES = 100000
+
+# Motor de cada proceso del pool, creado una sola vez por proceso, y sus logs del bloque actual
+_worker_engine = None
+_worker_logs = []
+
+
+def _init_worker(mapping_data, engine_options):
+    global _worker_engine
+    _worker_engine = ConversionEngine(mapping_data, log=_worker_logs.append, **engine_options)
+
+
+class SortedShardWriter(NTriplesWriter):
+    """Escritor N-Triples de un shard: las líneas del bloque se escriben ordenadas como bytes y sin repetir."""
+
+    def flush(self):
+        lines = sorted({nt_line(triple).encode('utf-8') for triple in self.pending})
+        self.stream.writelines(lines)
+        self.count += len(lines)
+        self.pending = {}
+        self.stream.flush()
+
+
+def _convert_shard(shard_path, chunk):
+    """Convierte un bloque del CSV en el archivo N-Triples `shard_path` con el motor del proceso."""
+    del _worker_logs[:]
+    writer = SortedShardWriter(open(shard_path, 'wb'))
+    try:
+        _worker_engine.run_chunks([chunk], writer, keep_state=True)
+    finally:
+        writer.close()
+    # Sólo se devuelven las advertencias; los mensajes de inicio/fin de cada shard sobran
+    warnings = [message for message in _worker_logs if message.startswith('ADVERTENCIA')]
+    return shard_path, len(chunk), len(writer), warnings
+
+
+def merge_shards(shard_paths, out_path, temp_dir=None):
+    """
+    Fusiona los shards (ordenados y sin líneas repetidas, ver SortedShardWriter)
+    en `out_path` descartando las líneas repetidas entre ellos. Devuelve el
+    número de triples escritos.
+    """
+    sorter = ExternalSorter(temp_dir or os.path.dirname(os.path.abspath(out_path)))
+    for shard_path in shard_paths:
+        sorter.add_run(shard_path)
+    count = 0
+    try:
+        lines = sorter.merged()
+        with open(out_path, 'wb') as out:
+            for batch in iter(lambda: list(itertools.islice(lines, _MERGE_BATCH_LINES)), []):
+                out.writelines(batch)
+                count += len(batch)
+    finally:
+        sorter.close()
+    return count
+
+
+def convert_parallel(csv_path, mapping_data, out_path, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                     mode='columnar', entity_cache_size=DEFAULT_MAX_ENTITIES, uri_collisions='report',
+                     row_warnings=True, log=None, progress=None):
+    """
+    Convierte `csv_path` a N-Triples en `out_path` usando `workers` procesos
+    (por defecto, todos los núcleos). Devuelve el número de triples escritos.
+    """
+    log = log or (lambda message: None)
+    progress = progress or (lambda value, maximum: None)
+    workers = workers or os.cpu_count() or 1
+
+    log(f"--- INICIANDO CONVERSIÓN EN PARALELO ({workers} procesos, bloques de {chunk_size} filas) ---")
+    shard_dir = tempfile.mkdtemp(prefix='shards_', dir=os.path.dirname(os.path.abspath(out_path)))
+    try:
+        chunks = iter_csv_chunks(csv_path, columns=mapping_columns(mapping_data), chunksize=chunk_size)
+        engine_options = {'mode': mode, 'entity_cache_size': entity_cache_size,
+                          'uri_collisions': uri_collisions, 'row_warnings': row_warnings}
+        shard_paths = []
+        rows_done = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(mapping_data, engine_options)) as pool:
+            pending = set()
+            for shard_id, chunk in enumerate(chunks):
+                shard_path = os.path.join(shard_dir, f"shard_{shard_id:06d}.nt")
+                shard_paths.append(shard_path)
+                pending.add(pool.submit(_convert_shard, shard_path, chunk))
+                # Se limita el número de bloques en vuelo para acotar la memoria
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    rows_done += _collect(done, log)
+                    progress(rows_done, None)
+            rows_done += _collect(pending, log)
+            progress(rows_done, None)
+
+        log(f"Fusionando {len(shard_paths)} shards en {out_path}...")
+        count = merge_shards(shard_paths, out_path, temp_dir=shard_dir)
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+
+    log(f"\n--- CONVERSIÓN COMPLETADA EXITOSAMENTE ---\nFilas procesadas: {rows_done}\nTotal de triples RDF generados: {count}")
+    return count
+
+
+def _collect(futures, log):
+    """Recoge los shards terminados, reenvía sus advertencias y devuelve las filas procesadas."""
+    rows = 0
+    for future in futures:
+        _, shard_rows, _, warnings = future.result()
+        for message in warnings:
+            log(message)
+        rows += shard_rows
+    return rows
@@ -0,0 +1,313 @@
+"""
+Validación previa (pre-flight) de un CSV contra su mapeo.
+
+Antes de convertir se recorre el CSV por bloques, leyendo sólo las columnas
+del mapeo, y cada columna mapeada se comprueba con operaciones vectorizadas
+de pandas, sin crear términos RDF:
+
+- columnas del mapeo que no existen en el CSV (sin la de clave primaria no
+  se genera ningún sujeto),
+- claves primarias vacías, y claves que tras normalizarlas para la URI
+  repiten el sujeto de otra fila (sus triples se fundirían en un recurso),
+- valores de columnas `type: uri` que no pueden ser URIs,
+- literales que no encajan con su `datatype` (xsd:gYear, xsd:integer...),
+- relaciones con menos valores en una columna de origen que en la principal,
+- orígenes de los `join` que no se pueden cargar y claves sin fila en ellos.
+
+Las columnas con `transform` se comprueban tras aplicarla, como las ve el
+motor, y se cuentan los valores que la transformación descarta.
+
+El resultado es un único informe con el número de casos y algunas filas de
+ejemplo por problema y columna. Con él, el motor puede omitir las
+advertencias fila a fila (ConversionEngine(row_warnings=False)).
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from rdflib import XSD
+
+from conversion_engine import valid_uri_mask
+from csv_ingest import DEFAULT_CHUNK_SIZE, iter_csv_chunks, mapping_columns
+from join_sources import load_join_indexes
+from mapping_plan import compile_mapping
+from multivalue_store import MultiValueStore
+
+PREFLIGHT_SUFFIX = '.preflight.json'
+DEFAULT_SAMPLES = 5
+PROPERTY_TYPES = ('literal', 'uri', 'relation')
+
+# Forma léxica válida de los tipos de datos XSD más habituales en los mapeos
+_TZ = r'(?:Z|[+-][0-9]{2}:[0-9]{2})?'
+_DECIMAL = r'[+-]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)'
+DATATYPE_PATTERNS = {
+    XSD.gYear: r'-?[0-9]{4,}' + _TZ,
+    XSD.date: r'-?[0-9]{4,}-[0-9]{2}-[0-9]{2}' + _TZ,
+    XSD.dateTime: r'-?[0-9]{4,}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}(?:\.[0-9]+)?' + _TZ,
+    XSD.integer: r'[+-]?[0-9]+',
+    XSD.int: r'[+-]?[0-9]+',
+    XSD.long: r'[+-]?[0-9]+',
+    XSD.nonNegativeInteger: r'\+?[0-9]+',
+    XSD.decimal: _DECIMAL,
+    XSD.double: _DECIMAL + r'(?:[eE][+-]?[0-9]+)?|[+-]?INF|NaN',
+    XSD.float: _DECIMAL + r'(?:[eE][+-]?[0-9]+)?|[+-]?INF|NaN',
+    XSD.boolean: r'true|false|1|0',
+}
+
+# Tipo de problema -> texto del informe
+ISSUE_MESSAGES = {
+    'empty_key': "{count} filas con clave primaria vacía en '{column}' (se omitirán)",
+    'duplicate_key': "{count} filas repiten el sujeto de una fila anterior (clave primaria '{column}' "
+                     "duplicada o igual tras normalizarla); sus triples se fundirán en un mismo recurso",
+    'invalid_uri': "{count} valores de '{column}' no son URIs válidas (se omitirán)",
+    'invalid_datatype': "{count} valores de '{column}' no son {detail} válidos",
+    'count_mismatch': "{count} valores de '{column}' sin valor correspondiente en '{detail}'",
+    'join_missing': "{count} valores de '{column}' sin fila en el origen '{detail}' (sin sus propiedades)",
+    'transform_dropped': "{count} valores de '{column}' que su 'transform' descarta (vacíos o no convertibles)",
+}
+
+
+def preflight_path_for(out_path):
+    return os.path.splitext(out_path)[0] + PREFLIGHT_SUFFIX
+
+
+def _datatype_name(datatype):
+    return 'xsd:' + str(datatype)[len(str(XSD)):]
+
+
+def _normalized_keys(pk_str):
+    """Claves de URI sin truncar, como uri_minting._normalize (con `re` de Python, no RE2 de Arrow)."""
+    keys = pk_str.astype(object).str.lower()
+    keys = keys.str.replace(r'\s+', '_', regex=True)
+    return keys.str.replace(r'[^\w\-\._~]', '', regex=True)
+
+
+class PreflightReport:
+    """Resultado de la validación previa: errores del mapeo y casos por problema y columna."""
+
+    def __init__(self, max_samples=DEFAULT_SAMPLES):
+        self.max_samples = max_samples
+        self.errors = []        # Impiden convertir
+        self.warnings = []      # Del mapeo frente a la cabecera del CSV
+        self.issues = {}        # (tipo, columna, detalle) -> [casos, filas de ejemplo]
+        self.rows = 0
+
+    def add(self, kind, column, rows, detail=None):
+        """Registra los casos de un problema; `rows` tiene un número de fila (desde 1) por caso."""
+        if len(rows) == 0:
+            return
+        entry = self.issues.setdefault((kind, column, detail), [0, []])
+        entry[0] += len(rows)
+        room = self.max_samples - len(entry[1])
+        if room > 0:
+            entry[1].extend(int(row) for row in pd.unique(np.asarray(rows))[:room])
+
+    @property
+    def issue_count(self):
+        return sum(count for count, _ in self.issues.values())
+
+    def lines(self):
+        lines = list(self.errors) + list(self.warnings)
+        for (kind, column, detail), (count, samples) in self.issues.items():
+            more = "..." if count > len(samples) else ""
+            lines.append("ADVERTENCIA: " + ISSUE_MESSAGES[kind].format(count=count, column=column, detail=detail)
+                         + f". Filas: {', '.join(map(str, samples))}{more}")
+        return lines
+
+    def summary(self):
+        lines = [f"--- VALIDACIÓN PREVIA: {self.rows} filas ---"]
+        lines.extend(self.lines() or ["Sin problemas en el mapeo ni en los datos."])
+        lines.append(f"--- {len(self.errors)} errores, {len(self.warnings)} avisos del mapeo, "
+                     f"{self.issue_count} casos en los datos ---")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'issues': [{'kind': kind, 'column': column, 'detail': detail, 'count': count, 'sample_rows': samples}
+                       for (kind, column, detail), (count, samples) in self.issues.items()],
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+class PreflightValidator:
+    """Valida un CSV bloque a bloque contra un mapeo y acumula un PreflightReport."""
+
+    def __init__(self, mapping_data, max_samples=DEFAULT_SAMPLES):
+        self.mapping_data = mapping_data
+        self.report = PreflightReport(max_samples)
+        self.plan = None
+        # Huella de la clave normalizada y número de fila de cada sujeto, para buscar duplicados al final
+        self.key_hashes = []
+        self.key_rows = []
+
+    def check_mapping(self, columns):
+        """Compara el mapeo con las columnas del CSV y lo compila."""
+        report = self.report
+        present = set(columns)
+        pk = (self.mapping_data.get('subject') or {}).get('primary_key')
+        if pk not in present:
+            report.errors.append(f"ERROR: La columna de clave primaria '{pk}' no existe en el CSV: "
+                                 "no se generaría ningún sujeto.")
+        for col, prop_conf in (self.mapping_data.get('properties') or {}).items():
+            prop_type = prop_conf.get('type', 'literal')
+            if col not in present:
+                report.warnings.append(f"ADVERTENCIA: La columna '{col}' del mapeo no existe en el CSV; "
+                                       "la propiedad se omitirá.")
+            elif prop_type not in PROPERTY_TYPES:
+                report.warnings.append(f"ADVERTENCIA: La propiedad '{col}' tiene un tipo desconocido "
+                                       f"('{prop_type}'); no generará triples.")
+            target_conf = prop_conf.get('target') or {}
+            join_column = (target_conf.get('join') or {}).get('column', 'self')
+            if join_column != 'self' and join_column not in present:
+                report.warnings.append(f"ADVERTENCIA: La columna '{join_column}' del join de '{col}' no existe en el CSV; "
+                                       "no se encontrará ninguna fila del origen.")
+            for sub_prop in target_conf.get('properties', []):
+                source = sub_prop.get('source')
+                if source and source != 'self' and not sub_prop.get('from') and source not in present:
+                    report.warnings.append(f"ADVERTENCIA: La columna de origen '{source}' de '{col}' no existe "
+                                           f"en el CSV; '{sub_prop.get('predicate')}' quedará vacía.")
+        try:
+            join_indexes = load_join_indexes(self.mapping_data)
+        except Exception as e:
+            report.errors.append(f"ERROR: No se pudo cargar un origen de datos del mapeo: {e}")
+            return
+        for col, prop_conf in (self.mapping_data.get('properties') or {}).items():
+            target_conf = prop_conf.get('target') or {}
+            for sub_prop in target_conf.get('properties', []):
+                index = join_indexes.get(sub_prop.get('from'))
+                if index is not None and sub_prop.get('source') not in index.columns:
+                    report.warnings.append(f"ADVERTENCIA: La columna '{sub_prop.get('source')}' no existe en el origen "
+                                           f"'{index.name}'; '{sub_prop.get('predicate')}' de '{col}' quedará vacía.")
+        try:
+            # Los prefijos desconocidos se informan al compilar
+            self.plan = compile_mapping(self.mapping_data, columns, log=report.warnings.append,
+                                        join_indexes=join_indexes)
+        except ValueError as e:
+            report.errors.append(f"ERROR: {e}")
+        except Exception as e:
+            report.errors.append(f"ERROR: El mapeo no se puede compilar: falta o sobra {e!r}.")
+
+    def check_chunk(self, chunk):
+        """Valida un bloque del CSV; su índice numera las filas de datos desde 0, como en el motor."""
+        if self.plan is None and not self.report.errors:
+            self.check_mapping(list(chunk.columns))
+        self.report.rows += len(chunk)
+        if self.plan is None:
+            return
+        plan = self.plan
+        row_numbers = chunk.index.to_numpy() + 1
+        df = chunk.set_axis(pd.RangeIndex(len(chunk)), axis=0)
+
+        if plan.primary_key_index is None:
+            return
+        pk_raw = df.iloc[:, plan.primary_key_index]
+        pk_str = pk_raw.astype(str)
+        valid = pk_raw.notna().to_numpy() & (pk_str.str.strip() != '').to_numpy(dtype=bool)
+        self.report.add('empty_key', plan.primary_key, row_numbers[~valid])
+        keys = _normalized_keys(pk_str[valid])
+        self.key_hashes.append(pd.util.hash_pandas_object(keys, index=False).to_numpy())
+        self.key_rows.append(row_numbers[valid])
+
+        # Como en el motor, cada columna multivaluada se divide una sola vez para todas las comprobaciones
+        store = MultiValueStore(df[valid].reset_index(drop=True))
+        valid_rows = row_numbers[valid]
+        for prop in plan.properties:
+            if not (prop.type == 'uri' or prop.type == 'relation' and (prop.separator or prop.join)
+                    or prop.type == 'literal' and prop.datatype in DATATYPE_PATTERNS or prop.transform is not None):
+                # Los literales sin tipo de datos comprobable ni transformaciones no tienen nada que validar
+                continue
+            if prop.separator:
+                values = store.values(prop.column_index, prop.separator)
+            else:
+                cells = store.frame.iloc[:, prop.column_index]
+                values = cells[cells.notna()].astype(str)
+            if prop.transform is not None and not values.empty:
+                # Se comprueba lo que recibe el motor: los valores ya transformados
+                values, dropped = prop.transform.split(values)
+                self.report.add('transform_dropped', prop.column, valid_rows[dropped.index.to_numpy()])
+            if values.empty:
+                continue
+            value_rows = valid_rows[values.index.to_numpy()]
+            if prop.type == 'uri':
+                self.report.add('invalid_uri', prop.column, value_rows[~valid_uri_mask(values)])
+            elif prop.type == 'literal' and prop.datatype in DATATYPE_PATTERNS:
+                matches = values.str.fullmatch(DATATYPE_PATTERNS[prop.datatype]).to_numpy(dtype=bool)
+                self.report.add('invalid_datatype', prop.column, value_rows[~matches],
+                                detail=_datatype_name(prop.datatype))
+            else:
+                if prop.separator:
+                    self._check_relation_counts(prop, store, values, valid_rows)
+                if prop.join:
+                    self._check_join(prop, store, values, valid_rows)
+
+    def _check_relation_counts(self, prop, store, values, valid_rows):
+        """
+        Cada valor de la relación toma sus sub-propiedades del elemento en la
+        misma posición de las columnas de origen; faltan tantos como valores
+        (no vacíos) haya de más respecto a los elementos de la columna de origen.
+        """
+        counts = values.groupby(level=0, sort=False).size()
+        positions = counts.index.to_numpy()
+        for source_col, source_index in prop.sub_sources:
+            if source_index is None:
+                # Ya avisado al comparar el mapeo con la cabecera
+                continue
+            items = store.column(source_index, prop.separator).item_counts(store.rows_of(positions))
+            missing = np.maximum(counts.to_numpy() - items, 0)
+            self.report.add('count_mismatch', prop.column, np.repeat(valid_rows[positions], missing),
+                            detail=source_col)
+
+    def _check_join(self, prop, store, values, valid_rows):
+        """Valores de la relación cuya clave (el valor o su elemento en la columna `column`) no está en el origen."""
+        join = prop.join
+        value_rows = values.index.to_numpy()
+        if join.column == 'self':
+            keys = values.to_numpy(dtype=object)
+        else:
+            column_index = dict(prop.sub_sources).get(join.column)
+            if column_index is None:
+                # Ya avisado al comparar el mapeo con la cabecera
+                return
+            value_pos = values.groupby(level=0, sort=False).cumcount().to_numpy()
+            if prop.separator:
+                keys = store.column(column_index, prop.separator).aligned(store.rows_of(value_rows), value_pos)
+            else:
+                keys = store.frame.iloc[:, column_index].loc[value_rows].to_numpy(dtype=object, na_value=None)
+        missing = join.index.lookup(keys) < 0
+        self.report.add('join_missing', prop.column, valid_rows[value_rows[missing]], detail=join.source)
+
+    def finish(self):
+        """Busca los sujetos repetidos entre todos los bloques y devuelve el informe."""
+        if self.key_hashes:
+            hashes = np.concatenate(self.key_hashes)
+            rows = np.concatenate(self.key_rows)
+            duplicated = pd.Series(hashes).duplicated(keep='first').to_numpy()
+            self.report.add('duplicate_key', self.plan.primary_key, rows[duplicated])
+            self.key_hashes, self.key_rows = [], []
+        return self.report
+
+
+def validate_chunks(chunks, mapping_data, max_samples=DEFAULT_SAMPLES, should_stop=None):
+    """
+    Valida un iterable de bloques del CSV (ver iter_csv_chunks) y devuelve el
+    PreflightReport, o None si `should_stop()` pide detenerse entre bloques.
+    """
+    validator = PreflightValidator(mapping_data, max_samples)
+    for chunk in chunks:
+        if should_stop is not None and should_stop():
+            return None
+        validator.check_chunk(chunk)
+    return validator.finish()
+
+
+def validate_csv(csv_path, mapping_data, chunksize=DEFAULT_CHUNK_SIZE, max_samples=DEFAULT_SAMPLES, should_stop=None):
+    """Valida `csv_path` contra `mapping_data` leyendo sólo las columnas del mapeo."""
+    chunks = iter_csv_chunks(csv_path, columns=mapping_columns(mapping_data), chunksize=chunksize)
+    return validate_chunks(chunks, mapping_data, max_samples, should_stop)
@@ -0,0 +1,130 @@
+"""
+Escritores RDF en streaming.
+
+Sustituyen al Graph en memoria cuando la salida es demasiado grande: el motor
+les entrega los triples con `add()` igual que a un Graph, pero sólo se guardan
+los del bloque (chunk) en curso y `flush()` los escribe directamente en el
+archivo. La memoria queda acotada por el tamaño del bloque, no por el número
+de filas.
+"""
+import re
+
+from rdflib import RDF, URIRef
+
+# Formatos que pueden escribirse en streaming
+STREAM_FORMATS = ('nt', 'turtle')
+
+# Subconjunto conservador de PN_LOCAL de Turtle: no puede terminar en '.'
+_LOCAL_NAME_RE = re.compile(r'[^\W\d]\w*(?:[\w.\-]*[\w\-])?')
+
+
+def nt_line(triple):
+    """Línea N-Triples (con salto de línea) de un triple de términos rdflib."""
+    s, p, o = triple
+    return f"{s.n3()} {p.n3()} {o.n3()} .\n"
+
+
+class NTriplesWriter:
+    """Escribe N-Triples línea a línea. Los duplicados dentro de un bloque se descartan."""
+
+    def __init__(self, stream, append=False):
+        self.stream = stream
+        self.pending = {}
+        self.count = 0
+
+    def bind(self, prefix, namespace):
+        # N-Triples no usa prefijos
+        pass
+
+    def add(self, triple):
+        self.pending[triple] = None
+
+    def flush(self):
+        """Escribe los triples del bloque actual y vacía el buffer."""
+        self.stream.writelines(map(nt_line, self.pending))
+        self.count += len(self.pending)
+        self.pending = {}
+        self.stream.flush()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.stream.close()
+
+    def __len__(self):
+        return self.count + len(self.pending)
+
+
+class TurtleWriter(NTriplesWriter):
+    """
+    Escribe Turtle agrupando los triples de cada sujeto dentro del bloque.
+    Si el CSV viene ordenado por la clave primaria, todos los triples de un
+    recurso quedan en un único bloque `sujeto p1 o1 ; p2 o2 .`. Un sujeto que
+    reaparece en otro bloque (p. ej. un autor) genera un nuevo bloque, lo que
+    sigue siendo Turtle válido.
+    """
+
+    def __init__(self, stream, append=False):
+        super().__init__(stream)
+        self.prefixes = {}
+        # Al continuar un archivo ya empezado (ver checkpoints) la cabecera de prefijos ya está escrita
+        self._header_written = append
+        self._namespaces = None
+
+    def bind(self, prefix, namespace):
+        self.prefixes[prefix] = str(namespace)
+
+    def _write_header(self):
+        for prefix, namespace in self.prefixes.items():
+            self.stream.write(f"@prefix {prefix}: <{namespace}> .\n")
+        self.stream.write("\n")
+        self._header_written = True
+
+    def _term(self, term):
+        """Abrevia una URI con los prefijos declarados cuando el nombre local es válido en Turtle."""
+        if isinstance(term, URIRef):
+            if term == RDF.type:
+                return 'a'
+            for namespace, prefix in self._namespaces:
+                if term.startswith(namespace):
+                    local = term[len(namespace):]
+                    if _LOCAL_NAME_RE.fullmatch(local):
+                        return f"{prefix}:{local}"
+                    break
+        return term.n3()
+
+    def flush(self):
+        if not self._header_written:
+            self._write_header()
+        if self._namespaces is None:
+            # Los espacios de nombres más largos primero, para elegir el prefijo más específico
+            self._namespaces = sorted(((ns, prefix) for prefix, ns in self.prefixes.items()), key=lambda x: -len(x[0]))
+        term = self._term
+        write = self.stream.write
+        by_subject = {}
+        for s, p, o in self.pending:
+            by_subject.setdefault(s, []).append((p, o))
+        for subject, pairs in by_subject.items():
+            body = " ;\n    ".join(f"{term(p)} {term(o)}" for p, o in pairs)
+            write(f"{term(subject)} {body} .\n\n")
+        self.count += len(self.pending)
+        self.pending = {}
+        self.stream.flush()
+
+
+def open_stream_writer(path, rdf_format, resume_offset=None):
+    """
+    Abre `path` y devuelve el escritor en streaming para `rdf_format`. Con
+    `resume_offset` el archivo no se vacía: se recorta a ese byte y se sigue
+    escribiendo a continuación (ver checkpoints).
+    """
+    if rdf_format not in STREAM_FORMATS:
+        raise ValueError(f"El formato '{rdf_format}' no admite escritura en streaming. Use uno de {STREAM_FORMATS}.")
+    writer_class = NTriplesWriter if rdf_format == 'nt' else TurtleWriter
+    if resume_offset is None:
+        return writer_class(open(path, 'w', encoding='utf-8', newline='\n'))
+    stream = open(path, 'r+', encoding='utf-8', newline='\n')
+    stream.seek(resume_offset)
+    stream.truncate()
+    return writer_class(stream, append=True)
@@ -0,0 +1,309 @@
+"""
+Endpoint SPARQL local sobre la salida del conversor.
+
+Carga una sola vez el RDF generado (Turtle, N-Triples, RDF/XML o un almacén
+SQLite de `--store`) en un Graph de rdflib, cuyos índices en memoria se
+reutilizan en todas las consultas, y responde por HTTP con el protocolo
+SPARQL: GET `/sparql?query=...&format=json` o POST con la consulta en el
+cuerpo. SELECT y ASK devuelven el formato de resultados JSON que espera la
+aplicación OpenGaming (`js/app.js`); CONSTRUCT y DESCRIBE, Turtle.
+
+Los resultados ya serializados se guardan en una caché LRU cuya clave es la
+consulta normalizada (sin comentarios y con los espacios colapsados fuera de
+literales e IRIs), de modo que las consultas repetidas de `buildSparqlQuery`
+se responden en milisegundos. Si el archivo de datos cambia (p. ej. tras una
+nueva conversión) se recarga en la siguiente consulta y la caché se vacía;
+POST `/reload` fuerza la recarga. GET `/status` informa del conjunto de
+datos y de la caché.
+
+Uso:
+    python -m sparql_server rdf_scopus_generado.ttl --port 8890
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from rdflib import Graph
+
+from conversion_engine import rdf_format_for_path
+from sqlite_store import SQLiteTripleStore
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8890
+DEFAULT_CACHE_SIZE = 256
+# Como mucho se comprueba una vez por segundo si el archivo de datos cambió
+RELOAD_CHECK_SECONDS = 1.0
+
+# Formatos de resultado de SELECT/ASK: parámetro `format` o cabecera Accept -> (formato de rdflib, tipo MIME)
+RESULT_FORMATS = {
+    'json': ('json', 'application/sparql-results+json'),
+    'xml': ('xml', 'application/sparql-results+xml'),
+    'csv': ('csv', 'text/csv'),
+    'tsv': ('tsv', 'text/tab-separated-values'),
+}
+_ACCEPT_FORMATS = {mime: name for name, (_, mime) in RESULT_FORMATS.items()}
+_ACCEPT_FORMATS['application/json'] = 'json'
+
+# Literales (largos y cortos) e IRIs se conservan tal cual; cada tramo de comentarios y espacios queda en un espacio
+_QUERY_TOKENS = re.compile(r'("""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\''
+                           r'|<[^<>"{}|^`\\\s]*>)|(?:\s|#[^\n]*)+')
+
+
+def normalize_query(query):
+    """Forma canónica de la consulta para la clave de la caché."""
+    return _QUERY_TOKENS.sub(lambda match: match.group(1) or ' ', query).strip()
+
+
+def load_graph(path):
+    """Lee la salida del conversor en un Graph; el formato se deduce de la extensión."""
+    graph = Graph()
+    if path.endswith('.sqlite'):
+        store = SQLiteTripleStore(path)
+        try:
+            for prefix, uri in store.namespaces(): graph.bind(prefix, uri)
+            for triple in store: graph.add(triple)
+        finally:
+            store.close()
+    else:
+        graph.parse(path, format=rdf_format_for_path(path))
+    return graph
+
+
+class QueryCache:
+    """Caché LRU de respuestas ya serializadas; cada entrada recuerda la generación del conjunto de datos."""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class SparqlService:
+    """Conjunto de datos cargado, su caché de consultas y la recarga cuando cambia el archivo."""
+
+    def __init__(self, path, cache_size=DEFAULT_CACHE_SIZE, log=None):
+        self.path = path
+        self.log = log or (lambda message: None)
+        self.cache = QueryCache(cache_size)
+        self.reload_lock = threading.Lock()
+        self.graph = None
+        self.generation = 0
+        self.loaded_mtime = None
+        self.loaded_at = None
+        self.last_check = 0.0
+        self.reload()
+
+    def reload(self):
+        """Vuelve a leer el archivo de datos y vacía la caché."""
+        with self.reload_lock:
+            started = time.perf_counter()
+            mtime = os.stat(self.path).st_mtime_ns
+            graph = load_graph(self.path)
+            # Primero se publica el grafo nuevo y después se vacía la caché: una consulta en
+            # curso sobre el grafo anterior no puede guardar su resultado con la generación nueva
+            self.graph, self.generation = graph, self.generation + 1
+            self.loaded_mtime, self.loaded_at = mtime, time.time()
+            self.cache.clear()
+            self.log(f"Conjunto de datos cargado: {self.path} ({len(graph)} triples en "
+                     f"{time.perf_counter() - started:.2f} s).")
+
+    def _check_reload(self):
+        now = time.monotonic()
+        if now - self.last_check < RELOAD_CHECK_SECONDS:
+            return
+        self.last_check = now
+        try:
+            changed = os.stat(self.path).st_mtime_ns != self.loaded_mtime
+        except OSError:
+            # Mientras se reescribe el archivo puede no existir; se sigue con los datos cargados
+            return
+        if changed:
+            self.log(f"{self.path} ha cambiado: recargando.")
+            self.reload()
+
+    def query(self, text, result_format='json'):
+        """Ejecuta una consulta. Devuelve (tipo MIME, cuerpo en bytes, True si vino de la caché)."""
+        self._check_reload()
+        key = (normalize_query(text), result_format)
+        entry = self.cache.get(key)
+        if entry is not None and entry[0] == self.generation:
+            return entry[1], entry[2], True
+
+        graph, generation = self.graph, self.generation
+        result = graph.query(text)
+        if result.type in ('CONSTRUCT', 'DESCRIBE'):
+            content_type, body = 'text/turtle', result.serialize(format='turtle')
+        else:
+            rdflib_format, content_type = RESULT_FORMATS[result_format]
+            body = result.serialize(format=rdflib_format)
+        if generation == self.generation:
+            self.cache.put(key, (generation, content_type, body))
+        return content_type, body, False
+
+    def status(self):
+        return {'dataset': os.path.abspath(self.path), 'triples': len(self.graph),
+                'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded_at)),
+                'generation': self.generation, 'cache_entries': len(self.cache.entries),
+                'cache_hits': self.cache.hits, 'cache_misses': self.cache.misses}
+
+
+class SparqlRequestHandler(BaseHTTPRequestHandler):
+    """Protocolo SPARQL por HTTP sobre `server.service`, con CORS para que la aplicación web lo use desde el navegador."""
+
+    server_version = 'ConversorRDF-SPARQL/1.0'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            self.server.service.log(f"{self.address_string()} {format % args}")
+
+    def _send(self, status, content_type, body, cache=None):
+        self.send_response(status)
+        self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if cache is not None:
+            self.send_header('X-Cache', 'hit' if cache else 'miss')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status, message):
+        self._send(status, 'text/plain', message.encode('utf-8'))
+
+    def _result_format(self, params):
+        requested = params.get('format', [None])[0]
+        if requested is None:
+            accept = self.headers.get('Accept', '')
+            requested = next((_ACCEPT_FORMATS[mime.split(';')[0].strip()] for mime in accept.split(',')
+                              if mime.split(';')[0].strip() in _ACCEPT_FORMATS), 'json')
+        return requested if requested in RESULT_FORMATS else None
+
+    def _answer(self, query, params):
+        if not query:
+            self._send_text(400, "Falta el parámetro 'query'.")
+            return
+        result_format = self._result_format(params)
+        if result_format is None:
+            self._send_text(406, f"Formato no soportado. Use uno de: {', '.join(RESULT_FORMATS)}.")
+            return
+        try:
+            content_type, body, hit = self.server.service.query(query, result_format)
+        except Exception as e:
+            self._send_text(400, f"Consulta SPARQL no válida: {e}")
+            return
+        self._send(200, content_type, body, cache=hit)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Accept')
+        self.end_headers()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == '/sparql':
+            self._answer(params.get('query', [''])[0], params)
+        elif url.path == '/status':
+            self._send(200, 'application/json', json.dumps(self.server.service.status()).encode('utf-8'))
+        else:
+            self._send_text(404, "Rutas disponibles: /sparql, /status y /reload (POST).")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == '/reload':
+            try:
+                self.server.service.reload()
+            except Exception as e:
+                self._send_text(500, f"No se pudo recargar el conjunto de datos: {e}")
+                return
+            self._send(200, 'application/json', json.dumps(self.server.service.status()).encode('utf-8'))
+            return
+        if url.path != '/sparql':
+            self._send_text(404, "Rutas disponibles: /sparql, /status y /reload (POST).")
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('utf-8')
+        content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+        if content_type == 'application/sparql-query':
+            query = body
+        else:
+            # application/x-www-form-urlencoded
+            params.update(parse_qs(body))
+            query = params.get('query', [''])[0]
+        self._answer(query, params)
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, quiet=False):
+    server = ThreadingHTTPServer((host, port), SparqlRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    return server
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='sparql_server', description="Endpoint SPARQL local sobre la salida del conversor.")
+    parser.add_argument('data', help="Archivo RDF generado (.ttl, .nt, .rdf) o almacén SQLite (.sqlite).")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"Dirección de escucha (por defecto {DEFAULT_HOST}).")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Puerto (por defecto {DEFAULT_PORT}).")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f"Consultas distintas recordadas en la caché (por defecto {DEFAULT_CACHE_SIZE}; 0 = sin caché).")
+    parser.add_argument('--quiet', action='store_true', help="No mostrar cada petición.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    def log(message):
+        print(message, file=sys.stderr, flush=True)
+    try:
+        service = SparqlService(args.data, cache_size=args.cache_size, log=log)
+    except Exception as e:
+        log(f"ERROR: No se pudo cargar {args.data}: {e}")
+        return 2
+    server = make_server(service, args.host, args.port, quiet=args.quiet)
+    log(f"Endpoint SPARQL en http://{args.host}:{args.port}/sparql")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Almacén de triples en disco (SQLite) para grafos que no caben en memoria.
+
+Se usa en lugar del Graph de rdflib: el motor le entrega los triples con
+`add()` y el almacén los escribe en transacciones por lotes. Cada término se
+guarda una sola vez en un diccionario (`terms`, en notación N3) y los triples
+como tres identificadores enteros con índices SPO, POS y OSP. Como el
+archivo persiste, una conversión larga no se pierde al cerrar la aplicación
+y se pueden acumular varios CSV en el mismo conjunto de datos.
+
+`serialize()` escribe N-Triples o Turtle en streaming desde la base de datos;
+RDF/XML necesita cargar el grafo en memoria.
+"""
+import sqlite3
+
+from rdflib import Graph
+from rdflib.util import from_n3
+
+from rdf_writers import STREAM_FORMATS, TurtleWriter
+
+DEFAULT_BATCH_SIZE = 50000
+
+_SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, n3 TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS triples (s INTEGER NOT NULL, p INTEGER NOT NULL, o INTEGER NOT NULL,
+                                    PRIMARY KEY (s, p, o)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS triples_pos ON triples (p, o, s);
+CREATE INDEX IF NOT EXISTS triples_osp ON triples (o, s, p);
+CREATE TABLE IF NOT EXISTS namespaces (prefix TEXT PRIMARY KEY, uri TEXT NOT NULL);
+CREATE TEMP TABLE IF NOT EXISTS staging (s TEXT, p TEXT, o TEXT);
+"""
+
+
+class SQLiteTripleStore:
+    """Conjunto de triples persistente en un archivo SQLite, con la interfaz de Graph que usa el motor."""
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        # Puede usarse desde un hilo distinto del que lo abrió, nunca desde dos a la vez
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+        self.pending = []
+
+    def bind(self, prefix, namespace):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO namespaces VALUES (?, ?)", (prefix, str(namespace)))
+
+    def namespaces(self):
+        return self.db.execute("SELECT prefix, uri FROM namespaces ORDER BY prefix").fetchall()
+
+    def add(self, triple):
+        s, p, o = triple
+        # n3() valida el término: una URI inválida falla aquí y no al serializar
+        self.pending.append((s.n3(), p.n3(), o.n3()))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Escribe los triples pendientes en una sola transacción."""
+        if not self.pending:
+            return
+        with self.db:
+            self.db.executemany("INSERT INTO staging VALUES (?, ?, ?)", self.pending)
+            self.db.execute("INSERT OR IGNORE INTO terms (n3) "
+                            "SELECT s FROM staging UNION SELECT p FROM staging UNION SELECT o FROM staging")
+            self.db.execute("INSERT OR IGNORE INTO triples "
+                            "SELECT ts.id, tp.id, tobj.id FROM staging "
+                            "JOIN terms ts ON ts.n3 = staging.s "
+                            "JOIN terms tp ON tp.n3 = staging.p "
+                            "JOIN terms tobj ON tobj.n3 = staging.o")
+            self.db.execute("DELETE FROM staging")
+        self.pending = []
+
+    def triples(self, pattern):
+        """Itera los triples que encajan con (s, p, o); None actúa como comodín."""
+        self.flush()
+        conditions, params = [], []
+        for column, term in zip(('s', 'p', 'o'), pattern):
+            if term is not None:
+                conditions.append(f"t.{column} = (SELECT id FROM terms WHERE n3 = ?)")
+                params.append(term.n3())
+        # Sin filtros se recorre en orden SPO, que agrupa los triples de cada sujeto
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else "ORDER BY t.s, t.p, t.o"
+        query = (f"SELECT ts.n3, tp.n3, tobj.n3 FROM triples t JOIN terms ts ON ts.id = t.s "
+                 f"JOIN terms tp ON tp.id = t.p JOIN terms tobj ON tobj.id = t.o {where}")
+        for s, p, o in self.db.execute(query, params):
+            yield from_n3(s), from_n3(p), from_n3(o)
+
+    def __iter__(self):
+        return self.triples((None, None, None))
+
+    def __len__(self):
+        self.flush()
+        return self.db.execute("SELECT COUNT(*) FROM triples").fetchone()[0]
+
+    def nt_lines(self):
+        """Líneas N-Triples del almacén; los términos ya están en N3, no se reconstruyen objetos rdflib."""
+        self.flush()
+        return (line for (line,) in self.db.execute(
+            "SELECT ts.n3 || ' ' || tp.n3 || ' ' || tobj.n3 || ' .\n' FROM triples t "
+            "JOIN terms ts ON ts.id = t.s JOIN terms tp ON tp.id = t.p JOIN terms tobj ON tobj.id = t.o"))
+
+    def serialize(self, destination, format='turtle', encoding='utf-8'):
+        """Escribe el contenido del almacén en `destination` (misma firma que Graph.serialize)."""
+        self.flush()
+        if format not in STREAM_FORMATS:
+            graph = Graph()
+            for prefix, uri in self.namespaces(): graph.bind(prefix, uri)
+            for triple in self: graph.add(triple)
+            graph.serialize(destination=destination, format=format, encoding=encoding)
+            return
+
+        if format == 'nt':
+            with open(destination, 'w', encoding=encoding, newline='\n') as out:
+                out.writelines(self.nt_lines())
+            return
+
+        writer = TurtleWriter(open(destination, 'w', encoding=encoding, newline='\n'))
+        try:
+            for prefix, uri in self.namespaces(): writer.bind(prefix, uri)
+            for count, triple in enumerate(self, start=1):
+                writer.add(triple)
+                if count % self.batch_size == 0:
+                    writer.flush()
+        finally:
+            writer.close()
+
+    def close(self):
+        self.flush()
+        self.db.close()
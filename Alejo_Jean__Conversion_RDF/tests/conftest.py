@@ -0,0 +1,24 @@
+"""Configuración común de las pruebas: los módulos del conversor se importan desde la carpeta del proyecto."""
+import os
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+
+def project_path(name):
+    return os.path.join(PROJECT_DIR, name)
+
+
+@pytest.fixture
+def synthetic_csv(tmp_path):
+    """Escribe un CSV sintético (ver benchmark_data) y devuelve su ruta."""
+    from benchmark_data import make_generator, write_csv
+
+    def build(dataset='scopus', rows=400, seed=0):
+        path = tmp_path / f'{dataset}_{rows}_{seed}.csv'
+        write_csv(make_generator(dataset, seed=seed), rows, str(path))
+        return str(path)
+    return build
@@ -0,0 +1,25 @@
+"""Suite de rendimiento: tasas medidas con el tiempo de la conversión y casos sin línea base."""
+import json
+
+import benchmark_suite
+from benchmark_suite import case_key, compare, run_case
+from conversion_metrics import metrics_path_for
+
+
+def test_rates_use_conversion_time(tmp_path, monkeypatch):
+    def fake_run(command, **kwargs):
+        out_path = command[command.index('--out') + 1]
+        with open(metrics_path_for(out_path), 'w', encoding='utf-8') as f:
+            json.dump({'elapsed_s': 2.0, 'triples': 500, 'peak_rss_mb': 100.0}, f)
+    monkeypatch.setattr(benchmark_suite.subprocess, 'run', fake_run)
+    result = run_case('datos.csv', 'scopus', 100, 'columnar', 'memory', str(tmp_path))
+    assert result['elapsed_s'] == 2.0 and result['wall_s'] < 2.0
+    assert result['rows_per_s'] == 50.0 and result['triples_per_s'] == 250.0
+
+
+def test_case_without_baseline_fails():
+    result = {'dataset': 'scopus', 'rows': 1000000, 'engine': 'columnar', 'mode': 'memory',
+              'rows_per_s': 1000.0, 'triples': 10, 'peak_rss_mb': 100.0}
+    (regression,) = compare([result], {}, 0.25)
+    assert case_key(result) in regression and 'sin línea base' in regression
+    assert compare([result], {case_key(result): dict(result)}, 0.25) == []
@@ -0,0 +1,57 @@
+"""Proceso de conversión de la interfaz: reanudar una conversión detenida en memoria."""
+import conversion_worker
+from conftest import project_path
+from conversion_engine import load_mapping_file
+from csv_ingest import iter_frame_chunks
+
+
+class Conn:
+    def __init__(self):
+        self.events = []
+
+    def send(self, event):
+        self.events.append(event)
+
+
+class StopAfter:
+    """Evento de parada que se activa a la `calls`-ésima consulta del motor (a mitad de un bloque)."""
+
+    def __init__(self, calls=None):
+        self.calls = calls
+
+    def clear(self):
+        pass
+
+    def is_set(self):
+        if self.calls is None:
+            return False
+        self.calls -= 1
+        return self.calls < 0
+
+
+def statistics(session):
+    state = session.engine.statistics.state()
+    return {**state, 'subjects': state['subjects'].count(), 'objects': state['objects'].count()}
+
+
+def test_void_counts_after_stop_and_resume(synthetic_csv, monkeypatch):
+    path = synthetic_csv('scopus', rows=120)
+    mapping_data = load_mapping_file(project_path('map_scopus.yaml'))
+    monkeypatch.setattr(conversion_worker, 'iter_frame_chunks',
+                        lambda df, skip_rows=0: iter_frame_chunks(df, chunksize=50, skip_rows=skip_rows))
+
+    reference = conversion_worker._WorkerSession(Conn(), StopAfter())
+    reference.convert(path, mapping_data)
+
+    # El motor consulta la parada antes de cada propiedad: se detiene dentro del segundo bloque,
+    # con sus sujetos y algunas propiedades ya contados
+    properties = len(mapping_data['properties'])
+    session = conversion_worker._WorkerSession(Conn(), StopAfter(properties + 3))
+    session.convert(path, mapping_data)
+    assert session.resume_row == 50
+    session.stop_event.calls = None
+    session.convert(path, mapping_data, resume=True)
+
+    assert session.resume_row is None
+    assert len(session.sink) == len(reference.sink)
+    assert statistics(session) == statistics(reference)
@@ -0,0 +1,31 @@
+"""Lectura del CSV: la conversión en memoria conserva los tipos que infiere pandas, como el conversor original."""
+import pandas as pd
+from rdflib import Graph
+
+from conftest import project_path
+from conversion_cli import main
+from conversion_engine import ConversionEngine, load_mapping_file
+
+
+def test_memory_mode_matches_original_output(tmp_path):
+    out = tmp_path / 'salida.nt'
+    assert main(['convert', '--csv', project_path('scopus.csv'), '--mapping', project_path('map_scopus.yaml'),
+                 '--out', str(out), '--no-void', '--quiet']) == 0
+    expected = set(Graph().parse(project_path('rdf_scopus_generado.ttl')))
+    assert set(Graph().parse(str(out))) == expected
+
+
+def test_memory_mode_keeps_inferred_dtypes(synthetic_csv, tmp_path):
+    """Con celdas vacías, una columna numérica se escribe como decimal ("1.0"), igual que con pd.read_csv."""
+    path = synthetic_csv('scopus', rows=500)
+    mapping_data = load_mapping_file(project_path('map_scopus.yaml'))
+    graph = Graph()
+    ConversionEngine(mapping_data).run(pd.read_csv(path), graph)
+
+    out = tmp_path / 'salida.nt'
+    assert main(['convert', '--csv', path, '--mapping', project_path('map_scopus.yaml'),
+                 '--out', str(out), '--no-void', '--quiet']) == 0
+    converted = set(Graph().parse(str(out)))
+    assert converted == set(graph)
+    issues = {str(o) for _, p, o in converted if str(p) == 'http://example.org/data/issue'}
+    assert issues and all(issue.endswith('.0') for issue in issues)
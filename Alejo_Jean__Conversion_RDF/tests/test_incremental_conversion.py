@@ -0,0 +1,51 @@
+"""Conversión incremental: tras cambiar el mapeo, el delta lleva el triplestore a la salida nueva."""
+import copy
+import os
+
+from conftest import project_path
+from conversion_engine import load_mapping_file
+from incremental_conversion import IncrementalConverter, manifest_path_for
+
+
+def nt_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return set(f)
+
+
+def apply_delta(dataset, delta_path):
+    """Aplica los bloques DELETE DATA / INSERT DATA del delta a un conjunto de líneas N-Triples."""
+    dataset, block = set(dataset), None
+    with open(delta_path, encoding='utf-8') as f:
+        for line in f:
+            if line in ('DELETE DATA {\n', 'INSERT DATA {\n'):
+                block = line.split()[0]
+            elif line == '} ;\n':
+                block = None
+            elif block == 'DELETE':
+                dataset.discard(line)
+            elif block == 'INSERT':
+                dataset.add(line)
+    return dataset
+
+
+def test_rebuild_after_mapping_change_deletes_previous_output(synthetic_csv, tmp_path):
+    path = synthetic_csv('scopus', rows=50)
+    out = str(tmp_path / 'salida.nt')
+    mapping_data = load_mapping_file(project_path('map_scopus.yaml'))
+    IncrementalConverter(mapping_data).run(path, out)
+    published = nt_lines(out)
+
+    changed = copy.deepcopy(mapping_data)
+    prop_conf = next(conf for conf in changed['properties'].values() if conf['type'] == 'literal')
+    prop_conf['predicate'] = 'dcterms:alternative'
+    added, deleted = IncrementalConverter(changed).run(path, out)
+
+    assert deleted > 0 and added > 0
+    assert apply_delta(published, str(tmp_path / 'salida.delta.ru')) == nt_lines(out)
+
+    # Sin la salida anterior, el delta se calcula desde el manifiesto
+    IncrementalConverter(mapping_data).run(path, out)
+    os.remove(out)
+    assert os.path.exists(manifest_path_for(out))
+    IncrementalConverter(changed).run(path, out)
+    assert apply_delta(published, str(tmp_path / 'salida.delta.ru')) == nt_lines(out)
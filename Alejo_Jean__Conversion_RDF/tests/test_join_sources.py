@@ -0,0 +1,71 @@
+"""Joins con otro origen: la clave se toma de una columna del CSV principal alineada con la relación."""
+import pandas as pd
+import pytest
+import yaml
+from rdflib import Literal, URIRef
+
+from conversion_engine import ENGINE_MODES, ConversionEngine
+from csv_ingest import mapping_columns
+from join_sources import join_mapping_errors
+from triple_buffer import TripleBuffer
+
+MAPPING = """
+base_uri: http://example.org/
+namespaces:
+  ex: http://example.org/ns#
+subject:
+  class: ex:Article
+  primary_key: EID
+  uri_template: article/{{value}}
+sources:
+  autores:
+    path: {path}
+    key: Author ID
+properties:
+  Authors:
+    predicate: ex:creator
+    type: relation
+    separator: ;
+    target:
+      uri_template: person/{{value}}
+      class: ex:Person
+      join:
+        source: autores
+        {join_key}: Author(s) ID
+      properties:
+      - predicate: ex:affiliation
+        type: literal
+        from: autores
+        source: Affiliation
+"""
+
+
+def load(tmp_path, join_key='column'):
+    source = tmp_path / 'autores.csv'
+    pd.DataFrame({'Author ID': ['101', '102'], 'Affiliation': ['Univ. A', 'Univ. B']}).to_csv(source, index=False)
+    return yaml.safe_load(MAPPING.format(path=source, join_key=join_key))
+
+
+@pytest.mark.parametrize('mode', ENGINE_MODES)
+def test_join_on_csv_column_adds_joined_properties(tmp_path, mode):
+    mapping_data = load(tmp_path)
+    assert join_mapping_errors(mapping_data) == []
+    assert 'Author(s) ID' in mapping_columns(mapping_data)
+    df = pd.DataFrame({'EID': ['e1', 'e2'], 'Authors': ['Ana; Luis', 'Luis'], 'Author(s) ID': ['101; 102', '102']})
+    graph = TripleBuffer()
+    assert ConversionEngine(mapping_data, mode=mode).run(df, graph)
+
+    affiliation = URIRef('http://example.org/ns#affiliation')
+    joined = {(s, o) for s, p, o in graph if p == affiliation}
+    assert joined == {(URIRef('http://example.org/person/ana'), Literal('Univ. A')),
+                      (URIRef('http://example.org/person/luis'), Literal('Univ. B'))}
+
+
+def test_unquoted_on_key_is_rejected(tmp_path):
+    # PyYAML (YAML 1.1) lee `on:` como True: el join caería en silencio en 'self'
+    mapping_data = load(tmp_path, join_key='on')
+    assert True in mapping_data['properties']['Authors']['target']['join']
+    assert any("'column'" in error for error in join_mapping_errors(mapping_data))
+    with pytest.raises(ValueError, match='column'):
+        ConversionEngine(mapping_data).run(pd.DataFrame({'EID': ['e1'], 'Authors': ['Ana'], 'Author(s) ID': ['101']}),
+                                           TripleBuffer())
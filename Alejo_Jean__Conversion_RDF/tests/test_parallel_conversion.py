@@ -0,0 +1,56 @@
+"""Conversión en paralelo: mismo conjunto de triples que en serie, ordenado y sin repetidos."""
+import pandas as pd
+
+import parallel_conversion
+from conftest import project_path
+from conversion_engine import ConversionEngine, load_mapping_file
+from csv_ingest import iter_csv_chunks, mapping_columns
+from parallel_conversion import _convert_shard, _init_worker, convert_parallel, merge_shards
+from rdf_writers import NTriplesWriter
+
+
+def serial_lines(path, mapping_data, tmp_path):
+    out = tmp_path / 'serie.nt'
+    writer = NTriplesWriter(open(out, 'w', encoding='utf-8', newline='\n'))
+    ConversionEngine(mapping_data).run_chunks(iter_csv_chunks(path, columns=mapping_columns(mapping_data)), writer)
+    writer.close()
+    return set(out.read_bytes().splitlines(keepends=True))
+
+
+def test_parallel_matches_serial(synthetic_csv, tmp_path):
+    path = synthetic_csv('scopus', rows=300)
+    mapping_data = load_mapping_file(project_path('map_scopus.yaml'))
+    out = tmp_path / 'paralelo.nt'
+    # Bloques de 4 filas: más shards que MERGE_FAN_IN, la fusión necesita varias pasadas
+    count = convert_parallel(path, mapping_data, str(out), workers=2, chunk_size=4)
+    lines = out.read_bytes().splitlines(keepends=True)
+    assert lines == sorted(set(lines))
+    assert count == len(lines)
+    assert set(lines) == serial_lines(path, mapping_data, tmp_path)
+
+
+def test_merge_shards_removes_duplicates_across_shards(tmp_path):
+    shards = []
+    for i, content in enumerate([b'<a> <p> "1" .\n<b> <p> "2" .\n', b'<a> <p> "1" .\n<c> <p> "3" .\n']):
+        shards.append(tmp_path / f'shard_{i}.nt')
+        shards[-1].write_bytes(content)
+    out = tmp_path / 'salida.nt'
+    assert merge_shards([str(path) for path in shards], str(out), temp_dir=str(tmp_path)) == 3
+    assert out.read_bytes() == b'<a> <p> "1" .\n<b> <p> "2" .\n<c> <p> "3" .\n'
+
+
+def test_worker_engine_is_reused_across_chunks(tmp_path):
+    """La caché de entidades del proceso sigue viva entre bloques: un autor repetido no vuelve a escribir su tipo."""
+    mapping_data = load_mapping_file(project_path('map_scopus.yaml'))
+    chunk = pd.read_csv(project_path('scopus.csv'), dtype=str).head(1)
+    _init_worker(mapping_data, {})
+    try:
+        engine = parallel_conversion._worker_engine
+        first = _convert_shard(str(tmp_path / 'a.nt'), chunk)
+        second = _convert_shard(str(tmp_path / 'b.nt'), chunk)
+        assert parallel_conversion._worker_engine is engine
+    finally:
+        parallel_conversion._worker_engine = None
+    assert b'foaf/0.1/Person' in (tmp_path / 'a.nt').read_bytes()
+    assert b'foaf/0.1/Person' not in (tmp_path / 'b.nt').read_bytes()
+    assert second[2] < first[2]
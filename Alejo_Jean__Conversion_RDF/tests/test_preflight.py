@@ -0,0 +1,31 @@
+"""Pre-flight: las comprobaciones ven los valores tal como los transforma el motor."""
+import pandas as pd
+
+from preflight import validate_chunks
+from test_join_sources import load
+from test_value_transforms import year_mapping
+
+
+def kinds(report):
+    return {kind: count for (kind, _, _), (count, _) in report.issues.items()}
+
+
+def test_datatype_is_checked_after_transform():
+    mapping_data = year_mapping(transform=['strip', 'integer'], datatype='xsd:integer')
+    report = validate_chunks([pd.DataFrame({'id': ['1', '2'], 'Year': ['  007 ', 'n/a']})], mapping_data)
+    assert kinds(report) == {'transform_dropped': 1}
+
+
+def test_dayfirst_date_is_not_flagged():
+    mapping_data = year_mapping(transform=[{'date': {'format': '%d/%m/%Y'}}])
+    report = validate_chunks([pd.DataFrame({'id': ['1'], 'Year': ['15/03/2020']})], mapping_data)
+    assert kinds(report) == {}
+
+
+def test_join_uses_transformed_values(tmp_path):
+    mapping_data = load(tmp_path)
+    prop_conf = mapping_data['properties']['Authors']
+    prop_conf['transform'] = [{'extract': r'\((\d+)\)'}]
+    prop_conf['target']['join']['column'] = 'self'
+    df = pd.DataFrame({'EID': ['e1'], 'Authors': ['Ana (101); Luis (102)']})
+    assert kinds(validate_chunks([df], mapping_data)) == {}
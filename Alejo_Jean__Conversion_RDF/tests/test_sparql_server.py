@@ -0,0 +1,17 @@
+"""Clave de la caché del servidor SPARQL: consultas equivalentes comparten entrada."""
+import pytest
+
+from sparql_server import normalize_query
+
+
+@pytest.mark.parametrize('variant', [
+    'SELECT  ?s WHERE { ?s ?p ?o }  # c\n LIMIT 3',
+    '  SELECT ?s\n\tWHERE { ?s ?p ?o } # uno\n# dos\nLIMIT 3\n',
+])
+def test_whitespace_and_comments_collapse(variant):
+    assert normalize_query(variant) == normalize_query('SELECT ?s WHERE { ?s ?p ?o } LIMIT 3')
+
+
+def test_literals_and_iris_are_kept():
+    query = 'SELECT ?s WHERE { ?s <http://example.org/a#b> "x  # y" . ?s ?p \'\'\'z\n\n w\'\'\' }'
+    assert normalize_query(query) == query
@@ -0,0 +1,49 @@
+"""Transformaciones de valores: un `datatype` declarado no puede contradecir el de la conversión."""
+import pandas as pd
+import pytest
+from rdflib import XSD, Literal, URIRef
+
+from conversion_engine import ConversionEngine
+from mapping_plan import compile_mapping
+from preflight import validate_chunks
+from triple_buffer import TripleBuffer
+from value_transforms import transform_errors
+
+
+def year_mapping(**year_conf):
+    return {
+        'base_uri': 'http://example.org/',
+        'namespaces': {'xsd': str(XSD), 'ex': 'http://example.org/ns#'},
+        'subject': {'class': 'ex:Article', 'primary_key': 'id', 'uri_template': 'article/{value}'},
+        'properties': {'Year': {'predicate': 'ex:year', 'type': 'literal', **year_conf}},
+    }
+
+
+@pytest.mark.parametrize('conf', [
+    {'transform': ['date'], 'datatype': 'xsd:gYear'},
+    {'transform': ['integer'], 'datatype': 'xsd:date'},
+    {'transform': [{'date': '%Y'}], 'datatype': 'xsd:string'},
+])
+def test_conflicting_datatype_is_rejected(conf):
+    mapping_data = year_mapping(**conf)
+    errors = transform_errors(mapping_data)
+    assert len(errors) == 1 and "'Year'" in errors[0] and 'datatype' in errors[0]
+    with pytest.raises(ValueError, match='Year'):
+        compile_mapping(mapping_data, ['id', 'Year'])
+    report = validate_chunks([pd.DataFrame({'id': ['1'], 'Year': ['2019']})], mapping_data)
+    assert any('datatype' in error for error in report.errors)
+
+
+@pytest.mark.parametrize('conf', [
+    {'transform': ['strip', 'integer'], 'datatype': 'xsd:integer'},
+    {'transform': ['strip'], 'datatype': 'xsd:gYear'},
+    {'transform': [{'date': '%Y'}]},
+])
+def test_compatible_datatype_is_accepted(conf):
+    mapping_data = year_mapping(**conf)
+    assert transform_errors(mapping_data) == []
+    graph = TripleBuffer()
+    assert ConversionEngine(mapping_data).run(pd.DataFrame({'id': ['1'], 'Year': [' 2019 ']}), graph)
+    (value,) = [o for _, p, o in graph if p == URIRef('http://example.org/ns#year')]
+    expected = conf.get('datatype', 'xsd:date').replace('xsd:', str(XSD))
+    assert isinstance(value, Literal) and value.datatype == URIRef(expected)
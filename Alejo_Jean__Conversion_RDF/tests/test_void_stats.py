@@ -0,0 +1,39 @@
+"""Estadísticas VoID: contadas por lotes acotados, coinciden con los triples de la salida."""
+from functools import partial
+
+import pandas as pd
+from rdflib import RDF
+
+import conversion_engine
+from conftest import project_path
+from conversion_engine import ConversionEngine, load_mapping_file
+from triple_buffer import TripleBuffer
+from void_stats import DatasetStatistics, StatisticsSink
+
+
+class RecordingStatistics(DatasetStatistics):
+    """DatasetStatistics que recuerda el tamaño de cada lote recibido."""
+
+    def reset(self):
+        super().reset()
+        self.batches = []
+
+    def update(self, triples):
+        self.batches.append(len(triples))
+        super().update(triples)
+
+
+def test_statistics_counted_in_bounded_batches(synthetic_csv, monkeypatch):
+    monkeypatch.setattr(conversion_engine, 'StatisticsSink', partial(StatisticsSink, batch_size=1000))
+    engine = ConversionEngine(load_mapping_file(project_path('map_scopus.yaml')), statistics=True)
+    engine.statistics = statistics = RecordingStatistics()
+    graph = TripleBuffer()
+    assert engine.run(pd.read_csv(synthetic_csv('scopus', rows=300)), graph)
+
+    triples = set(graph)
+    assert len(statistics.batches) > 1 and max(statistics.batches) <= 1000
+    assert statistics.triples == len(triples)
+    assert statistics.subjects.count() == len({s for s, _, _ in triples})
+    assert statistics.objects.count() == len({o for _, _, o in triples})
+    types = [o for _, p, o in triples if p == RDF.type]
+    assert statistics.classes == {cls: types.count(cls) for cls in set(types)}
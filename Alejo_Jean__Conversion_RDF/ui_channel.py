@@ -0,0 +1,93 @@
+"""
+Canal de logs y progreso entre el hilo de conversión y la interfaz Tk.
+
+El motor puede emitir miles de mensajes (p. ej. la advertencia de número de
+valores que no coincide en cada autor) y una actualización de progreso por
+fila. En lugar de programar un `root.after` por cada uno, los mensajes se
+encolan y la interfaz los vacía en un tic fijo (UI_TICK_MS): todos los
+mensajes pendientes se insertan de una vez y del progreso sólo se usa el
+último valor. Las advertencias repetitivas se agrupan por tipo y columna:
+se muestran las primeras MAX_SAMPLES como ejemplo y el resto sólo se cuenta
+y se resume al final de la conversión.
+
+No depende de tkinter, de modo que puede usarse desde cualquier hilo y en
+el proceso de conversión (ver conversion_worker).
+"""
+import queue
+import re
+import threading
+
+UI_TICK_MS = 200
+MAX_SAMPLES = 3
+MAX_LOG_LINES = 5000
+
+# Advertencias repetitivas del motor -> descripción del grupo; la columna sale del propio mensaje
+_REPEATED_WARNINGS = (
+    (re.compile(r"col '(?P<column>[^']*)'\. El número de valores"), "número de valores que no coincide"),
+    (re.compile(r"en columna '(?P<column>[^']*)' no es una URI válida"), "valor que no es una URI válida"),
+    (re.compile(r"por clave primaria vacía"), "fila con clave primaria vacía"),
+)
+
+
+def _warning_group(message):
+    """(descripción, columna) si el mensaje es una advertencia repetitiva conocida, o None."""
+    if not message.startswith('ADVERTENCIA'):
+        return None
+    for pattern, kind in _REPEATED_WARNINGS:
+        match = pattern.search(message)
+        if match:
+            return kind, match.groupdict().get('column')
+    return None
+
+
+class UiChannel:
+    """Cola de mensajes y último progreso pendientes de mostrar en la interfaz."""
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self.max_samples = max_samples
+        self.messages = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.warning_counts = {}
+        self.pending_progress = None
+
+    def log(self, message):
+        group = _warning_group(message)
+        if group is not None:
+            with self.lock:
+                count = self.warning_counts[group] = self.warning_counts.get(group, 0) + 1
+            if count > self.max_samples:
+                return
+            if count == self.max_samples:
+                message += " (las siguientes advertencias de este tipo se resumirán al final)"
+        self.messages.put(message)
+
+    def extend(self, messages):
+        """Encola mensajes ya agrupados en otro proceso (ver conversion_worker)."""
+        for message in messages:
+            self.messages.put(message)
+
+    def progress(self, value, maximum=None):
+        with self.lock:
+            self.pending_progress = (value, maximum)
+
+    def summarize_warnings(self):
+        """Encola un resumen de las advertencias agrupadas y reinicia los contadores."""
+        with self.lock:
+            counts, self.warning_counts = self.warning_counts, {}
+        for (kind, column), count in counts.items():
+            if count > self.max_samples:
+                where = f" en la columna '{column}'" if column else ""
+                self.messages.put(f"ADVERTENCIA: {count} casos de {kind}{where} "
+                                  f"({count - self.max_samples} no mostrados).")
+
+    def drain(self):
+        """Devuelve (mensajes pendientes, último progreso o None). Se llama en cada tic de la interfaz."""
+        messages = []
+        try:
+            while True:
+                messages.append(self.messages.get_nowait())
+        except queue.Empty:
+            pass
+        with self.lock:
+            progress, self.pending_progress = self.pending_progress, None
+        return messages, progress
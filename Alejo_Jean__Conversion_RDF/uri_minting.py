@@ -0,0 +1,93 @@
+"""
+Generación de las claves que se insertan en las plantillas de URI.
+
+Una clave es el valor en minúsculas, con los espacios convertidos en '_',
+sin caracteres no permitidos en URIs y truncado a 70 caracteres. Las claves
+se memorizan por valor, así que una entidad repetida en miles de filas (o en
+varios bloques) sólo se sanea una vez.
+
+El truncado puede hacer que dos valores largos distintos compartan URI sin
+avisar; UriMinter lleva un índice de las claves truncadas y detecta esas
+colisiones. Según `collisions` se limita a informarlas ('report', el
+comportamiento por defecto, que conserva las URIs de siempre) o las evita
+('disambiguate') añadiendo a toda clave truncada un sufijo con el hash del
+valor completo, lo que da el mismo resultado sea cual sea el orden de las
+filas.
+"""
+import functools
+import hashlib
+import re
+
+MAX_KEY_LENGTH = 70
+DEFAULT_MEMO_SIZE = 65536
+COLLISION_POLICIES = ('report', 'disambiguate')
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_URI_UNSAFE_RE = re.compile(r'[^\w\-\._~]') # Caracteres permitidos en URIs
+
+
+def _normalize(value):
+    value = str(value).lower()
+    value = _WHITESPACE_RE.sub('_', value)
+    return _URI_UNSAFE_RE.sub('', value)
+
+
+def sanitize_for_uri(value):
+    return _normalize(value)[:MAX_KEY_LENGTH]
+
+
+def _hashed_key(full):
+    digest = hashlib.sha1(full.encode('utf-8')).hexdigest()[:8]
+    return f"{full[:MAX_KEY_LENGTH - 9]}_{digest}"
+
+
+class UriMinter:
+    """Claves de URI memorizadas por valor original, con detección de colisiones por truncado."""
+
+    def __init__(self, collisions='report', memo_size=DEFAULT_MEMO_SIZE, log=None):
+        if collisions not in COLLISION_POLICIES:
+            raise ValueError(f"Política de colisiones desconocida: '{collisions}'. Use una de {COLLISION_POLICIES}.")
+        self.collisions = collisions
+        self.log = log or (lambda message: None)
+        # Clave truncada -> valor normalizado completo que la generó primero
+        self.truncated = {}
+        self.reported = set()
+        self.collision_count = 0
+        self.key = functools.lru_cache(maxsize=memo_size)(self._key)
+
+    def reset(self):
+        self.key.cache_clear()
+        self.truncated.clear()
+        self.reported.clear()
+        self.collision_count = 0
+
+    def state(self):
+        """Índice de claves truncadas y colisiones, para guardarlo en un punto de control."""
+        return {'truncated': dict(self.truncated), 'reported': set(self.reported), 'collision_count': self.collision_count}
+
+    def restore(self, state):
+        self.truncated = dict(state['truncated'])
+        self.reported = set(state['reported'])
+        self.collision_count = state['collision_count']
+
+    def _key(self, value):
+        full = _normalize(value)
+        if len(full) <= MAX_KEY_LENGTH:
+            return full
+        return self._truncated_key(full)
+
+    def _truncated_key(self, full):
+        key = full[:MAX_KEY_LENGTH]
+        first = self.truncated.setdefault(key, full)
+        if first != full and full not in self.reported:
+            self.reported.add(full)
+            self.collision_count += 1
+            self.log(f"ADVERTENCIA: Colisión de URI: '{first}' y '{full}' comparten la clave truncada '{key}'."
+                     + (" Se desambigua con un hash." if self.collisions == 'disambiguate' else ""))
+        if self.collisions == 'disambiguate':
+            return _hashed_key(full)
+        return key
+
+    def summary(self):
+        return (f"Minado de URIs: {self.key.cache_info().currsize} valores memorizados, "
+                f"{self.collision_count} colisiones por truncado detectadas.")
@@ -0,0 +1,255 @@
+"""
+Transformaciones declarativas de los valores antes de generar los triples.
+
+Las entradas de `properties` (y las propiedades de `target.properties`)
+pueden declarar en `transform` una lista de operaciones que se aplican en
+orden a cada valor (a cada elemento, si la columna es multivaluada):
+
+    Cited by:
+      predicate: schema:citationCount
+      type: literal
+      transform: [strip, integer]            # literal xsd:integer
+    Author full names:
+      predicate: dc:creator
+      type: relation
+      separator: ;
+      transform:
+      - extract: '\\((\\d+)\\)'              # "Vélez, Michelle (59545857400)" -> "59545857400"
+      target: ...
+
+Las operaciones son un conjunto fijo (TRANSFORM_OPS) y se ejecutan sobre la
+columna entera con los métodos vectorizados de pandas/Arrow, y sólo sobre
+los valores distintos del bloque. Las expresiones regulares de `extract` y
+`replace` siguen la sintaxis del módulo `re` de Python. Los valores que quedan vacíos o no se
+pueden convertir (una fecha no válida, un texto sin coincidencias) se
+descartan. Una conversión a fecha o número fija el tipo del literal: si la
+propiedad declara además otro `datatype`, el mapeo no es válido.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+from rdflib import XSD, Namespace, URIRef
+
+from csv_ingest import TEXT_DTYPE
+
+_INTEGER_RE = r'[+-]?\d+(?:\.0*)?'
+_DECIMAL_RE = r'[+-]?(?:\d+(?:\.\d*)?|\.\d+)'
+
+
+def _strip(values):
+    return values.str.strip()
+
+
+def _normalize_spaces(values):
+    return values.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def _lower(values):
+    return values.str.lower()
+
+
+def _upper(values):
+    return values.str.upper()
+
+
+def _title(values):
+    return values.str.title()
+
+
+def _extract(pattern):
+    if not isinstance(pattern, str):
+        raise ValueError("'extract' necesita una expresión regular")
+    # Sin grupos se extrae la coincidencia completa; con varios, el primero
+    if re.compile(pattern).groups == 0:
+        pattern = f'({pattern})'
+    def extract(values):
+        return values.astype(object).str.extract(pattern, expand=True)[0]
+    return extract
+
+
+def _replace(conf):
+    if not isinstance(conf, dict) or not isinstance(conf.get('pattern'), str):
+        raise ValueError("'replace' necesita 'pattern' y, opcionalmente, 'with'")
+    pattern, repl = conf['pattern'], str(conf.get('with', ''))
+    re.compile(pattern)
+    def replace(values):
+        return values.astype(object).str.replace(pattern, repl, regex=True)
+    return replace
+
+
+def _date(conf):
+    # `date`, `date: '%d/%m/%Y'` o `date: {format: ..., dayfirst: true}`
+    if conf is None or isinstance(conf, str):
+        conf = {'format': conf}
+    if not isinstance(conf, dict):
+        raise ValueError("'date' admite un formato o un objeto con 'format' y 'dayfirst'")
+    date_format = conf.get('format') or 'mixed'
+    dayfirst = bool(conf.get('dayfirst', False))
+    def date(values):
+        parsed = pd.to_datetime(values.str.strip(), errors='coerce', format=date_format, dayfirst=dayfirst)
+        return parsed.dt.strftime('%Y-%m-%d')
+    return date
+
+
+def _integer(values):
+    text = values.str.strip()
+    valid = text.str.fullmatch(_INTEGER_RE).fillna(False)
+    # Forma canónica: sin '+', sin ceros a la izquierda ni parte decimal nula
+    text = (text.str.replace(r'\..*$', '', regex=True).str.replace(r'^\+', '', regex=True)
+            .str.replace(r'^(-?)0+(\d)', r'\1\2', regex=True))
+    return text.where(valid)
+
+
+def _decimal(values):
+    text = values.str.strip()
+    return text.where(text.str.fullmatch(_DECIMAL_RE).fillna(False))
+
+
+# Operación -> (función, o constructor que recibe el argumento de la operación; tipo de datos que produce)
+TRANSFORM_OPS = {
+    'strip': (_strip, None),
+    'normalize_spaces': (_normalize_spaces, None),
+    'lower': (_lower, None),
+    'upper': (_upper, None),
+    'title': (_title, None),
+    'extract': (_extract, None),
+    'replace': (_replace, None),
+    'date': (_date, XSD.date),
+    'integer': (_integer, XSD.integer),
+    'decimal': (_decimal, XSD.decimal),
+}
+# Operaciones que necesitan un argumento (`{extract: ...}`); `date` lo admite opcionalmente
+_BUILDERS = {'extract', 'replace', 'date'}
+# Valores ya transformados que recuerda cada transformación en el motor fila a fila
+_MEMO_SIZE = 100000
+
+
+class ValueTransform:
+    """
+    Secuencia compilada de operaciones de `transform`. `datatype` es el tipo
+    de datos de la última operación de conversión (fecha o número), y
+    `dropped` cuenta los valores descartados en la ejecución.
+    """
+
+    def __init__(self, steps, name=''):
+        if isinstance(steps, (str, dict)):
+            steps = [steps]
+        if not isinstance(steps, list) or not steps:
+            raise ValueError("'transform' debe ser una operación o una lista de operaciones")
+        self.name = name
+        self.steps = []
+        self.datatype = None
+        for step in steps:
+            if isinstance(step, dict) and len(step) == 1:
+                (op, arg), = step.items()
+            elif isinstance(step, str):
+                op, arg = step, None
+            else:
+                raise ValueError(f"Operación de 'transform' no válida: {step!r}")
+            if op not in TRANSFORM_OPS:
+                raise ValueError(f"Operación de 'transform' desconocida: '{op}'. Use una de {sorted(TRANSFORM_OPS)}.")
+            function, datatype = TRANSFORM_OPS[op]
+            if op in _BUILDERS:
+                if arg is None and op != 'date':
+                    raise ValueError(f"La operación '{op}' necesita un argumento")
+                try:
+                    function = function(arg)
+                except re.error as e:
+                    raise ValueError(f"Expresión regular no válida en '{op}': {e}") from e
+            elif arg is not None:
+                raise ValueError(f"La operación '{op}' no admite argumentos")
+            self.steps.append((op, function))
+            self.datatype = datatype or self.datatype
+        self.dropped = 0
+        self._memo = {}
+
+    def _run(self, values):
+        for _, function in self.steps:
+            values = function(values).astype(TEXT_DTYPE)
+        return values
+
+    def split(self, values):
+        """
+        (transformados, descartados) de una Serie de textos sin nulos: los
+        valores transformados con su índice, sin los que quedan vacíos, y los
+        valores originales descartados (ver preflight).
+        """
+        codes, uniques = pd.factorize(values)
+        result = self._run(pd.Series(uniques, dtype=TEXT_DTYPE))
+        keep = (result.str.strip() != '').fillna(False).to_numpy(dtype=bool)[codes]
+        transformed = result.to_numpy(dtype=object, na_value=None)[codes[keep]]
+        return pd.Series(transformed, index=values.index[keep], dtype=object), values[~keep]
+
+    def apply(self, values):
+        """
+        Transforma una Serie de textos sin nulos, conservando su índice y
+        descartando los valores que quedan vacíos.
+        """
+        transformed, dropped = self.split(values)
+        self.dropped += len(dropped)
+        return transformed
+
+    def apply_value(self, value):
+        """Versión de `apply` para un solo valor (motor fila a fila); None si se descarta."""
+        if value not in self._memo:
+            if len(self._memo) >= _MEMO_SIZE:
+                self._memo.clear()
+            result = self._run(pd.Series([value], dtype=TEXT_DTYPE)).iloc[0]
+            self._memo[value] = None if pd.isna(result) or not result.strip() else result
+        result = self._memo[value]
+        if result is None:
+            self.dropped += 1
+        return result
+
+    def summary(self):
+        return f"Transformación de '{self.name}': {self.dropped} valores descartados (vacíos o no convertibles)."
+
+
+def compile_transform(conf, name=''):
+    """ValueTransform de `conf['transform']`, o None si la entrada no declara transformaciones."""
+    steps = conf.get('transform') if isinstance(conf, dict) else None
+    return None if steps is None else ValueTransform(steps, name)
+
+
+def check_datatype(transform, datatype):
+    """
+    Error si la propiedad declara un `datatype` (ya resuelto) distinto del que
+    produce la conversión de su `transform` (fecha o número): el literal
+    llevaría un tipo que no corresponde a su valor ("2019-01-01"^^xsd:gYear).
+    """
+    if transform is None or transform.datatype is None or datatype == transform.datatype:
+        return
+    raise ValueError(f"'datatype' {datatype} no coincide con el tipo {transform.datatype} que produce "
+                     f"'transform'. Quite 'datatype' o declare el de la transformación.")
+
+
+def _declared_datatype(value, ns_map):
+    # Como mapping_plan.resolve_prefix, sin sus advertencias
+    prefix, sep, name = str(value).partition(':')
+    return ns_map[prefix][name] if sep and prefix in ns_map else URIRef(value)
+
+
+def transform_errors(mapping_data):
+    """Errores de los `transform` de las propiedades y sub-propiedades del mapeo."""
+    errors = []
+    ns_map = {k: Namespace(v) for k, v in (mapping_data.get('namespaces') or {}).items()}
+    for col, prop_conf in (mapping_data.get('properties') or {}).items():
+        if not isinstance(prop_conf, dict):
+            continue
+        if prop_conf.get('type', 'literal') == 'literal' and 'datatype' in prop_conf:
+            try:
+                check_datatype(compile_transform(prop_conf, col), _declared_datatype(prop_conf['datatype'], ns_map))
+            except ValueError as e:
+                errors.append(f"'{col}': {e}")
+                continue
+        entries = [(col, prop_conf)]
+        for sub_prop in (prop_conf.get('target') or {}).get('properties') or []:
+            if isinstance(sub_prop, dict):
+                entries.append((f"{col} -> {sub_prop.get('predicate')}", sub_prop))
+        for name, conf in entries:
+            try:
+                compile_transform(conf, name)
+            except ValueError as e:
+                errors.append(f"'{name}': {e}")
+    return errors
@@ -0,0 +1,321 @@
+"""
+Estadísticas del conjunto de datos (VoID) calculadas durante la conversión.
+
+El motor entrega a DatasetStatistics los triples en lotes de, como mucho,
+STATISTICS_BATCH_SIZE (ver StatisticsSink) y se cuentan lote a lote, con
+operaciones vectorizadas sobre las huellas (hash de 64 bits) de los términos:
+
+- triples por propiedad e instancias por clase (triples `rdf:type`),
+- sujetos y objetos distintos: exactos hasta EXACT_LIMIT huellas distintas
+  y después con un sketch HyperLogLog (error ~0,8 %),
+- distribución de los literales por tipo de datos.
+
+Al terminar se escribe una descripción VoID en Turtle junto a la salida
+(`salida.void.ttl`). Los triples repetidos dentro de un lote se cuentan una
+vez; uno repetido en dos lotes distintos cuenta dos veces en los recuentos
+por propiedad y por clase, por eso `void:triples` se toma, si se conoce, del
+tamaño real de la salida.
+"""
+import os
+from collections import Counter, deque
+from operator import attrgetter, itemgetter
+
+import numpy as np
+import pandas as pd
+from rdflib import RDF, XSD, Graph, Literal, Namespace, URIRef
+
+VOID = Namespace('http://rdfs.org/ns/void#')
+# Extensión de VoID para particiones por tipo de datos (http://ldf.fi/void-ext)
+VOID_EXT = Namespace('http://ldf.fi/void-ext#')
+VOID_SUFFIX = '.void.ttl'
+
+# Distintos que se cuentan de forma exacta antes de pasar al sketch
+EXACT_LIMIT = 1 << 20
+# 2^14 registros: error típico 1,04 / sqrt(2^14) ≈ 0,8 %
+HLL_PRECISION = 14
+# Huellas pendientes a partir de las que DistinctCounter las une al array exacto
+MIN_MERGE_SIZE = 1 << 16
+# Triples que StatisticsSink retiene antes de entregarlos al destino y contarlos
+STATISTICS_BATCH_SIZE = 10000
+
+# Los atributos de un Namespace de rdflib se resuelven en cada acceso: se guardan una vez
+RDF_LANG_STRING = RDF.langString
+XSD_STRING = XSD.string
+_TYPE_HASH = pd.util.hash_array(np.array([str(RDF.type)], dtype=object))[0]
+
+
+def void_path_for(out_path):
+    return os.path.splitext(out_path)[0] + VOID_SUFFIX
+
+
+def term_hashes(terms):
+    """Huella de 64 bits del texto de cada término (vectorizado con pandas)."""
+    return pd.util.hash_array(np.asarray(terms, dtype=object), categorize=False)
+
+
+def _leading_zeros(words):
+    """Ceros a la izquierda de cada entero de 64 bits (distinto de 0), por búsqueda binaria vectorizada."""
+    zeros = np.zeros(words.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = (words >> np.uint64(64 - shift)) == 0
+        zeros[empty] += shift
+        words = np.where(empty, words << np.uint64(shift), words)
+    return zeros
+
+
+class HyperLogLog:
+    """Sketch HyperLogLog sobre huellas de 64 bits ya calculadas."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        if hashes.size == 0:
+            return
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        # Bit centinela: el rango queda acotado a 64 - p + 1
+        rest = (hashes << np.uint64(p)) | np.uint64(1 << (p - 1))
+        np.maximum.at(self.registers, index, _leading_zeros(rest) + 1)
+
+    def estimate(self):
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            # Corrección para cardinalidades pequeñas (linear counting)
+            estimate = m * np.log(m / empty)
+        return int(round(estimate))
+
+
+class DistinctCounter:
+    """
+    Número de valores distintos: exacto hasta `exact_limit` huellas y
+    aproximado (HyperLogLog) después. Las huellas exactas se guardan en un
+    array ordenado de uint64 (8 bytes por valor, frente a ~70 en un set).
+    """
+
+    def __init__(self, exact_limit=EXACT_LIMIT):
+        self.exact_limit = exact_limit
+        self.exact = np.empty(0, dtype=np.uint64)
+        self.sketch = None
+        self.pending = []
+        self.pending_size = 0
+
+    def update(self, hashes):
+        if self.sketch is not None:
+            self.sketch.update(hashes)
+            return
+        # Unir con el array ordenado cuesta tanto como su tamaño: los lotes se acumulan hasta
+        # igualarlo, de modo que el coste total no depende del número de lotes
+        self.pending.append(hashes)
+        self.pending_size += hashes.size
+        if self.pending_size >= max(self.exact.size, MIN_MERGE_SIZE):
+            self._merge()
+
+    def _merge(self):
+        if self.pending:
+            self.exact = np.union1d(self.exact, np.concatenate(self.pending))
+            self.pending, self.pending_size = [], 0
+        if self.exact.size > self.exact_limit:
+            self.sketch = HyperLogLog()
+            self.sketch.update(self.exact)
+            self.exact = np.empty(0, dtype=np.uint64)
+
+    @property
+    def approximate(self):
+        self._merge()
+        return self.sketch is not None
+
+    def count(self):
+        self._merge()
+        return self.sketch.estimate() if self.sketch is not None else int(self.exact.size)
+
+    def copy(self):
+        counter = DistinctCounter(self.exact_limit)
+        # Los arrays de huellas no se modifican en el sitio: basta con copiar la lista de pendientes
+        counter.exact, counter.pending, counter.pending_size = self.exact, list(self.pending), self.pending_size
+        if self.sketch is not None:
+            counter.sketch = HyperLogLog(self.sketch.precision)
+            counter.sketch.registers = self.sketch.registers.copy()
+        return counter
+
+
+class DatasetStatistics:
+    """Contadores incrementales de los triples emitidos por el motor."""
+
+    def __init__(self, exact_limit=EXACT_LIMIT):
+        self.exact_limit = exact_limit
+        self.reset()
+
+    def reset(self):
+        self.triples = 0
+        self.predicates = Counter()
+        self.classes = Counter()
+        self.datatypes = Counter()
+        self.subjects = DistinctCounter(self.exact_limit)
+        self.objects = DistinctCounter(self.exact_limit)
+
+    def update(self, triples):
+        """Cuenta un lote de triples."""
+        if not triples:
+            return
+        subjects, predicates, objects = (np.fromiter(map(itemgetter(i), triples), dtype=object, count=len(triples))
+                                         for i in range(3))
+        # Los sujetos y las propiedades se repiten mucho: se calcula la huella de cada término distinto una vez
+        subject_codes, unique_subjects = pd.factorize(subjects)
+        subject_hashes = term_hashes(unique_subjects)[subject_codes]
+        predicate_codes, unique_predicates = pd.factorize(predicates)
+        predicate_hashes = term_hashes(unique_predicates)[predicate_codes]
+        object_hashes = term_hashes(objects)
+        # El motor sólo crea Literal (sin subclases): comparar el tipo es más rápido que isinstance
+        literal = np.fromiter(map(type, objects), dtype=object, count=len(objects)) == Literal
+        literals = objects[literal]
+        datatypes = np.array(list(map(attrgetter('datatype'), literals)), dtype=object)
+        untyped = pd.isna(datatypes)
+        if untyped.any():
+            # Sin tipo explícito: rdf:langString si tiene idioma y xsd:string si no
+            languages = np.array(list(map(attrgetter('language'), literals[untyped])), dtype=object)
+            datatypes[untyped] = XSD_STRING
+            datatypes[np.flatnonzero(untyped)[pd.notna(languages)]] = RDF_LANG_STRING
+        datatype_codes, unique_datatypes = pd.factorize(datatypes)
+        if datatype_codes.size:
+            # Un literal y una URI con el mismo texto, o dos literales de distinto tipo, son objetos distintos
+            object_hashes[literal] ^= term_hashes(unique_datatypes)[datatype_codes] * np.uint64(0x9E3779B97F4A7C15)
+
+        # El motor puede emitir un mismo triple más de una vez en un bloque (p. ej. desde dos
+        # propiedades); un destino que es un conjunto lo guarda una vez, así que se cuenta una vez
+        keys = subject_hashes * np.uint64(0xC2B2AE3D27D4EB4F) ^ predicate_hashes * np.uint64(0x165667B19E3779F9) \
+            ^ object_hashes
+        repeated = pd.Series(keys).duplicated().to_numpy()
+        if repeated.any():
+            kept = ~repeated
+            datatype_codes = datatype_codes[kept[literal]]
+            objects, predicate_codes = objects[kept], predicate_codes[kept]
+            subject_hashes, predicate_hashes, object_hashes = subject_hashes[kept], predicate_hashes[kept], object_hashes[kept]
+        self.triples += len(predicate_codes)
+        self.subjects.update(pd.unique(subject_hashes))
+        self.objects.update(pd.unique(object_hashes))
+        for code, count in enumerate(np.bincount(datatype_codes, minlength=len(unique_datatypes))):
+            self.datatypes[unique_datatypes[code]] += int(count)
+        for code, count in enumerate(np.bincount(predicate_codes, minlength=len(unique_predicates))):
+            self.predicates[unique_predicates[code]] += int(count)
+        typed = predicate_hashes == _TYPE_HASH
+        if typed.any():
+            self.classes.update(objects[typed].tolist())
+
+    def state(self):
+        return {'triples': self.triples, 'predicates': dict(self.predicates), 'classes': dict(self.classes),
+                'datatypes': dict(self.datatypes), 'subjects': self.subjects.copy(), 'objects': self.objects.copy()}
+
+    def restore(self, state):
+        self.triples = state['triples']
+        self.predicates = Counter(state['predicates'])
+        self.classes = Counter(state['classes'])
+        self.datatypes = Counter(state['datatypes'])
+        self.subjects = state['subjects'].copy()
+        self.objects = state['objects'].copy()
+
+    def void_graph(self, dataset_uri, triples=None, data_dump=None):
+        """Descripción VoID del conjunto de datos; `triples` es el total de la salida si se conoce."""
+        graph = Graph()
+        graph.bind('void', VOID)
+        graph.bind('void-ext', VOID_EXT)
+        graph.bind('xsd', XSD)
+        dataset = URIRef(dataset_uri)
+        add = graph.add
+        add((dataset, RDF.type, VOID.Dataset))
+        add((dataset, VOID.triples, Literal(self.triples if triples is None else triples)))
+        add((dataset, VOID.distinctSubjects, Literal(self.subjects.count())))
+        add((dataset, VOID.distinctObjects, Literal(self.objects.count())))
+        add((dataset, VOID.properties, Literal(len(self.predicates))))
+        add((dataset, VOID.classes, Literal(len(self.classes))))
+        if data_dump:
+            add((dataset, VOID.dataDump, URIRef(data_dump)))
+        for n, (predicate, count) in enumerate(self.predicates.most_common()):
+            partition = URIRef(f"{dataset_uri}/property/{n}")
+            add((dataset, VOID.propertyPartition, partition))
+            add((partition, VOID.property, predicate))
+            add((partition, VOID.triples, Literal(count)))
+        for n, (cls, count) in enumerate(self.classes.most_common()):
+            partition = URIRef(f"{dataset_uri}/class/{n}")
+            add((dataset, VOID.classPartition, partition))
+            add((partition, VOID['class'], cls))
+            add((partition, VOID.entities, Literal(count)))
+        for n, (datatype, count) in enumerate(self.datatypes.most_common()):
+            partition = URIRef(f"{dataset_uri}/datatype/{n}")
+            add((dataset, VOID_EXT.datatypePartition, partition))
+            add((partition, VOID_EXT.datatype, datatype))
+            add((partition, VOID.triples, Literal(count)))
+        return graph
+
+    def save_void(self, path, dataset_uri, triples=None, data_dump=None):
+        self.void_graph(dataset_uri, triples, data_dump).serialize(destination=path, format='turtle', encoding='utf-8')
+
+    def summary(self, triples=None):
+        approx = lambda counter: "~" if counter.approximate else ""
+        return (f"Estadísticas VoID: {self.triples if triples is None else triples} triples, "
+                f"{len(self.predicates)} propiedades, {len(self.classes)} clases, "
+                f"{approx(self.subjects)}{self.subjects.count()} sujetos y "
+                f"{approx(self.objects)}{self.objects.count()} objetos distintos.")
+
+
+def dataset_uri_for(mapping_data):
+    """URI del conjunto de datos en la descripción VoID: `<base_uri>dataset`."""
+    return f"{mapping_data.get('base_uri', 'urn:conversor:')}dataset"
+
+
+class StatisticsSink:
+    """
+    Envoltorio del destino del motor que cuenta los triples en DatasetStatistics.
+    Los triples se acumulan en un lote que pasa al destino real y a las
+    estadísticas cada `batch_size` triples y al vaciar el bloque, de modo que
+    la memoria del lote no crece con el tamaño del bloque.
+    """
+
+    def __init__(self, sink, statistics, metrics=None, batch_size=STATISTICS_BATCH_SIZE):
+        self.sink = sink
+        self.statistics = statistics
+        self.metrics = metrics
+        self.batch_size = batch_size
+        self.batch = []
+        self._append = self.batch.append
+
+    def add(self, triple):
+        self._append(triple)
+        if len(self.batch) >= self.batch_size:
+            self.forward()
+
+    def bind(self, prefix, namespace):
+        self.sink.bind(prefix, namespace)
+
+    def forward(self):
+        """Entrega el lote al destino real y lo cuenta."""
+        batch = self.batch
+        if not batch:
+            return
+        # Bucle en C sobre el lote
+        deque(map(self.sink.add, batch), maxlen=0)
+        if self.metrics is not None:
+            with self.metrics.timed('statistics'):
+                self.statistics.update(batch)
+        else:
+            self.statistics.update(batch)
+        batch.clear()
+
+    def flush(self):
+        """Cuenta el lote y vacía el destino real (en los escritores en streaming, serializarlo)."""
+        self.forward()
+        flush = getattr(self.sink, 'flush', None)
+        if not flush:
+            return
+        if self.metrics is not None:
+            with self.metrics.timed('serialization'):
+                flush()
+        else:
+            flush()
+
+    def __len__(self):
+        return len(self.sink) + len(self.batch)
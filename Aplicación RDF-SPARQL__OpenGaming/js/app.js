@@ -3,7 +3,9 @@ const form = document.getElementById('game-form');
 const resultsGrid = document.getElementById('results-grid');
 const loader = document.getElementById('loader');
 const noResults = document.getElementById('no-results');
-const dbpediaEndpoint = 'https://dbpedia.org/sparql';
+// SPARQL endpoint: DBpedia by default, or a local one passed as ?endpoint=...
+// (e.g. index.html?endpoint=http://localhost:8890/sparql with the converter's sparql_server)
+const sparqlEndpoint = new URLSearchParams(window.location.search).get('endpoint') || 'https://dbpedia.org/sparql';
 
 // Elements for debugging display
 const queryDisplaySection = document.getElementById('query-display-section');
@@ -30,7 +32,7 @@ form.addEventListener('submit', async (e) => {
     // --- END DEBUGGING ---
 
     try {
-        const response = await fetch(dbpediaEndpoint + '?query=' + encodeURIComponent(sparqlQuery) + '&format=json');
+        const response = await fetch(sparqlEndpoint + '?query=' + encodeURIComponent(sparqlQuery) + '&format=json');
         if (!response.ok) {
             throw new Error(`Error en la consulta SPARQL: ${response.statusText}`);
         }
@@ -38,7 +40,7 @@ form.addEventListener('submit', async (e) => {
         displayResults(data.results.bindings);
     } catch (error) {
         console.error('Error fetching data:', error);
-        noResults.textContent = 'Ocurrió un error al conectar con DBpedia. Inténtalo de nuevo más tarde.';
+        noResults.textContent = `Ocurrió un error al conectar con ${sparqlEndpoint}. Inténtalo de nuevo más tarde.`;
         noResults.classList.remove('hidden');
     } finally {
         loader.classList.add('hidden');